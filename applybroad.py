@@ -1,41 +1,323 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
+from bs4 import NavigableString, Tag
+import argparse
 import logging
 import time
 import json
 from datetime import datetime
 import re
+from urllib.parse import urljoin, urlparse, parse_qsl, urlencode, urlunparse
+from debug_sink import MODES, ON_ERROR, get_shared_sink
+from driver_pool import DriverPool
+from network_capture import find_json_exchanges, get_response_json, replay_request
+from normalize import CITY_REGION, clean_text
+from page_cache import PageCache
+from page_readiness import wait_until_ready
+from parsing import make_soup
+from rate_limiter import get_shared_limiter
+from record_stream import RecordWriter
+from selenium.common.exceptions import TimeoutException
+from seen_index import SeenIndex, UNCHANGED
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-class ApplyBoardScraper:
-    def __init__(self, headless=True):
-        chrome_options = Options()
-        if headless:
-            chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-        
-        # Additional options to avoid detection
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        chrome_options.add_experimental_option('useAutomationExtension', False)
-        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+# XHR endpoints the search SPA loads its results from
+SEARCH_API_PATTERN = re.compile(r"applyboard\.com/.*(api|graphql).*(search|program)", re.IGNORECASE)
 
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=chrome_options)
-        
-        # Execute script to remove webdriver property
-        self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        
+PROGRAM_LINK_SELECTOR = "a[href*='/programs/']"
+
+# Ancestors searched for a link's card, in the live harvest and in segment_cards
+CARD_MAX_DEPTH = 15
+
+# Returns the text of cards whose program link has not been harvested yet and
+# marks them, so each scroll step only touches newly rendered cards. Cards are
+# found as segment_cards finds them: ancestors are tracked by pointer walking
+# (program hrefs below each one, and whether it holds the 'Tuition' and
+# 'Location' labels, from one pass over the text nodes), and innerText is
+# read once per card rather than at every level of a per-link climb.
+HARVEST_NEW_CARDS_JS = """
+const [selector, limit, maxDepth] = arguments;
+const links = Array.from(document.querySelectorAll(selector));
+const fresh = links.filter(link => !link.hasAttribute('data-harvested')).slice(0, limit);
+if (!fresh.length) return [];
+
+const hrefsBelow = new Map();
+for (const link of links) {
+    const href = link.getAttribute('href');
+    let node = link.parentElement;
+    for (let depth = 0; node && depth < maxDepth; depth++, node = node.parentElement) {
+        if (!hrefsBelow.has(node)) hrefsBelow.set(node, new Set());
+        hrefsBelow.get(node).add(href);
+    }
+}
+
+const labelled = {Tuition: new Set(), Location: new Set()};
+const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+for (let text = walker.nextNode(); text; text = walker.nextNode()) {
+    for (const word in labelled) {
+        if (!text.data.includes(word)) continue;
+        // Everything above an already-marked ancestor is marked too
+        for (let node = text.parentElement; node && !labelled[word].has(node); node = node.parentElement) {
+            labelled[word].add(node);
+        }
+    }
+}
+
+const texts = new Map();
+return fresh.map(link => {
+    link.setAttribute('data-harvested', '1');
+    let card = null, largest = null, node = link.parentElement;
+    for (let depth = 0; node && depth < maxDepth; depth++, node = node.parentElement) {
+        if (hrefsBelow.get(node).size > 1) break;
+        largest = node;
+        if (labelled.Tuition.has(node) && labelled.Location.has(node)) { card = node; break; }
+    }
+    card = card || largest || link;
+    if (!texts.has(card)) texts.set(card, card.innerText || '');
+    return {href: link.getAttribute('href'), text: texts.get(card)};
+});
+"""
+
+ITEM_LIST_KEYS = ("data", "programs", "results", "hits", "items", "records", "edges")
+
+
+def _pick(item, *paths):
+    """Return the first non-empty value found at any dotted path in a nested dict"""
+    for path in paths:
+        value = item
+        for part in path.split("."):
+            value = value.get(part) if isinstance(value, dict) else None
+        if value not in (None, "", [], {}):
+            return value
+    return None
+
+
+def _set_query(url, key, value):
+    parsed = urlparse(url)
+    query = dict(parse_qsl(parsed.query, keep_blank_values=True))
+    query[key] = value
+    return urlunparse(parsed._replace(query=urlencode(query)))
+
+
+def find_program_items(payload, depth=0):
+    """Locate the list of program objects inside a search API payload"""
+    if isinstance(payload, list):
+        return payload if payload and all(isinstance(item, dict) for item in payload) else []
+    if not isinstance(payload, dict) or depth > 3:
+        return []
+    for key in ITEM_LIST_KEYS:
+        items = find_program_items(payload.get(key), depth + 1)
+        if items:
+            return items
+    return []
+
+
+def map_api_program(item):
+    """Map one search API object straight into the program schema"""
+    attrs = item.get("node") or item.get("_source") or item
+    attrs = dict(attrs, **attrs.get("attributes", {})) if isinstance(attrs.get("attributes"), dict) else attrs
+
+    city = _pick(attrs, "city", "campus.city", "school.city", "location.city", "campus_city")
+    region = _pick(attrs, "state", "province", "campus.state", "school.state", "location.state",
+                   "country", "school.country", "location.country")
+    location = ", ".join(str(part) for part in (city, region) if part) or "N/A"
+
+    tuition = "N/A"
+    amount = _pick(attrs, "tuition.amount", "first_year_tuition", "tuition", "tuition_fee", "tuitionFee")
+    if isinstance(amount, (int, float)):
+        currency = _pick(attrs, "tuition.currency", "currency", "tuition_currency") or "USD"
+        tuition = f"${amount:,.0f} {currency}" if currency == "USD" else f"{amount:,.0f} {currency}"
+    elif isinstance(amount, str):
+        tuition = amount
+
+    path = _pick(attrs, "url", "path", "program_url", "programUrl")
+    if not path:
+        slug = _pick(attrs, "slug", "id") or _pick(item, "id")
+        path = f"/programs/{slug}" if slug else ""
+
+    program_info = {
+        "title": _pick(attrs, "name", "title", "program_name", "programName") or "N/A",
+        "school": _pick(attrs, "school.name", "school_name", "schoolName", "institution.name", "institution_name") or "N/A",
+        "location": location,
+        "tuition": tuition,
+        "url": urljoin("https://www.applyboard.com", path) if path else "N/A",
+    }
+
+    # Structured extras that the DOM cards never exposed
+    for field, paths in (("level", ("level", "program_level", "credential")),
+                         ("duration", ("duration", "length")),
+                         ("intakes", ("intakes", "start_dates"))):
+        value = _pick(attrs, *paths)
+        if value is not None:
+            program_info[field] = value
+    return program_info
+
+
+def next_api_request(request, payload):
+    """Build the request for the next result page from the payload's cursor or page counters"""
+    if not isinstance(payload, dict):
+        return None
+
+    links = payload.get("links")
+    if isinstance(links, dict) and links.get("next"):
+        return dict(request, url=urljoin(request["url"], links["next"]))
+
+    try:
+        body = json.loads(request["post_data"]) if request.get("post_data") else None
+    except ValueError:
+        body = None
+
+    meta = payload.get("meta") if isinstance(payload.get("meta"), dict) else {}
+    cursor = (_pick(meta, "next_cursor", "nextCursor", "cursor.next", "pagination.next_cursor")
+              or _pick(payload, "next_cursor", "nextCursor", "pageInfo.endCursor"))
+    if cursor:
+        if isinstance(body, dict):
+            return dict(request, post_data=json.dumps(dict(body, cursor=cursor)))
+        return dict(request, url=_set_query(request["url"], "cursor", cursor))
+
+    total_pages = _pick(meta, "total_pages", "totalPages", "last_page", "pagination.total_pages", "page.total")
+    query = dict(parse_qsl(urlparse(request["url"]).query))
+    for key in ("page[number]", "page"):
+        if key in query and query[key].isdigit():
+            current = int(query[key])
+            if total_pages and current >= int(total_pages):
+                return None
+            return dict(request, url=_set_query(request["url"], key, str(current + 1)))
+    if isinstance(body, dict) and isinstance(body.get("page"), int):
+        if total_pages and body["page"] >= int(total_pages):
+            return None
+        return dict(request, post_data=json.dumps(dict(body, page=body["page"] + 1)))
+    return None
+
+
+def _is_program_href(href):
+    return bool(href) and '/programs/' in href
+
+
+def segment_cards(soup, max_depth=CARD_MAX_DEPTH):
+    """Split a search page into (href, card_text) pairs in one traversal.
+
+    A link's card is the lowest ancestor holding the 'Tuition' and 'Location'
+    labels while containing only that one program; failing that, the largest
+    ancestor that contains no other program. Ancestor bookkeeping is pointer
+    walking only, and each card's text is serialized exactly once.
+    """
+    # One walk over the tree collects program links and label strings
+    links, labels = [], []
+    for node in soup.descendants:
+        if isinstance(node, Tag):
+            if node.name == 'a' and _is_program_href(node.get('href')):
+                links.append(node)
+        elif type(node) is NavigableString and ('Tuition' in node or 'Location' in node):
+            labels.append(node)
+
+    # Distinct program hrefs under each ancestor (keyed by id: tags hash by content)
+    hrefs_below = {}
+    for link in links:
+        href = link['href']
+        for depth, ancestor in enumerate(link.parents):
+            if depth >= max_depth:
+                break
+            hrefs_below.setdefault(id(ancestor), set()).add(href)
+
+    # Ancestors that contain the field labels
+    has_tuition, has_location = set(), set()
+    for label in labels:
+        for flags, word in ((has_tuition, 'Tuition'), (has_location, 'Location')):
+            if word not in label:
+                continue
+            for ancestor in label.parents:
+                # Everything above an already-marked ancestor is marked too
+                if id(ancestor) in flags:
+                    break
+                flags.add(id(ancestor))
+
+    cards = []
+    card_texts = {}
+    emitted = set()
+    for link in links:
+        href = link['href']
+        card = None
+        largest = None
+        for depth, ancestor in enumerate(link.parents):
+            if depth >= max_depth or len(hrefs_below.get(id(ancestor), ())) > 1:
+                break
+            largest = ancestor
+            if id(ancestor) in has_tuition and id(ancestor) in has_location:
+                card = ancestor
+                break
+        card = card or largest
+        if card is None or (id(card), href) in emitted:
+            continue
+        emitted.add((id(card), href))
+
+        if id(card) not in card_texts:
+            card_texts[id(card)] = card.get_text(separator='\n', strip=True)
+        if card_texts[id(card)]:
+            cards.append((href, card_texts[id(card)]))
+    return cards
+
+
+def legacy_card_texts(soup):
+    """The former per-link 15-level parent climb, kept as the benchmark baseline"""
+    cards = []
+    for link in soup.find_all('a', href=_is_program_href):
+        card = link
+        card_text = ""
+        for level in range(15):
+            parent = card.find_parent()
+            if parent:
+                parent_text = parent.get_text(separator='\n', strip=True)
+                if all(keyword in parent_text for keyword in ['Tuition', 'Location']):
+                    card_text = parent_text
+                    break
+                elif len(parent_text) > len(card_text):
+                    card_text = parent_text
+                card = parent
+        if card_text:
+            cards.append((link['href'], card_text))
+    return cards
+
+
+def benchmark_segmentation(path, repeat=3):
+    """Time card segmentation against the legacy climb on a saved search page"""
+    with open(path, "r", encoding="utf-8") as f:
+        soup = make_soup(f.read(), site="applyboard")
+
+    timings = {}
+    results = {}
+    for name, segment in (("legacy climb", legacy_card_texts), ("segmentation", segment_cards)):
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            results[name] = segment(soup)
+            best = min(best, time.perf_counter() - started)
+        timings[name] = best
+        logging.info(f"⏱️ {name}: {best * 1000:.1f} ms for {len(results[name])} cards")
+
+    legacy = dict(results["legacy climb"])
+    matching = sum(1 for href, text in results["segmentation"] if legacy.get(href) == text)
+    logging.info(f"Speedup {timings['legacy climb'] / max(timings['segmentation'], 1e-9):.1f}x, "
+                 f"{matching}/{len(results['segmentation'])} cards identical to the legacy climb")
+    return timings
+
+
+class ApplyBoardScraper:
+    def __init__(self, headless=True, pool=None, lean=False, cache=None, seen=None, capture_api=False, writer=None):
+        # Borrow drivers from a shared pool, or own a single-driver pool
+        self.owns_pool = pool is None
+        self.pool = pool or DriverPool(size=1, headless=headless, stealth=True, lean=lean,
+                                       capture_network=capture_api)
+        # Harvest the search API's JSON instead of parsing rendered cards
+        self.capture_api = capture_api
+        # Optional PageCache; in replay mode no browser is ever started
+        self.cache = cache
+        # Optional SeenIndex: programs already known unchanged are skipped
+        self.seen = seen
+        # Page loads, API replays and scroll steps are paced per domain
+        self.limiter = get_shared_limiter()
+        self.debug = get_shared_sink()
+        # Optional RecordWriter: programs are streamed to disk (deduplicated) instead of kept in memory
+        self.writer = writer
         self.results = []
 
     def extract_program_info(self, card_text, link_href):
@@ -57,7 +339,7 @@ class ApplyBoardScraper:
                 # Make sure it's not a program name
                 if not any(degree in line for degree in ["Bachelor of", "Master of", "Associate of"]):
                     # Clean up the school name
-                    school = line.replace("(Opens in new tab)", "").strip()
+                    school = clean_text(line)
                     if school:
                         program_info["school"] = school
                         break
@@ -65,7 +347,7 @@ class ApplyBoardScraper:
         # Extract program title
         for line in lines:
             if any(line.startswith(degree) for degree in ["Bachelor of", "Master of", "Associate of", "Certificate", "Diploma"]):
-                title = line.replace("(Opens in new tab)", "").strip()
+                title = clean_text(line)
                 if title:
                     program_info["title"] = title
                     break
@@ -86,7 +368,7 @@ class ApplyBoardScraper:
         if not location_found:
             for line in lines:
                 # Look for city, state pattern
-                if re.search(r'[A-Za-z\s]+,\s*(USA|[A-Z]{2})', line):
+                if CITY_REGION.search(line):
                     program_info["location"] = line
                     break
         
@@ -102,124 +384,217 @@ class ApplyBoardScraper:
         
         return program_info
 
-    def run_scraper(self, search_url):
-        logging.info(f"🔍 Scraping: {search_url}")
-        self.driver.get(search_url)
+    def add_program(self, program_info):
+        """Keep a program if it has meaningful data and is not already known unchanged"""
+        if program_info["title"] == "N/A" and program_info["school"] == "N/A":
+            return False
+        if self.seen and self.seen.observe(program_info) == UNCHANGED:
+            return False
+        if self.writer:
+            return self.writer.write(program_info)
+        self.results.append(program_info)
+        return True
+
+    def harvest_api(self, driver, search_url, max_pages=50, max_results=None):
+        """Collect programs from the search API's JSON responses, paging by replaying its cursor.
 
+        Returns False when no search payload was captured so callers can fall back to the DOM.
+        """
+        logging.info(f"🔌 Capturing search API for: {search_url}")
+        self.pool.drain_performance_log(driver)
+        self.limiter.acquire(search_url)
+        started = time.perf_counter()
+        driver.get(search_url)
         try:
-            # Wait for initial page load
-            time.sleep(5)
-            
-            # Wait for content
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "a[href*='/programs/']"))
-            )
-            
-            # Additional wait for dynamic content
-            time.sleep(3)
-            
-            # Scroll to load more content
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight/2);")
-            time.sleep(2)
-            
+            wait_until_ready(driver, PROGRAM_LINK_SELECTOR, timeout=20)
+            self.limiter.report(search_url, elapsed=time.perf_counter() - started)
+        except Exception as e:
+            logging.warning(f"Search page did not settle: {e}")
+            self.limiter.report(search_url, error=True)
+
+        best_request, best_payload, best_items = None, None, []
+        for exchange in find_json_exchanges(self.pool.drain_performance_log(driver), SEARCH_API_PATTERN):
+            payload = get_response_json(driver, exchange["request_id"])
+            items = find_program_items(payload)
+            if len(items) > len(best_items):
+                best_request, best_payload, best_items = exchange, payload, items
+        self.pool.record_page(driver)
+        if not best_items:
+            return False
+        logging.info(f"🔌 Search API: {best_request['method']} {best_request['url']}")
+
+        request, payload, items = best_request, best_payload, best_items
+        seen_urls = set()
+        for page in range(1, max_pages + 1):
+            new_urls = 0
+            capped = False
+            for item in items:
+                program_info = map_api_program(item)
+                if program_info["url"] in seen_urls:
+                    continue
+                seen_urls.add(program_info["url"])
+                new_urls += 1
+                self.add_program(program_info)
+                # Stop mid-page so the cap holds exactly
+                capped = bool(max_results) and len(seen_urls) >= max_results
+                if capped:
+                    break
+            logging.info(f"✓ API page {page}: {len(items)} programs")
+            if capped:
+                logging.info(f"Reached cap of {max_results} programs")
+                break
+
+            request = next_api_request(request, payload) if new_urls else None
+            if request is None:
+                break
+            self.limiter.acquire(request["url"])
+            started = time.perf_counter()
+            payload = replay_request(driver, request["url"], request["method"], request["headers"], request["post_data"])
+            self.limiter.report(request["url"], elapsed=time.perf_counter() - started, error=payload is None)
+            self.pool.record_page(driver)
+            items = find_program_items(payload)
+            if not items:
+                break
+
+        logging.info(f"🔌 Harvested {len(seen_urls)} programs from the search API")
+        return True
+
+    def run_scraper(self, search_url, max_results=None):
+        if self.capture_api and not (self.cache and self.cache.replay):
+            with self.pool.driver() as driver:
+                if self.harvest_api(driver, search_url, max_results=max_results):
+                    return
+            logging.warning("No search API payloads captured, falling back to DOM parsing")
+
+        page_source = self.cache.get(search_url) if self.cache else None
+        if page_source is not None:
+            logging.info(f"🔍 Scraping (cached): {search_url}")
+        elif self.cache and self.cache.replay:
+            logging.warning(f"Not cached, skipped in replay mode: {search_url}")
+            return
+        else:
+            with self.pool.driver() as driver:
+                page_source = self.harvest_scroll(driver, search_url, max_results)
+            if page_source and self.cache:
+                self.cache.put(search_url, page_source, fetch_path="browser")
+            return
+
+        self.parse_search(page_source)
+
+    def harvest_scroll(self, driver, search_url, max_results=None, scroll_timeout=8):
+        """Scroll through the result list, extracting only cards added since the last step.
+
+        Stops when scrolling renders no new cards or max_results programs were seen,
+        and returns the final page source (None on failure).
+        """
+        logging.info(f"🔍 Scraping: {search_url}")
+        try:
+            self.limiter.acquire(search_url)
+            started = time.perf_counter()
+            driver.get(search_url)
+
+            # Wait until program cards have rendered and settled
+            try:
+                wait_until_ready(driver, PROGRAM_LINK_SELECTOR, timeout=20)
+            except TimeoutException:
+                self.limiter.report(search_url, error=True)
+                raise
+            self.limiter.report(search_url, elapsed=time.perf_counter() - started)
+            # Each scroll step loads another batch on this driver; account lean-mode savings per batch
+            self.pool.record_page(driver)
+
+            started = time.perf_counter()
+            hrefs = set()
+            steps = 0
+            while True:
+                limit = max_results - len(hrefs) if max_results else 100000
+                for card in driver.execute_script(HARVEST_NEW_CARDS_JS, PROGRAM_LINK_SELECTOR, limit, CARD_MAX_DEPTH):
+                    href = card["href"]
+                    if not href or href in hrefs:
+                        continue
+                    hrefs.add(href)
+                    program_info = self.extract_program_info(card["text"], href)
+                    if self.add_program(program_info):
+                        logging.info(f"✓ Program {len(hrefs)}: {program_info['title'][:50]}... at {program_info['school'][:30]}...")
+
+                if max_results and len(hrefs) >= max_results:
+                    logging.info(f"Reached cap of {max_results} programs")
+                    break
+
+                # Scroll and wait for cards we have not harvested yet
+                steps += 1
+                self.limiter.acquire(search_url)
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                try:
+                    wait_until_ready(driver, f"{PROGRAM_LINK_SELECTOR}:not([data-harvested])", timeout=scroll_timeout)
+                except TimeoutException:
+                    break
+                finally:
+                    self.pool.record_page(driver)
+
+            elapsed = time.perf_counter() - started
+            logging.info(f"📜 Harvested {len(hrefs)} cards in {steps} scroll steps "
+                         f"({len(hrefs) / elapsed if elapsed else 0:.1f} cards/s)")
+
             # Get page source
-            page_source = self.driver.page_source
-            soup = BeautifulSoup(page_source, 'html.parser')
-            
-            # Save page source for debugging
-            with open("applyboard_source.html", "w", encoding="utf-8") as f:
-                f.write(page_source)
-            logging.info("📄 Saved page source")
+            page_source = driver.page_source
+            self.save_debug_cards(page_source)
+            return page_source
             
-            # Find all program links
-            program_links = soup.find_all('a', href=lambda x: x and '/programs/' in x)
-            logging.info(f"Found {len(program_links)} program links")
+        except Exception as e:
+            logging.error(f"❌ Error during scraping: {e}")
+            self.debug.capture_driver(driver, "applyboard", error=True)
+            return None
+
+    def parse_search(self, page_source):
+        """Extract programs from a rendered search page"""
+        try:
+            soup = make_soup(page_source, site="applyboard")
+
+            # Segment the page into one card per program link in a single pass
+            cards = segment_cards(soup)
+            logging.info(f"Found {len(cards)} program cards")
             
-            # Process each link
-            for link_num, link in enumerate(program_links):
+            for card_num, (href, card_text) in enumerate(cards):
                 try:
-                    href = link.get('href', '')
-                    
-                    # Skip if not a valid program link
-                    if not href or '/programs/' not in href:
-                        continue
-                    
-                    # Get the card container by going up the DOM tree
-                    card = link
-                    card_text = ""
+                    program_info = self.extract_program_info(card_text, href)
                     
-                    # Try different levels to find the complete card
-                    for level in range(15):
-                        parent = card.find_parent()
-                        if parent:
-                            parent_text = parent.get_text(separator='\n', strip=True)
-                            
-                            # Check if this parent contains the full card info
-                            if all(keyword in parent_text for keyword in ['Tuition', 'Location']):
-                                card_text = parent_text
-                                logging.debug(f"Found complete card at level {level}")
-                                break
-                            # Keep the largest text found so far
-                            elif len(parent_text) > len(card_text):
-                                card_text = parent_text
-                            
-                            card = parent
-                    
-                    # If we have card text, extract info
-                    if card_text:
-                        program_info = self.extract_program_info(card_text, href)
-                        
-                        # Only add if we have meaningful data
-                        if program_info["title"] != "N/A" or program_info["school"] != "N/A":
-                            self.results.append(program_info)
-                            logging.info(f"✓ Program {link_num + 1}: {program_info['title'][:50]}... at {program_info['school'][:30]}...")
+                    # Only add if we have meaningful data
+                    if self.add_program(program_info):
+                        logging.info(f"✓ Program {card_num + 1}: {program_info['title'][:50]}... at {program_info['school'][:30]}...")
                     
                 except Exception as e:
-                    logging.warning(f"Error processing link {link_num + 1}: {e}")
+                    logging.warning(f"Error processing card {card_num + 1}: {e}")
                     continue
             
             # Save debug info for first 3 cards
-            self.save_debug_cards(soup)
+            self.save_debug_cards(page_source, cards)
             
         except Exception as e:
-            logging.error(f"❌ Error during scraping: {e}")
-            self.driver.save_screenshot("applyboard_error.png")
+            logging.error(f"❌ Error while parsing results: {e}")
 
-    def save_debug_cards(self, soup):
-        """Save detailed info about first 3 cards for debugging"""
-        try:
+    def save_debug_cards(self, page_source, cards=None):
+        """Hand the page source and detailed info about the first 3 cards to the debug sink, if sampled"""
+        if not self.debug.sample():
+            return
+
+        def debug_cards():
+            # Runs on the sink's thread, so segmenting the page again costs the scrape nothing
             debug_data = []
-            links = soup.find_all('a', href=lambda x: x and '/programs/' in x)[:3]
-            
-            for i, link in enumerate(links):
-                # Get card by going up
-                card = link
-                for _ in range(10):
-                    parent = card.find_parent()
-                    if parent and 'Tuition' in parent.get_text():
-                        card = parent
-                        break
-                    elif parent:
-                        card = parent
-                
-                # Extract all text
-                card_text = card.get_text(separator='\n', strip=True)
+            page_cards = cards if cards is not None else segment_cards(make_soup(page_source, site="applyboard"))
+            for i, (href, card_text) in enumerate(page_cards[:3]):
                 lines = [line for line in card_text.split('\n') if line.strip()]
                 
                 debug_entry = {
                     "card_number": i + 1,
-                    "link": link.get('href', ''),
+                    "link": href,
                     "text_lines": lines[:30],  # First 30 lines
-                    "extracted_info": self.extract_program_info(card_text, link.get('href', ''))
+                    "extracted_info": self.extract_program_info(card_text, href)
                 }
                 debug_data.append(debug_entry)
-            
-            with open("debug_cards.json", "w", encoding="utf-8") as f:
-                json.dump(debug_data, f, indent=2, ensure_ascii=False)
-            logging.info("📝 Saved debug info to debug_cards.json")
-            
-        except Exception as e:
-            logging.warning(f"Could not save debug info: {e}")
+            return debug_data
+
+        self.debug.submit("applyboard", {".html": page_source, "_cards.json": debug_cards})
 
     def save_to_file(self):
         # Remove duplicates
@@ -263,16 +638,40 @@ class ApplyBoardScraper:
             logging.warning("⚠️ No programs were extracted!")
 
     def close(self):
-        self.driver.quit()
+        if self.owns_pool:
+            self.pool.close()
 
 
 # Usage
 if __name__ == "__main__":
-    scraper = ApplyBoardScraper(headless=True)
+    parser = argparse.ArgumentParser(description="Scrape ApplyBoard search results")
+    parser.add_argument("--replay", action="store_true", help="run entirely from the page cache")
+    parser.add_argument("--full", action="store_true", help="ignore the seen index and keep known programs")
+    parser.add_argument("--api", action="store_true", help="harvest the search API's JSON instead of the DOM")
+    parser.add_argument("--max-results", type=int, default=None, help="stop after this many programs per query")
+    parser.add_argument("--bench-segmentation", metavar="HTML", help="benchmark card segmentation on a saved page and exit")
+    parser.add_argument("--debug-artifacts", choices=MODES, default=ON_ERROR,
+                        help="when to keep screenshots and page sources (sampled keeps 1 in 20 pages)")
+    args = parser.parse_args()
+
+    if args.bench_segmentation:
+        benchmark_segmentation(args.bench_segmentation)
+        raise SystemExit(0)
+
+    debug = get_shared_sink(mode=args.debug_artifacts)
+    cache = PageCache(replay=args.replay)
+    seen = None if args.full or args.replay else SeenIndex()
+    # Programs are appended to the output as they are found, so a crash keeps what was harvested
+    writer = RecordWriter(f"applyboard_programs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl", complete=seen is None)
+    scraper = ApplyBoardScraper(headless=True, cache=cache, seen=seen, capture_api=args.api, writer=writer)
     search_url = "https://www.applyboard.com/search?filter[locations]=us&filter[q]=Computer%20Science"
     
     try:
-        scraper.run_scraper(search_url)
-        scraper.save_to_file()
+        with writer:
+            scraper.run_scraper(search_url, max_results=args.max_results)
     finally:
         scraper.close()
+        cache.close()
+        debug.close()
+        if seen:
+            seen.save()
@@ -1,13 +1,50 @@
+import argparse
 import json
-import pandas as pd
-import numpy as np
 from typing import Dict, List, Any, Optional
-import re
 from datetime import datetime
 import logging
+import os
+import gzip
+import random
+import tempfile
+import time
+import tracemalloc
+
+from normalize import (CURRENCY_TABLES, DUOLINGO_SCORE, DURATION_MONTHS, DURATION_YEARS, IELTS_SCORE, TOEFL_SCORE,
+                       TUITION_NUMBER, currency_version, detect_currency, duration_months, language_requirements,
+                       log_memo_stats, tuition_eur)
+from processor_state import PROCESSOR_STATE_FILE, UNCHANGED, ProcessorState
+from record_stream import RecordWriter, batches, iter_records, read_manifest
+from seen_index import fingerprint
 
 logging.basicConfig(level=logging.INFO)
 
+# Raw records the columnar path holds at once
+COLUMNAR_BATCH = 20_000
+
+
+def _by_unique(values, parse, missing=None):
+    """Apply parse (a Series of distinct values -> list) once per distinct value and spread the results back"""
+    import numpy as np
+    import pandas as pd
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    parsed = list(parse(pd.Series(uniques, dtype=object))) if len(uniques) else []
+    # Code -1 marks None/NaN inputs and picks the trailing missing value
+    lookup = np.empty(len(parsed) + 1, dtype=object)
+    lookup[:] = parsed + [missing]
+    return lookup[codes].tolist()
+
+
+def _to_int(text):
+    return int(text) if isinstance(text, str) and text else None
+
+
+def _to_float(text):
+    try:
+        return float(text) if isinstance(text, str) else None
+    except ValueError:
+        return None
+
 class BachelorsDataProcessor:
     """Process scraped data for AI-powered university matching"""
     
@@ -23,89 +60,28 @@ class BachelorsDataProcessor:
         }
     
     def load_scraped_data(self, filepath: str) -> Dict:
-        """Load scraped data from JSON file"""
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        """Open scraped programs for lazy reading: a JSON list or {"programs": [...]} document, or JSONL (.gz, .zst)"""
+        if not os.path.exists(filepath):
+            raise FileNotFoundError(filepath)
+        # Programs are read one at a time as process_all_data iterates them; crawls that used the
+        # seen index leave unchanged programs out and say so in their manifest
+        return {'programs': iter_records(filepath), 'complete': read_manifest(filepath).get('complete', True)}
     
-    def extract_tuition_amount(self, tuition_str: str) -> Optional[int]:
-        """Extract numeric tuition amount from string"""
-        if not tuition_str or tuition_str == 'N/A':
-            return None
-            
-        # Remove currency symbols and extract numbers
-        numbers = re.findall(r'[\d,]+', tuition_str)
-        if numbers:
-            # Take the first number and remove commas
-            amount = int(numbers[0].replace(',', ''))
-            
-            # Convert to EUR if needed (simplified)
-            if 'USD' in tuition_str or '$' in tuition_str:
-                amount = int(amount * 0.85)  # Rough USD to EUR
-            elif 'GBP' in tuition_str or '£' in tuition_str:
-                amount = int(amount * 1.15)  # Rough GBP to EUR
-                
-            return amount
-        return None
+    def extract_tuition_amount(self, tuition_str: str, as_of: str = None) -> Optional[int]:
+        """Extract numeric tuition amount in EUR from string, at the currency table in force on as_of (default today)"""
+        return tuition_eur(tuition_str, as_of)
     
     def parse_duration(self, duration_str: str) -> Optional[int]:
         """Extract duration in months from string"""
-        if not duration_str or duration_str == 'N/A':
-            return None
-            
-        # Look for year patterns
-        year_match = re.search(r'(\d+)\s*year', duration_str.lower())
-        if year_match:
-            return int(year_match.group(1)) * 12
-            
-        # Look for month patterns
-        month_match = re.search(r'(\d+)\s*month', duration_str.lower())
-        if month_match:
-            return int(month_match.group(1))
-            
-        return None
+        return duration_months(duration_str)
     
     def extract_language_requirements(self, requirements: Any) -> Dict:
         """Extract language proficiency requirements"""
-        lang_reqs = {
-            'english_required': False,
-            'toefl_min': None,
-            'ielts_min': None,
-            'duolingo_min': None,
-            'other_languages': []
-        }
-        
-        if isinstance(requirements, list):
-            req_text = ' '.join(requirements)
-        elif isinstance(requirements, str):
-            req_text = requirements
-        else:
-            return lang_reqs
-        
-        req_text = req_text.lower()
-        
-        # Check for English requirement
-        if 'english' in req_text:
-            lang_reqs['english_required'] = True
-            
-        # Extract TOEFL score
-        toefl_match = re.search(r'toefl.*?(\d+)', req_text)
-        if toefl_match:
-            lang_reqs['toefl_min'] = int(toefl_match.group(1))
-            
-        # Extract IELTS score
-        ielts_match = re.search(r'ielts.*?([\d.]+)', req_text)
-        if ielts_match:
-            lang_reqs['ielts_min'] = float(ielts_match.group(1))
-            
-        # Extract Duolingo score
-        duolingo_match = re.search(r'duolingo.*?(\d+)', req_text)
-        if duolingo_match:
-            lang_reqs['duolingo_min'] = int(duolingo_match.group(1))
-            
-        return lang_reqs
+        return language_requirements(requirements)
     
     def process_program(self, program: Dict) -> Dict:
         """Process a single program for AI matching"""
+        scraped_at = program.get('scraped_at', datetime.now().isoformat())
         processed = {
             'id': program.get('url', '').split('/')[-1] or f"prog_{hash(program['title'])}",
             'title': program.get('title', 'Unknown Program'),
@@ -114,10 +90,11 @@ class BachelorsDataProcessor:
             'city': program.get('city', 'Unknown'),
             'discipline': program.get('search_discipline', 'Unknown'),
             'duration_months': self.parse_duration(program.get('duration', '')),
-            'tuition_eur': self.extract_tuition_amount(program.get('tuition_fee', '')),
+            # Converted at the rates in force when the fee was scraped, so adding a newer table leaves it alone
+            'tuition_eur': self.extract_tuition_amount(program.get('tuition_fee', ''), scraped_at),
             'deadline': program.get('deadline', 'N/A'),
             'url': program.get('url', ''),
-            'scraped_at': program.get('scraped_at', datetime.now().isoformat())
+            'scraped_at': scraped_at
         }
         
         # Process requirements if available
@@ -132,6 +109,12 @@ class BachelorsDataProcessor:
         # Process subjects/specializations
         if 'subjects' in program:
             processed['specializations'] = program['subjects']
+
+        # Keep cross-site identity and provenance from entity resolution
+        if program.get('university_id'):
+            processed['university_id'] = program['university_id']
+        if 'sources' in program:
+            processed['sources'] = program['sources']
             
         # Add matching scores placeholders
         processed['matching_scores'] = {
@@ -144,6 +127,120 @@ class BachelorsDataProcessor:
         
         return processed
     
+    def _parse_tuitions(self, values, version):
+        """Column version of extract_tuition_amount, for fees scraped while one currency table was in force"""
+        numbers = values.str.extract(TUITION_NUMBER, expand=False).str.replace(',', '', regex=False)
+        amounts = []
+        for text, number in zip(values, numbers):
+            amount = _to_int(number)
+            currency = detect_currency(text, version) if amount is not None else None
+            if currency and currency != 'EUR':
+                amount = int(amount * CURRENCY_TABLES[version][currency])
+            amounts.append(amount)
+        return amounts
+
+    def _parse_durations(self, values):
+        """Column version of parse_duration"""
+        lower = values.str.lower()
+        years = lower.str.extract(DURATION_YEARS, expand=False)
+        months = lower.str.extract(DURATION_MONTHS, expand=False)
+        return [_to_int(y) * 12 if _to_int(y) is not None else _to_int(m) for y, m in zip(years, months)]
+
+    def _parse_language_requirements(self, values):
+        """Column version of extract_language_requirements, on already joined requirement texts"""
+        lower = values.str.lower()
+        english = lower.str.contains('english', regex=False, na=False)
+        toefl = lower.str.extract(TOEFL_SCORE, expand=False)
+        ielts = lower.str.extract(IELTS_SCORE, expand=False)
+        duolingo = lower.str.extract(DUOLINGO_SCORE, expand=False)
+        return [
+            {'english_required': bool(e), 'toefl_min': _to_int(t), 'ielts_min': _to_float(i), 'duolingo_min': _to_int(d)}
+            for e, t, i, d in zip(english, toefl, ielts, duolingo)
+        ]
+
+    def process_programs_columnar(self, programs, user_profile: Dict = None) -> List[Dict]:
+        """process_program (and calculate_basic_match_scores) over a whole batch, column by column.
+
+        Tuition, duration and language strings are factorized so each distinct
+        string is parsed once with vectorized pandas string ops; scores come
+        from MatchEngine. Output records equal process_program's.
+        """
+        programs = list(programs)
+        now = datetime.now().isoformat()
+        get = lambda field, default=None: [p.get(field, default) for p in programs]
+
+        durations = _by_unique(get('duration', ''), self._parse_durations)
+        # Fees are parsed per currency table version, each distinct string once
+        fees = get('tuition_fee', '')
+        versions = [currency_version(p.get('scraped_at', now)) for p in programs]
+        tuitions = [None] * len(programs)
+        for version in set(versions):
+            rows = [index for index, row_version in enumerate(versions) if row_version == version]
+            parsed = _by_unique([fees[index] for index in rows], lambda values: self._parse_tuitions(values, version))
+            for index, amount in zip(rows, parsed):
+                tuitions[index] = amount
+
+        requirement_texts = [None] * len(programs)
+        for index, program in enumerate(programs):
+            if 'requirements' in program:
+                requirements = program['requirements']
+                requirement_texts[index] = requirements if isinstance(requirements, str) else ' '.join(requirements)
+        lang_reqs = _by_unique(requirement_texts, self._parse_language_requirements)
+
+        countries = [p.get('country') or p.get('search_country', 'Unknown') for p in programs]
+        scores = None
+        if user_profile:
+            from match_engine import SCORE_KEYS, MatchEngine
+            columns = MatchEngine(tuitions, countries, lang_reqs).score([user_profile])
+            scores = list(zip(*(columns[key][0].tolist() for key in SCORE_KEYS)))
+
+        processed_programs = []
+        for index, program in enumerate(programs):
+            processed = {
+                'id': program.get('url', '').split('/')[-1] or f"prog_{hash(program['title'])}",
+                'title': program.get('title', 'Unknown Program'),
+                'university': program.get('university', 'Unknown University'),
+                'country': countries[index],
+                'city': program.get('city', 'Unknown'),
+                'discipline': program.get('search_discipline', 'Unknown'),
+                'duration_months': durations[index],
+                'tuition_eur': tuitions[index],
+                'deadline': program.get('deadline', 'N/A'),
+                'url': program.get('url', ''),
+                'scraped_at': program.get('scraped_at', now)
+            }
+            if requirement_texts[index] is not None:
+                # Parsed results are shared between equal texts, so each program gets its own copy
+                processed['language_requirements'] = dict(lang_reqs[index], other_languages=[])
+                processed['requirements_text'] = requirement_texts[index]
+            if 'overview' in program:
+                processed['overview'] = program['overview'][:500]
+            if 'subjects' in program:
+                processed['specializations'] = program['subjects']
+            if program.get('university_id'):
+                processed['university_id'] = program['university_id']
+            if 'sources' in program:
+                processed['sources'] = program['sources']
+            if scores:
+                academic, financial, location, language, overall = scores[index]
+                processed['matching_scores'] = {
+                    'academic_fit': academic,
+                    'financial_fit': financial,
+                    'location_fit': location,
+                    'language_fit': language,
+                    'overall_fit': overall
+                }
+            else:
+                processed['matching_scores'] = {
+                    'academic_fit': 0.0,
+                    'financial_fit': 0.0,
+                    'location_fit': 0.0,
+                    'language_fit': 0.0,
+                    'overall_fit': 0.0
+                }
+            processed_programs.append(processed)
+        return processed_programs
+
     def create_university_profile(self, programs: List[Dict]) -> Dict:
         """Create university profiles from program data"""
         university_data = {}
@@ -174,6 +271,7 @@ class BachelorsDataProcessor:
                 uni['avg_tuition'].append(program['tuition_eur'])
         
         # Finalize university profiles
+        import numpy as np
         for uni_name, uni in university_data.items():
             uni['countries'] = list(uni['countries'])
             uni['cities'] = list(uni['cities'])
@@ -213,6 +311,12 @@ class BachelorsDataProcessor:
         
         return matching_data
     
+    def matching_profile(self, user_profile: Dict) -> Dict:
+        """User profile in the nested shape calculate_basic_match_scores reads; raw profiles are converted"""
+        if 'preferences' in user_profile:
+            return user_profile
+        return self.prepare_for_ai_matching(user_profile, [])['user_profile']
+    
     def calculate_basic_match_scores(self, user_profile: Dict, program: Dict) -> Dict:
         """Calculate basic matching scores (before AI enhancement)"""
         scores = {}
@@ -272,27 +376,46 @@ class BachelorsDataProcessor:
         
         return scores
     
-    def process_all_data(self, scraped_data: Dict, sample_user_profile: Dict = None) -> Dict:
-        """Process all scraped data and prepare for AI matching"""
+    def match_users(self, user_profiles: List[Dict], programs: List[Dict], k: int = 50) -> List[Dict]:
+        """prepare_for_ai_matching output for every user with their top k programs, scored as one batch"""
+        from match_engine import MatchEngine
+        engine = MatchEngine.from_programs(programs)
+        profiles = [self.matching_profile(profile) for profile in user_profiles]
+        indices, _ = engine.top_k(profiles, k)
         
-        # Process programs
-        programs = scraped_data.get('programs', [])
+        results = []
+        for user_profile, profile, row in zip(user_profiles, profiles, indices):
+            matches = [
+                dict(programs[index], matching_scores=scores)
+                for index, scores in zip(row.tolist(), engine.scores_for(profile, row))
+            ]
+            results.append(self.prepare_for_ai_matching(user_profile, matches))
+        return results
+    
+    def _process_batch(self, programs, match_profile: Dict = None, columnar: bool = False) -> List[Dict]:
+        """process_program, plus match scores when a (nested) profile is given, for a batch of programs"""
+        if columnar:
+            # Fixed-size batches keep a stream from being read in whole before processing starts
+            processed_programs = []
+            for batch in batches(programs, COLUMNAR_BATCH):
+                processed_programs.extend(self.process_programs_columnar(batch, match_profile))
+            return processed_programs
         processed_programs = []
-        
         for program in programs:
             processed = self.process_program(program)
             
             # Calculate basic match scores if user profile provided
-            if sample_user_profile:
+            if match_profile:
                 processed['matching_scores'] = self.calculate_basic_match_scores(
-                    sample_user_profile, processed
+                    match_profile, processed
                 )
             
             processed_programs.append(processed)
-        
-        # Create university profiles
-        university_profiles = self.create_university_profile(processed_programs)
-        
+        return processed_programs
+    
+    def _build_output(self, processed_programs: List[Dict], university_profiles: Dict, sample_user_profile: Dict = None,
+                      countries: List = None, disciplines: List = None) -> Dict:
+        """Sort by fit and assemble the output document around already processed programs"""
         # Sort programs by overall fit if scores calculated
         if sample_user_profile:
             processed_programs.sort(
@@ -305,8 +428,9 @@ class BachelorsDataProcessor:
             'metadata': {
                 'total_programs': len(processed_programs),
                 'total_universities': len(university_profiles),
-                'countries': list(set(p['country'] for p in processed_programs)),
-                'disciplines': list(set(p['discipline'] for p in processed_programs)),
+                'countries': countries if countries is not None else list(set(p['country'] for p in processed_programs)),
+                'disciplines': disciplines if disciplines is not None else list(set(p['discipline'] for p in processed_programs)),
+                'currency_rates': sorted({currency_version(p['scraped_at']) for p in processed_programs}),
                 'processed_at': datetime.now().isoformat()
             },
             'programs': processed_programs,
@@ -318,25 +442,327 @@ class BachelorsDataProcessor:
                 sample_user_profile, processed_programs[:50]  # Top 50 matches
             )
         
+        log_memo_stats()
         return output
     
-    def save_processed_data(self, data: Dict, output_file: str):
-        """Save processed data for AI consumption"""
+    def process_all_data(self, scraped_data: Dict, sample_user_profile: Dict = None, columnar: bool = False) -> Dict:
+        """Process all scraped data and prepare for AI matching (columnar=True parses whole columns at once)"""
+        
+        # Process programs
+        programs = scraped_data.get('programs', [])
+        match_profile = self.matching_profile(sample_user_profile) if sample_user_profile else None
+        processed_programs = self._process_batch(programs, match_profile, columnar)
+        
+        # Create university profiles
+        university_profiles = self.create_university_profile(processed_programs)
+        
+        return self._build_output(processed_programs, university_profiles, sample_user_profile)
+    
+    def refresh_state(self, scraped_data: Dict, state: ProcessorState, sample_user_profile: Dict = None,
+                      columnar: bool = False, complete: bool = True, removed: List[str] = ()):
+        """Bring persistent state up to date: process only added or changed programs and patch their universities.
+        
+        complete=False treats the input as a delta (unchanged programs left out), as does
+        input marked incomplete by its crawl; removed lists record keys (URLs) to drop,
+        e.g. programs unseen for weeks.
+        """
+        if complete and not scraped_data.get('complete', True):
+            logging.info("📥 Input is a delta from an incremental crawl, keeping programs it leaves out")
+            complete = False
+        match_profile = self.matching_profile(sample_user_profile) if sample_user_profile else None
+        
+        to_process, missing = state.diff(scraped_data.get('programs', []), complete)
+        if complete and missing and not to_process and not state.counts[UNCHANGED]:
+            # An empty or unreadable input would otherwise wipe the whole catalogue
+            raise ValueError("Input holds no programs; refusing to treat it as the full catalogue")
+        processed_programs = self._process_batch([record for _, _, record in to_process], match_profile, columnar)
+        state.upsert_all((key, digest, processed) for (key, digest, _), processed in zip(to_process, processed_programs))
+        state.remove(list(missing) + list(removed))
+        
+        # Stored scores belong to the profile they were computed for
+        profile_hash = fingerprint(match_profile) if match_profile else None
+        if profile_hash != state.profile_hash:
+            fresh = {key for key, _, _ in to_process}
+            state.rescore(lambda programs: self._match_scores(programs, match_profile), skip=fresh)
+            state.profile_hash = profile_hash
+        state.save()
+    
+    def process_incremental(self, scraped_data: Dict, state_path: str = PROCESSOR_STATE_FILE,
+                            sample_user_profile: Dict = None, columnar: bool = False, complete: bool = True,
+                            removed: List[str] = ()) -> Dict:
+        """process_all_data against persistent state: the same output, but only changes are processed"""
+        state = ProcessorState(state_path)
+        try:
+            self.refresh_state(scraped_data, state, sample_user_profile, columnar, complete, removed)
+            countries, disciplines = state.totals()
+            return self._build_output(state.processed_programs(), state.university_profiles(), sample_user_profile,
+                                      countries, disciplines)
+        finally:
+            state.close()
+    
+    def _match_scores(self, programs: List[Dict], match_profile: Dict = None) -> List[Dict]:
+        """matching_scores for already processed programs, scored as one batch"""
+        if not match_profile:
+            return [dict.fromkeys(('academic_fit', 'financial_fit', 'location_fit', 'language_fit', 'overall_fit'), 0.0)
+                    for _ in programs]
+        from match_engine import MatchEngine
+        return MatchEngine.from_programs(programs).scores_for(match_profile, range(len(programs)))
+    
+    def save_processed_data(self, data: Dict, output_file: str, csv: bool = False):
+        """Save processed data for AI consumption, plus a columnar snapshot of the programs"""
         with open(output_file, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
         
         logging.info(f"Processed data saved to {output_file}")
         
-        # Also save a CSV version of programs for easy viewing
         if 'programs' in data:
+            # Flattened, typed, dictionary-encoded columns that reload without parsing the JSON
+            from program_snapshot import save_snapshot
+            save_snapshot(data['programs'], output_file.replace('.json', '_programs'), metadata=data.get('metadata'))
+
+        # Optional CSV version of programs for easy viewing
+        if csv and 'programs' in data:
+            # Imported here so JSON-only runs never pay for pandas
+            import pandas as pd
             df = pd.DataFrame(data['programs'])
             csv_file = output_file.replace('.json', '_programs.csv')
             df.to_csv(csv_file, index=False)
             logging.info(f"Programs CSV saved to {csv_file}")
 
+def check_processing_parity(processor: BachelorsDataProcessor, programs: List[Dict], user_profile: Dict = None) -> bool:
+    """Run the row-by-row and columnar paths on the same programs and report the first difference"""
+    outputs = [processor.process_all_data({'programs': programs}, user_profile, columnar=columnar)
+               for columnar in (False, True)]
+    for output in outputs:
+        output['metadata'].pop('processed_at')
+    rows, columns = outputs
+    if rows == columns:
+        logging.info(f"✅ Columnar output matches row-by-row output for {len(programs)} programs")
+        return True
+    for index, (expected, actual) in enumerate(zip(rows['programs'], columns['programs'])):
+        if expected != actual:
+            logging.error(f"❌ Program {index} differs:\n  rows:     {expected}\n  columnar: {actual}")
+            break
+    else:
+        logging.error("❌ Program lists match but metadata or university profiles differ")
+    return False
+
+
+def benchmark_processing(processor: BachelorsDataProcessor, programs: List[Dict], user_profile: Dict = None,
+                         repeat: int = 3) -> Dict:
+    """Programs per second of process_all_data, row by row and columnar"""
+    results = {}
+    previous_level = logging.getLogger().level
+    for name, columnar in (('row-by-row', False), ('columnar', True)):
+        best = float('inf')
+        logging.getLogger().setLevel(logging.WARNING)
+        for _ in range(repeat):
+            started = time.perf_counter()
+            processor.process_all_data({'programs': programs}, user_profile, columnar=columnar)
+            best = min(best, time.perf_counter() - started)
+        logging.getLogger().setLevel(previous_level)
+        results[name] = {'seconds': best, 'programs_per_s': len(programs) / best}
+        logging.info(f"{name:>12}: {best:7.2f}s  {len(programs) / best:10.0f} programs/s")
+    return results
+
+def check_matching_parity(processor: BachelorsDataProcessor, programs: List[Dict], user_profiles: List[Dict],
+                          k: int = 50) -> bool:
+    """Compare MatchEngine scores and top k with calculate_basic_match_scores and a full stable sort"""
+    from match_engine import SCORE_KEYS, MatchEngine
+    engine = MatchEngine.from_programs(programs)
+    profiles = [processor.matching_profile(profile) for profile in user_profiles]
+    matrices = engine.score(profiles)
+    indices, _ = engine.top_k(profiles, k)
+    for user, profile in enumerate(profiles):
+        expected = [processor.calculate_basic_match_scores(profile, program) for program in programs]
+        for key in SCORE_KEYS:
+            if matrices[key][user].tolist() != [scores[key] for scores in expected]:
+                logging.error(f"❌ User {user}: {key} differs from calculate_basic_match_scores")
+                return False
+        ranked = sorted(range(len(programs)), key=lambda i: expected[i]['overall_fit'], reverse=True)[:k]
+        if indices[user].tolist() != ranked:
+            logging.error(f"❌ User {user}: top {k} differs from the full sort")
+            return False
+    logging.info(f"✅ Batch scores and top {k} match the scalar function for {len(profiles)} users")
+    return True
+
+
+def benchmark_matching(processor: BachelorsDataProcessor, programs: List[Dict], user_profiles: List[Dict],
+                       k: int = 50, scalar_users: int = 3) -> Dict:
+    """Users x programs per second: scalar scoring plus full sort against MatchEngine top k"""
+    from match_engine import MatchEngine, log_throughput
+    profiles = [processor.matching_profile(profile) for profile in user_profiles]
+    
+    started = time.perf_counter()
+    for profile in profiles[:scalar_users]:
+        scores = [processor.calculate_basic_match_scores(profile, program) for program in programs]
+        sorted(range(len(programs)), key=lambda i: scores[i]['overall_fit'], reverse=True)[:k]
+    scalar = log_throughput(min(scalar_users, len(profiles)), len(programs), time.perf_counter() - started, "scalar")
+    
+    started = time.perf_counter()
+    engine = MatchEngine.from_programs(programs)
+    encoded = time.perf_counter() - started
+    started = time.perf_counter()
+    engine.top_k(profiles, k)
+    batch = log_throughput(len(profiles), len(programs), time.perf_counter() - started, f"batch top {k}")
+    logging.info(f"Encoded {len(programs)} programs in {encoded:.2f}s; batch is {batch / scalar:.0f}x the scalar path")
+    return {'scalar_pairs_per_s': scalar, 'batch_pairs_per_s': batch, 'encode_s': encoded}
+
+def _comparable(output: Dict) -> Dict:
+    """Order-free view of an output: programs by URL, profile lists as sets, averages rounded"""
+    universities = {}
+    for name, uni in output['universities'].items():
+        universities[name] = dict(
+            {key: sorted(map(str, uni[key])) for key in ('programs', 'countries', 'cities', 'disciplines')},
+            min_tuition=uni['min_tuition'], max_tuition=uni['max_tuition'],
+            avg_tuition=round(uni['avg_tuition'], 6) if uni['avg_tuition'] is not None else None,
+        )
+    return {'programs': {p['url']: p for p in output['programs']}, 'universities': universities,
+            'countries': set(output['metadata']['countries']), 'disciplines': set(output['metadata']['disciplines'])}
+
+
+def benchmark_incremental(processor: BachelorsDataProcessor, size: int, change: float = 0.01,
+                          user_profile: Dict = None) -> Dict:
+    """Full reprocessing against incremental refreshes after change x size programs were edited, added or removed.
+    
+    Each path reads its input from a JSONL file. The incremental refresh
+    (loading, processing, state update) is timed apart from assembling the
+    output from the state, which lists every program either way.
+    """
+    from sample_data import synthetic_programs
+    
+    before = synthetic_programs(size)
+    rng = random.Random(1)
+    changed = max(4, int(size * change))
+    after = [dict(program) for program in before]
+    for index in rng.sample(range(size - changed // 4), changed // 2):
+        after[index]['tuition_fee'] = f"€{rng.randrange(1000, 30000):,}"
+    removed = [program['url'] for program in after[-(changed // 4):]]
+    added = synthetic_programs(changed // 4, seed=2, universities=max(1, size // 20))
+    for index, program in enumerate(added):
+        program['url'] = f"https://example.org/programs/new-{index}"
+    after = after[:-(changed // 4)] + added
+    delta = [program for program, old in zip(after, before) if program != old] + added
+    
+    timings, outputs = {}, {}
+    previous_level = logging.getLogger().level
+    logging.getLogger().setLevel(logging.WARNING)
+    try:
+        with tempfile.TemporaryDirectory() as scratch:
+            # Inputs are read from disk, as a real run would: the delta file is all a delta run has to parse
+            paths = {}
+            for name, records in (('after', after), ('delta', delta)):
+                paths[name] = os.path.join(scratch, f'{name}.jsonl')
+                with RecordWriter(paths[name], flush_every=1000) as writer:
+                    writer.write_all(records)
+            
+            started = time.perf_counter()
+            outputs['full'] = processor.process_all_data(processor.load_scraped_data(paths['after']), user_profile,
+                                                         columnar=True)
+            timings['full'] = {'total_s': time.perf_counter() - started}
+            
+            for name, path, complete in (('incremental snapshot', paths['after'], True),
+                                         ('incremental delta', paths['delta'], False)):
+                state = ProcessorState(os.path.join(scratch, f'{name.split()[-1]}.sqlite'))
+                processor.refresh_state({'programs': before}, state, user_profile, columnar=True)
+                started = time.perf_counter()
+                processor.refresh_state(processor.load_scraped_data(path), state, user_profile, columnar=True,
+                                        complete=complete, removed=[] if complete else removed)
+                refreshed = time.perf_counter()
+                countries, disciplines = state.totals()
+                outputs[name] = processor._build_output(state.processed_programs(), state.university_profiles(),
+                                                        user_profile, countries, disciplines)
+                timings[name] = {'refresh_s': refreshed - started, 'output_s': time.perf_counter() - refreshed}
+                state.close()
+    finally:
+        logging.getLogger().setLevel(previous_level)
+    
+    expected = _comparable(outputs['full'])
+    for name in ('incremental snapshot', 'incremental delta'):
+        matches = _comparable(outputs[name]) == expected
+        logging.info(f"{'✅' if matches else '❌'} {name} output {'matches' if matches else 'differs from'} full reprocessing")
+    logging.info(f"{'full':>21}: {timings['full']['total_s']:6.2f}s loading, processing and output")
+    for name in ('incremental snapshot', 'incremental delta'):
+        logging.info(f"{name:>21}: {timings[name]['refresh_s']:6.2f}s refresh + {timings[name]['output_s']:.2f}s output")
+    return {'programs': size, 'changed': changed, 'seconds': timings}
+
+def benchmark_loading(processor: BachelorsDataProcessor, size: int, user_profile: Dict = None) -> Dict:
+    """Peak memory and time of processing a scraper's JSON list read whole (json.load) against streamed"""
+    from sample_data import synthetic_programs
+    
+    results, outputs = {}, {}
+    previous_level = logging.getLogger().level
+    logging.getLogger().setLevel(logging.WARNING)
+    try:
+        with tempfile.TemporaryDirectory() as scratch:
+            # The layout the scrapers' save_data writes: one indented top-level list
+            path = os.path.join(scratch, 'programs.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(synthetic_programs(size), f, indent=2, ensure_ascii=False)
+            with open(path, 'rb') as f, gzip.open(f'{path}.gz', 'wb') as compressed:
+                compressed.write(f.read())
+            
+            def read_whole():
+                with open(path, 'r', encoding='utf-8') as f:
+                    return {'programs': json.load(f)}
+            
+            cases = (('json.load', read_whole), ('streamed', lambda: processor.load_scraped_data(path)),
+                     ('streamed .gz', lambda: processor.load_scraped_data(f'{path}.gz')))
+            for name, load in cases:
+                started = time.perf_counter()
+                outputs[name] = processor.process_all_data(load(), user_profile, columnar=True)
+                seconds = time.perf_counter() - started
+                tracemalloc.start()
+                processor.process_all_data(load(), user_profile, columnar=True)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                results[name] = {'seconds': seconds, 'peak_mb': peak / 1e6}
+    finally:
+        logging.getLogger().setLevel(previous_level)
+    
+    expected = _comparable(outputs['json.load'])
+    for name, result in results.items():
+        same = _comparable(outputs[name]) == expected
+        logging.info(f"{name:>14}: {result['seconds']:6.2f}s, peak {result['peak_mb']:7.1f} MB "
+                     f"{'✅' if same else '❌ output differs'}")
+    return {'programs': size, 'results': results}
+
 # Example usage
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process scraped programs for AI matching")
+    parser.add_argument("input", nargs="?", default="bachelors_programs_20240315_120000.json",
+                        help="scraped programs, read as a stream: a JSON list or {\"programs\": [...]} document, or JSONL "
+                             "(.gz/.zst compressed too)")
+    parser.add_argument("--csv", action="store_true", help="also write the programs as CSV")
+    parser.add_argument("--resolve", action="store_true",
+                        help="merge the same program/university seen on several sites before processing")
+    parser.add_argument("--columnar", action="store_true",
+                        help="parse tuition/duration/language column-wise (same output; opt-in, as --bench "
+                             "shows no gain at a few thousand programs)")
+    parser.add_argument("--currency-rates", metavar="FILE_OR_JSON",
+                        help='dated EUR rate tables to add: a JSON file, or inline JSON such as '
+                             '{"2025-01-01": {"USD": 0.92, "GBP": 1.18}}')
+    parser.add_argument("--bench", type=int, metavar="N",
+                        help="check columnar/row-by-row parity and compare throughput on N synthetic programs")
+    parser.add_argument("--state", metavar="SQLITE",
+                        help=f"process incrementally against this state (e.g. {PROCESSOR_STATE_FILE}); only changes are processed")
+    parser.add_argument("--delta", action="store_true",
+                        help="with --state: the input holds only new/changed programs, absent ones are kept "
+                             "(implied for crawls that used the seen index)")
+    parser.add_argument("--remove-unseen", type=int, metavar="DAYS",
+                        help="with --state: drop programs the seen index has not encountered for DAYS days")
+    parser.add_argument("--bench-incremental", type=int, metavar="N",
+                        help="compare full reprocessing with incremental refreshes of N synthetic programs (1%% changed)")
+    parser.add_argument("--bench-loading", type=int, metavar="N",
+                        help="compare peak memory of reading N synthetic programs whole against streaming them")
+    parser.add_argument("--bench-matching", type=int, nargs=2, metavar=("USERS", "PROGRAMS"),
+                        help="check batch matching against the scalar scores and measure users x programs/s")
+    args = parser.parse_args()
+
     processor = BachelorsDataProcessor()
+    if args.currency_rates:
+        from normalize import load_currency_tables
+        load_currency_tables(args.currency_rates)
     
     # Example user profile (from EXPAAI)
     sample_user = {
@@ -356,13 +782,48 @@ if __name__ == "__main__":
         ]
     }
     
+    if args.bench:
+        from sample_data import synthetic_programs
+        programs = synthetic_programs(args.bench)
+        check_processing_parity(processor, programs, sample_user)
+        print(json.dumps(benchmark_processing(processor, programs, sample_user), indent=2))
+        raise SystemExit(0)
+    if args.bench_incremental:
+        print(json.dumps(benchmark_incremental(processor, args.bench_incremental, user_profile=sample_user), indent=2))
+        raise SystemExit(0)
+    if args.bench_loading:
+        print(json.dumps(benchmark_loading(processor, args.bench_loading, sample_user), indent=2))
+        raise SystemExit(0)
+    if args.bench_matching:
+        from sample_data import synthetic_profiles, synthetic_programs
+        users, size = args.bench_matching
+        programs = processor.process_all_data({'programs': synthetic_programs(size)}, columnar=True)['programs']
+        profiles = synthetic_profiles(users)
+        check_matching_parity(processor, programs, profiles[:20])
+        print(json.dumps(benchmark_matching(processor, programs, profiles), indent=2))
+        raise SystemExit(0)
+    
     # Load and process scraped data
     try:
-        scraped_data = processor.load_scraped_data('bachelors_programs_20240315_120000.json')
-        processed_data = processor.process_all_data(scraped_data, sample_user)
+        scraped_data = processor.load_scraped_data(args.input)
+        if args.resolve:
+            from entity_resolution import resolve_entities
+            scraped_data = dict(scraped_data, programs=resolve_entities(scraped_data.get('programs', [])))
+        if args.state:
+            removed = []
+            if args.remove_unseen:
+                from seen_index import SeenIndex
+                removed = SeenIndex().unseen_since(args.remove_unseen)
+            processed_data = processor.process_incremental(scraped_data, args.state, sample_user, columnar=args.columnar,
+                                                           complete=not args.delta, removed=removed)
+        else:
+            processed_data = processor.process_all_data(scraped_data, sample_user, columnar=args.columnar)
+        if not processed_data['programs']:
+            logging.error(f"❌ No programs in {args.input}")
+            raise SystemExit(1)
         
         # Save processed data
-        processor.save_processed_data(processed_data, 'processed_bachelor_programs.json')
+        processor.save_processed_data(processed_data, 'processed_bachelor_programs.json', csv=args.csv)
         
         # Print top matches
         print("\nTop 10 Matches for User:")
@@ -377,3 +838,4 @@ if __name__ == "__main__":
             
     except FileNotFoundError:
         print("No scraped data file found. Please run the scraper first.")
+        raise SystemExit(1)
@@ -1,20 +1,23 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
-import time
+import argparse
 import json
 import logging
 from datetime import datetime
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 import re
+from debug_sink import MODES, ON_ERROR, get_shared_sink
+from driver_pool import DriverPool
+from fetch_pipeline import FetchPipeline
+from fetch_strategy import FetchStrategy
+from page_cache import PageCache
+from page_readiness import wait_until_ready
+from parsing import card_strainer, make_soup
+from record_stream import RecordWriter
+from seen_index import SeenIndex
 
 logging.basicConfig(level=logging.INFO)
 
+# Parse only the card containers; data-role cards are left to a full parse
+CARD_STRAINER = card_strainer(["div", "article"], classes=("ProgramCard", "program-card"))
+
 def slugify(text):
     text = text.lower()
     text = re.sub(r'[^\w\s-]', '', text)
@@ -22,59 +25,50 @@ def slugify(text):
     return text
 
 class BachelorsPortalSeleniumScraper:
-    def __init__(self, headless=True):
-        chrome_options = Options()
-        if headless:
-            chrome_options.add_argument("--headless=new")
-        #chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--disable-extensions")
-        chrome_options.add_argument("--disable-infobars")
-        chrome_options.add_argument("--remote-debugging-port=9222")
-        chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64)")
-
-        #chrome_options.add_argument("--disable-gpu")
-        #chrome_options.add_argument("--no-sandbox")
-        #chrome_options.add_argument("--window-size=1920,1080")
-        #chrome_options.add_argument("--disable-dev-shm-usage")
-        #chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64)")
-
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=chrome_options)
-        #self.driver = webdriver.Chrome(ChromeDriverManager().install(), options=chrome_options)
+    def __init__(self, headless=True, pool=None, workers=2, lean=False, cache=None, seen=None, writer=None):
+        # Borrow drivers from a shared pool, or own one sized for parallel pages
+        self.owns_pool = pool is None
+        self.pool = pool or DriverPool(size=workers, headless=headless,
+                                       user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64)", lean=lean)
+        # Listing pages are tried over plain HTTP before falling back to Chrome,
+        # paced by the shared per-domain rate limiter
+        self.fetcher = FetchStrategy(
+            "div.ProgramCard, article.program-card, div[data-role='ProgramCard']", cache=cache
+        )
+        # Optional SeenIndex: skip known programs and stop at fully known pages
+        self.seen = seen
+        # Optional RecordWriter: pages are streamed to disk instead of returned
+        self.writer = writer
+        self.debug = get_shared_sink()
         self.base_url = "https://www.bachelorsportal.com"
         self.programs_data = []
-    def fetch_page(self, url):
+
+    def fetch_page(self, url, driver=None):
+        if driver is None:
+            with self.pool.driver() as driver:
+                return self.fetch_page(url, driver)
         try:
-            self.driver.get(url)
+            driver.get(url)
         
-            # Wait for page to load or timeout
-            WebDriverWait(self.driver, 15).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "ProgramCard"))
-            )
-
-            # Take screenshot for debugging
-            ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-            screenshot_path = f"screenshot_{ts}.png"
-            self.driver.save_screenshot(screenshot_path)
-            logging.info(f"Saved screenshot to {screenshot_path}")
+            # Wait for program cards to settle or timeout
+            wait_until_ready(driver, ".ProgramCard", timeout=15)
 
-            return self.driver.page_source
+            page_source = driver.page_source
+            self.debug.capture_driver(driver, "bachelorsportal", page_source=page_source)
+            return page_source
 
         except Exception as e:
             logging.warning(f"Timeout or error fetching {url}: {e}")
-            try:
-                self.driver.save_screenshot("error_screenshot.png")
-                logging.info("Saved error screenshot: error_screenshot.png")
-            except:
-                logging.warning("Could not save screenshot.")
+            self.debug.capture_driver(driver, "bachelorsportal", error=True)
             return None
 
     def extract_programs_from_page(self, html):
-        soup = BeautifulSoup(html, 'html.parser')
+        programs = self.extract_programs_from_soup(make_soup(html, site="bachelorsportal", only=CARD_STRAINER))
+        if not programs:
+            programs = self.extract_programs_from_soup(make_soup(html, site="bachelorsportal"))
+        return programs
+
+    def extract_programs_from_soup(self, soup):
         cards = soup.find_all('div', class_='ProgramCard') or \
                 soup.find_all('article', class_='program-card') or \
                 soup.find_all('div', {'data-role': 'ProgramCard'})
@@ -106,21 +100,36 @@ class BachelorsPortalSeleniumScraper:
         return programs
         
     def run_scraper(self, country, discipline, pages=1):
+        country_slug = slugify(country)
+        discipline_slug = slugify(discipline)
+        urls = [f"{self.base_url}/search/bachelor/{discipline_slug}/{country_slug}/page-{page}"
+                for page in range(1, pages + 1)]
+
+        # Pages are fetched in parallel (HTTP first, pooled drivers as fallback)
+        # and parsed off-thread, but handled in page order
+        pipeline = FetchPipeline(
+            fetch=lambda url: self.fetcher.fetch(url, self.fetch_page),
+            parse=self.extract_programs_from_page,
+            fetch_workers=self.pool.size,
+        )
         all_programs = []
-        for page in range(1, pages + 1):
-            country_slug = slugify(country)
-            discipline_slug = slugify(discipline)
-            url = f"{self.base_url}/search/bachelor/{discipline_slug}/{country_slug}/page-{page}"
-            logging.info(f"Scraping: {url}")
-            html = self.fetch_page(url)
-            if not html:
+        keep = self.writer.write_all if self.writer else all_programs.extend
+        for page, page_programs in enumerate(pipeline.run(urls), start=1):
+            if page_programs is None:
                 continue
-            page_programs = self.extract_programs_from_page(html)
             if not page_programs:
                 logging.info(f"No programs found on page {page}")
                 break
-            all_programs.extend(page_programs)
-            time.sleep(2)
+            if self.seen:
+                fresh_programs = self.seen.filter_page(page_programs)
+                keep(fresh_programs)
+                if not fresh_programs:
+                    logging.info(f"Only known programs on page {page}, stopping")
+                    self.seen.keep_listed(page_programs)
+                    break
+                continue
+            keep(page_programs)
+        # Empty when streaming to a writer
         return all_programs
 
     def save_data(self, data, filename="bachelors_programs"):
@@ -131,13 +140,29 @@ class BachelorsPortalSeleniumScraper:
         logging.info(f"Saved {len(data)} programs to {output_file}")
 
     def close(self):
-        self.driver.quit()
+        if self.owns_pool:
+            self.pool.close()
 
 # Example usage
 if __name__ == "__main__":
-    scraper = BachelorsPortalSeleniumScraper(headless=True)
+    parser = argparse.ArgumentParser(description="Scrape bachelorsportal search results")
+    parser.add_argument("--replay", action="store_true", help="run entirely from the page cache")
+    parser.add_argument("--full", action="store_true", help="ignore the seen index and crawl every page")
+    parser.add_argument("--debug-artifacts", choices=MODES, default=ON_ERROR,
+                        help="when to keep screenshots and page sources (sampled keeps 1 in 20 pages)")
+    args = parser.parse_args()
+
+    debug = get_shared_sink(mode=args.debug_artifacts)
+    cache = PageCache(replay=args.replay)
+    seen = None if args.full or args.replay else SeenIndex()
+    writer = RecordWriter(f"bachelors_programs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl", complete=seen is None)
+    scraper = BachelorsPortalSeleniumScraper(headless=True, cache=cache, seen=seen, writer=writer)
     country = "Germany"
     discipline = "Computer Science"
-    programs = scraper.run_scraper(country=country, discipline=discipline, pages=2)
-    scraper.save_data(programs)
+    with writer:
+        scraper.run_scraper(country=country, discipline=discipline, pages=2)
     scraper.close()
+    cache.close()
+    debug.close()
+    if seen:
+        seen.save()
@@ -0,0 +1,161 @@
+import argparse
+import json
+import logging
+import os
+import runpy
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+# Per-machine record of the chromedriver that matches the installed Chrome
+DRIVER_MANIFEST = os.path.join(os.path.expanduser("~"), ".cache", "scrapers", "chromedriver.json")
+
+CHROME_BINARIES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+
+# Entry points (script, repo-relative arguments) and the call that marks their first outbound request
+FIRST_REQUEST = ("rate_limiter", "RateLimiter", "acquire")
+ENTRY_POINTS = {
+    "applyboard": ("applybroad.py", [], FIRST_REQUEST),
+    "bachelorsportal": ("bachelorsportal-scraper.py", [], FIRST_REQUEST),
+    "educations": ("education_scrap.py", [], FIRST_REQUEST),
+    "hotcourses": ("hot_course.py", [], FIRST_REQUEST),
+    "orchestrator": ("crawl_orchestrator.py", ["crawl_jobs.json"], FIRST_REQUEST),
+    # The processor makes no requests; its first real work is opening the scraped data
+    "processor": ("bachelor-data-processor.py", [], ("builtins", None, "open")),
+}
+
+_driver_path = None
+_driver_lock = threading.Lock()
+
+
+def _chrome_fingerprint():
+    """Path and mtime of the installed Chrome, so an upgrade invalidates the manifest without a network check"""
+    for name in CHROME_BINARIES:
+        path = shutil.which(name)
+        if path:
+            real_path = os.path.realpath(path)
+            return {"chrome": real_path, "chrome_mtime": os.path.getmtime(real_path)}
+    return {"chrome": None, "chrome_mtime": None}
+
+
+def _read_manifest(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _manifest_valid(manifest):
+    """Offline check that the pinned driver still exists and Chrome has not changed"""
+    if not manifest:
+        return False
+    driver = manifest.get("driver")
+    if not driver or not os.path.isfile(driver) or not os.access(driver, os.X_OK):
+        return False
+    chrome = _chrome_fingerprint()
+    return manifest.get("chrome") == chrome["chrome"] and manifest.get("chrome_mtime") == chrome["chrome_mtime"]
+
+
+def resolve_chromedriver(manifest_path=DRIVER_MANIFEST, refresh=False):
+    """Return a chromedriver path, downloading through webdriver_manager only when the manifest is stale.
+
+    CHROMEDRIVER_PATH overrides everything.
+    """
+    global _driver_path
+    with _driver_lock:
+        if os.environ.get("CHROMEDRIVER_PATH"):
+            return os.environ["CHROMEDRIVER_PATH"]
+        if _driver_path and not refresh:
+            return _driver_path
+
+        manifest = None if refresh else _read_manifest(manifest_path)
+        if _manifest_valid(manifest):
+            _driver_path = manifest["driver"]
+            return _driver_path
+
+        # Deferred: webdriver_manager pulls in requests and may hit the network
+        from webdriver_manager.chrome import ChromeDriverManager
+        started = time.perf_counter()
+        driver = ChromeDriverManager().install()
+        manifest = dict(_chrome_fingerprint(), driver=driver, resolved_at=datetime.now().isoformat())
+        os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+        tmp_file = f"{manifest_path}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_file, manifest_path)
+        logging.info(f"📌 Pinned chromedriver {driver} in {time.perf_counter() - started:.1f}s")
+        _driver_path = driver
+        return _driver_path
+
+
+def _run_until_first_request(entry):
+    """Child side of the benchmark: run an entry point and exit the moment it reaches its first request"""
+    script, script_args, (module_name, class_name, method) = ENTRY_POINTS[entry]
+    module = __import__(module_name)
+    owner = getattr(module, class_name) if class_name else module
+    original = getattr(owner, method)
+    started = float(os.environ["STARTUP_BENCH_T0"])
+
+    def first_request(*args, **kwargs):
+        print(json.dumps({"entry": entry, "first_request_s": time.time() - started}), flush=True)
+        os._exit(0)
+
+    setattr(owner, method, first_request)
+    root = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, root)
+    sys.argv = [script] + [os.path.join(root, arg) for arg in script_args]
+    try:
+        runpy.run_path(os.path.join(root, script), run_name="__main__")
+    finally:
+        setattr(owner, method, original)
+    print(json.dumps({"entry": entry, "first_request_s": None}), flush=True)
+
+
+def benchmark_startup(entries=None, repeat=3, timeout=120):
+    """Time-to-first-request of each entry point in fresh interpreters, run from a scratch directory"""
+    results = {}
+    for entry in entries or ENTRY_POINTS:
+        samples = []
+        for _ in range(repeat):
+            with tempfile.TemporaryDirectory() as scratch:
+                env = dict(os.environ, STARTUP_BENCH_T0=repr(time.time()))
+                try:
+                    completed = subprocess.run(
+                        [sys.executable, os.path.abspath(__file__), "--first-request", entry],
+                        cwd=scratch, env=env, capture_output=True, text=True, timeout=timeout,
+                    )
+                except subprocess.TimeoutExpired:
+                    break
+            reports = [json.loads(line) for line in completed.stdout.splitlines() if line.startswith('{"entry"')]
+            if not reports or reports[-1]["first_request_s"] is None:
+                errors = completed.stderr.strip().splitlines()
+                logging.warning(f"{entry} stopped before its first request: {errors[-1] if errors else 'no output'}")
+                break
+            samples.append(reports[-1]["first_request_s"])
+        results[entry] = min(samples) if len(samples) == repeat else None
+        status = f"{results[entry] * 1000:8.0f} ms" if results[entry] is not None else "  no request reached"
+        logging.info(f"{entry:>16}: {status}")
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Pin chromedriver and measure scraper start-up")
+    parser.add_argument("--refresh", action="store_true", help="re-resolve chromedriver and rewrite the manifest")
+    parser.add_argument("--bench", nargs="*", choices=list(ENTRY_POINTS), metavar="ENTRY",
+                        help="time-to-first-request for the given entry points (default all)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--first-request", choices=list(ENTRY_POINTS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.first_request:
+        _run_until_first_request(args.first_request)
+    elif args.bench is not None:
+        print(json.dumps(benchmark_startup(args.bench or None, repeat=args.repeat), indent=2))
+    else:
+        print(resolve_chromedriver(refresh=args.refresh))
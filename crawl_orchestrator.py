@@ -0,0 +1,194 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import quote
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+from debug_sink import MODES, ON_ERROR, get_shared_sink
+from driver_pool import DriverPool
+from entity_resolution import canonical_fields
+from normalize import log_memo_stats, split_location
+from page_cache import PageCache
+from parsing import load_script
+from rate_limiter import get_shared_limiter
+from record_stream import RecordWriter
+from seen_index import SeenIndex
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+SITES = ("applyboard", "bachelorsportal", "educations", "hotcourses")
+
+# Concurrent jobs allowed against each site
+DOMAIN_LIMITS = {
+    "applyboard": 1,
+    "bachelorsportal": 2,
+    "educations": 2,
+    "hotcourses": 1,
+}
+
+
+def normalize_record(site, job, record):
+    """Map a site-specific record onto the schema BachelorsDataProcessor.process_program reads"""
+    query = job.get("query")
+    canonical = canonical_fields(record)
+    # "Berlin, Germany" style locations carry the country the processor otherwise only gets from the query
+    city, country = split_location(canonical["city"])
+    normalized = {
+        "source": site,
+        "title": record.get("title", "N/A"),
+        "university": canonical["university"],
+        "city": city or canonical["city"],
+        "tuition_fee": canonical["tuition_fee"],
+        "duration": record.get("duration", "N/A"),
+        "deadline": record.get("deadline", "N/A"),
+        "url": record.get("url", ""),
+        "scraped_at": record.get("scraped_at") or datetime.now().isoformat(),
+    }
+    if country:
+        normalized["country"] = country
+    if isinstance(query, dict):
+        if query.get("country"):
+            normalized["search_country"] = query["country"]
+        if query.get("discipline"):
+            normalized["search_discipline"] = query["discipline"]
+    return normalized
+
+
+class JobWriter:
+    """Normalize one job's records on the fly and forward them to the shared output stream"""
+
+    def __init__(self, writer, site, job):
+        self.writer = writer
+        self.site = site
+        self.job = job
+        self.count = 0
+
+    def write(self, record):
+        written = self.writer.write(normalize_record(self.site, self.job, record))
+        self.count += written
+        return written
+
+    def write_all(self, records):
+        return sum(1 for record in records if self.write(record))
+
+
+class CrawlOrchestrator:
+    """Run (site, query, pages) jobs across all four scrapers concurrently with shared browsers"""
+
+    def __init__(self, browser_budget=3, domain_limits=None, max_workers=8, headless=True,
+                 lean=False, cache=None, seen=None):
+        # One pool caps the number of Chrome instances across every site
+        self.pool = DriverPool(size=browser_budget, headless=headless, stealth=True, lean=lean)
+        self.domain_limits = dict(DOMAIN_LIMITS, **(domain_limits or {}))
+        self.max_workers = max_workers
+        self.cache = cache
+        self.seen = seen
+        self.job_times = []
+
+    def run_job(self, job, writer):
+        """Run one job synchronously on a worker thread, streaming its records into writer"""
+        site = job["site"]
+        query = job.get("query")
+        pages = job.get("pages", 1)
+        job_writer = JobWriter(writer, site, job)
+        common = {"pool": self.pool, "cache": self.cache, "seen": self.seen, "writer": job_writer}
+
+        if site == "applyboard":
+            scraper = load_script("applybroad", "applybroad.py").ApplyBoardScraper(**common)
+            search_url = query if query.startswith("http") else \
+                f"https://www.applyboard.com/search?filter[q]={quote(query)}"
+            scraper.run_scraper(search_url)
+        elif site == "bachelorsportal":
+            module = load_script("bachelorsportal_scraper", "bachelorsportal-scraper.py")
+            scraper = module.BachelorsPortalSeleniumScraper(workers=self.pool.size, **common)
+            scraper.run_scraper(country=query["country"], discipline=query["discipline"], pages=pages)
+        elif site == "educations":
+            scraper = load_script("education_scrap", "education_scrap.py").EducationsCategoryScraper(**common)
+            scraper.run_scraper(query, max_pages=pages)
+        elif site == "hotcourses":
+            scraper = load_script("hot_course", "hot_course.py").HotcoursesScraper(**common)
+            scraper.run(query, max_pages=pages)
+        else:
+            raise ValueError(f"Unknown site: {site}")
+
+        scraper.close()
+        return job_writer.count
+
+    async def run(self, jobs, writer):
+        """Run every job concurrently within the per-domain limits; returns the number of records written"""
+        loop = asyncio.get_running_loop()
+        semaphores = {site: asyncio.Semaphore(self.domain_limits.get(site, 1)) for site in SITES}
+        started = time.perf_counter()
+
+        async def run_one(job):
+            async with semaphores[job["site"]]:
+                job_started = time.perf_counter()
+                try:
+                    count = await loop.run_in_executor(executor, self.run_job, job, writer)
+                except Exception as e:
+                    logging.error(f"❌ {job['site']} job failed: {e}")
+                    return 0
+                finally:
+                    elapsed = time.perf_counter() - job_started
+                    self.job_times.append(elapsed)
+                logging.info(f"🏁 {job['site']} job done in {elapsed:.1f}s: {count} records")
+                return count
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            counts = await asyncio.gather(*(run_one(job) for job in jobs))
+
+        wall = time.perf_counter() - started
+        logging.info(f"✅ {len(jobs)} jobs, {sum(counts)} records in {wall:.1f}s wall "
+                     f"(sequential would be ~{sum(self.job_times):.1f}s)")
+        get_shared_limiter().log_metrics()
+        log_memo_stats()
+        return sum(counts)
+
+    def close(self):
+        self.pool.close()
+
+
+def load_jobs(path):
+    with open(path, "r", encoding="utf-8") as f:
+        jobs = json.load(f)
+    for job in jobs:
+        if job.get("site") not in SITES:
+            raise ValueError(f"Unknown site in job list: {job.get('site')}")
+    return jobs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl several sites concurrently from a job list")
+    parser.add_argument("jobs", nargs="?", default="crawl_jobs.json", help="JSON list of {site, query, pages}")
+    parser.add_argument("--browsers", type=int, default=3, help="global Chrome budget")
+    parser.add_argument("--lean", action="store_true", help="block images, fonts, media and trackers")
+    parser.add_argument("--replay", action="store_true", help="run entirely from the page cache")
+    parser.add_argument("--full", action="store_true", help="ignore the seen index and crawl every page")
+    parser.add_argument("--compress", choices=["gzip", "zstd"], help="compress the JSONL output")
+    parser.add_argument("--output", help="JSONL output path (default crawl_results_<timestamp>.jsonl, "
+                                         "plus .gz/.zst with --compress)")
+    parser.add_argument("--debug-artifacts", choices=MODES, default=ON_ERROR,
+                        help="when to keep screenshots and page sources (sampled keeps 1 in 20 pages)")
+    args = parser.parse_args()
+
+    debug = get_shared_sink(mode=args.debug_artifacts)
+
+    cache = PageCache(replay=args.replay)
+    seen = None if args.full or args.replay else SeenIndex()
+    orchestrator = CrawlOrchestrator(browser_budget=args.browsers, lean=args.lean, cache=cache, seen=seen)
+    try:
+        suffix = {"gzip": ".gz", "zstd": ".zst"}.get(args.compress, "")
+        # Records are appended as each job extracts them and deduplicated across sites; with a seen
+        # index known programs are left out, so the output is marked as a delta for the processor
+        output = args.output or f"crawl_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl{suffix}"
+        with RecordWriter(output, complete=seen is None) as writer:
+            asyncio.run(orchestrator.run(load_jobs(args.jobs), writer))
+    finally:
+        orchestrator.close()
+        cache.close()
+        debug.close()
+        if seen:
+            seen.save()
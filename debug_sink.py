@@ -0,0 +1,180 @@
+from datetime import datetime
+import atexit
+import gzip
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+
+OFF = "off"
+ON_ERROR = "on-error"
+SAMPLED = "sampled"
+ALWAYS = "always"
+MODES = (OFF, ON_ERROR, SAMPLED, ALWAYS)
+
+DEBUG_DIR = "debug_artifacts"
+
+# Already-compressed formats are written as-is
+UNCOMPRESSED_SUFFIXES = (".png", ".jpg", ".gz")
+
+_shared_sink = None
+_shared_lock = threading.Lock()
+
+
+class DebugSink:
+    """Background writer for debug artifacts (screenshots, page sources, card dumps).
+
+    mode decides what is kept: off, on-error (failures only), sampled (failures
+    plus 1 in sample_every successes) or always. Callers only grab bytes from
+    the driver; compression, writing and size-based rotation happen on a
+    worker thread. Artifact values may be callables, which are evaluated on
+    that thread too.
+    """
+
+    def __init__(self, directory=DEBUG_DIR, mode=ON_ERROR, sample_every=20, max_bytes=100 * 1024 * 1024):
+        if mode not in MODES:
+            raise ValueError(f"Unknown debug mode: {mode} (expected one of {', '.join(MODES)})")
+        self.directory = directory
+        self.mode = mode
+        self.sample_every = max(1, sample_every)
+        self.max_bytes = max_bytes
+        self.counts = {"captured": 0, "skipped": 0, "dropped": 0, "rotated": 0}
+        self._sequence = itertools.count(1)
+        self._seen = itertools.count()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=64)
+        self._worker = None
+        self._total_bytes = None
+
+    def sample(self, error=False):
+        """Decide whether this page's artifacts should be captured"""
+        if self.mode == OFF:
+            return False
+        if error or self.mode == ALWAYS:
+            return True
+        with self._lock:
+            if self.mode == SAMPLED and next(self._seen) % self.sample_every == 0:
+                return True
+            self.counts["skipped"] += 1
+        return False
+
+    def _count(self, key):
+        # Capture threads and the writer thread all update counts
+        with self._lock:
+            self.counts[key] += 1
+
+    def _artifact_name(self, label, suffix):
+        # Timestamp keeps files sortable by age; pid and sequence make names unique
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        safe_label = "".join(c if c.isalnum() or c in "-_" else "_" for c in label)[:60]
+        return f"{stamp}_{os.getpid()}_{next(self._sequence):05d}_{safe_label}{suffix}"
+
+    def submit(self, label, artifacts):
+        """Queue {suffix: str | bytes | json-able | callable} for writing; never blocks the caller"""
+        self._ensure_worker()
+        names = {suffix: self._artifact_name(label, suffix) for suffix in artifacts}
+        try:
+            self._queue.put_nowait((names, artifacts))
+        except queue.Full:
+            self._count("dropped")
+            logging.debug(f"Debug queue full, dropped artifacts for {label}")
+
+    def capture_driver(self, driver, label, error=False, page_source=None, screenshot=True):
+        """Snapshot a driver's screenshot and page source if this page is sampled"""
+        if not self.sample(error):
+            return False
+        artifacts = {}
+        try:
+            if screenshot:
+                artifacts[".png"] = driver.get_screenshot_as_png()
+            artifacts[".html"] = page_source if page_source is not None else driver.page_source
+        except Exception as e:
+            logging.debug(f"Could not capture debug artifacts for {label}: {e}")
+        if artifacts:
+            self.submit(f"{label}_error" if error else label, artifacts)
+        return bool(artifacts)
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None:
+                os.makedirs(self.directory, exist_ok=True)
+                self._worker = threading.Thread(target=self._run, name="debug-sink", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                self._queue.task_done()
+                return
+            names, artifacts = job
+            try:
+                for suffix, value in artifacts.items():
+                    self._write(names[suffix], value() if callable(value) else value)
+            except Exception as e:
+                logging.warning(f"Could not write debug artifacts: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, name, value):
+        if isinstance(value, str):
+            data = value.encode("utf-8")
+        elif isinstance(value, bytes):
+            data = value
+        else:
+            data = json.dumps(value, indent=2, ensure_ascii=False).encode("utf-8")
+
+        path = os.path.join(self.directory, name)
+        if name.endswith(UNCOMPRESSED_SUFFIXES):
+            with open(path, "wb") as f:
+                f.write(data)
+        else:
+            path += ".gz"
+            with gzip.open(path, "wb", compresslevel=6) as f:
+                f.write(data)
+        self._count("captured")
+        self._rotate(os.path.getsize(path))
+
+    def _rotate(self, added):
+        """Delete the oldest artifacts once the directory exceeds max_bytes"""
+        if self._total_bytes is None:
+            self._total_bytes = sum(entry.stat().st_size for entry in os.scandir(self.directory) if entry.is_file())
+        else:
+            self._total_bytes += added
+        if self._total_bytes <= self.max_bytes:
+            return
+        for name in sorted(os.listdir(self.directory)):
+            if self._total_bytes <= self.max_bytes * 0.8:
+                break
+            path = os.path.join(self.directory, name)
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                continue
+            self._total_bytes -= size
+            self._count("rotated")
+
+    def close(self):
+        """Flush queued artifacts and stop the worker"""
+        with self._lock:
+            worker, self._worker = self._worker, None
+        if worker is None:
+            return
+        self._queue.put(None)
+        worker.join()
+        c = self.counts
+        logging.info(f"🐞 Debug artifacts ({self.mode}): {c['captured']} written to {self.directory}, "
+                     f"{c['skipped']} pages skipped, {c['dropped']} dropped, {c['rotated']} rotated out")
+
+
+def get_shared_sink(**kwargs):
+    """Return the process-wide sink, creating it with kwargs on first use"""
+    global _shared_sink
+    with _shared_lock:
+        if _shared_sink is None:
+            _shared_sink = DebugSink(**kwargs)
+            atexit.register(_shared_sink.close)
+        return _shared_sink
@@ -0,0 +1,251 @@
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import logging
+import queue
+import threading
+
+from bootstrap import resolve_chromedriver
+from lean_mode import apply_lean_options, enable_request_blocking, collect_page_savings
+from page_readiness import install_network_tracker
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+
+def build_chrome_options(headless=True, user_agent=DEFAULT_USER_AGENT, stealth=False, lean=False,
+                         performance_log=False):
+    """Build the Chrome options shared by all scrapers"""
+    chrome_options = Options()
+    if headless:
+        chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.add_argument("--disable-extensions")
+    chrome_options.add_argument("--disable-infobars")
+    chrome_options.add_argument(f"--user-agent={user_agent}")
+
+    if stealth:
+        # Additional options to avoid detection
+        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        chrome_options.add_experimental_option('useAutomationExtension', False)
+        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+
+    if lean:
+        apply_lean_options(chrome_options)
+
+    if lean or performance_log:
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+    return chrome_options
+
+
+class DriverPool:
+    """Fixed-size pool of reusable Chrome drivers that scrapers borrow from"""
+
+    def __init__(self, size=2, headless=True, user_agent=DEFAULT_USER_AGENT, stealth=False, max_uses=50,
+                 lean=False, blocklist=None, capture_network=False):
+        self.size = size
+        self.headless = headless
+        self.user_agent = user_agent
+        self.stealth = stealth
+        self.max_uses = max_uses
+        # Lean mode drops images, fonts, media and tracker requests
+        self.lean = lean
+        self.blocklist = blocklist
+        self.lean_totals = {"pages": 0, "requests": 0, "bytes": 0, "blocked_requests": 0, "estimated_bytes_saved": 0}
+        # Keep Chrome's performance log so callers can read network traffic
+        self.capture_network = capture_network
+        self._perf_entries = {}
+
+        self._idle = queue.LifoQueue()
+        self._uses = {}
+        self._created = 0
+        self._lock = threading.Lock()
+        self._driver_path = None
+        self._closed = False
+
+    def _resolve_driver_path(self):
+        with self._lock:
+            if self._driver_path is None:
+                self._driver_path = resolve_chromedriver()
+            return self._driver_path
+
+    def _new_driver(self):
+        chrome_options = build_chrome_options(self.headless, self.user_agent, self.stealth, self.lean,
+                                              self.capture_network)
+        service = Service(self._resolve_driver_path())
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+
+        if self.stealth:
+            # Execute script to remove webdriver property
+            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+
+        install_network_tracker(driver)
+        if self.lean:
+            enable_request_blocking(driver, self.blocklist)
+
+        with self._lock:
+            self._uses[id(driver)] = 0
+        logging.info(f"🚗 Started pooled Chrome driver ({self._created}/{self.size})")
+        return driver
+
+    def _discard(self, driver):
+        with self._lock:
+            self._uses.pop(id(driver), None)
+        self._perf_entries.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception as e:
+            logging.warning(f"Error quitting driver: {e}")
+        with self._lock:
+            self._created -= 1
+
+    def is_healthy(self, driver):
+        """Check that the browser session still responds"""
+        try:
+            driver.execute_script("return document.readyState")
+            return True
+        except Exception:
+            return False
+
+    def acquire(self, timeout=None):
+        """Borrow a driver, starting a new one if the pool is not yet full"""
+        if self._closed:
+            raise RuntimeError("DriverPool is closed")
+
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_create = self._created < self.size
+                    if can_create:
+                        self._created += 1
+                if can_create:
+                    try:
+                        return self._new_driver()
+                    except Exception:
+                        with self._lock:
+                            self._created -= 1
+                        raise
+                driver = self._idle.get(timeout=timeout)
+
+            if self.is_healthy(driver):
+                return driver
+            logging.warning("♻️ Discarding unhealthy pooled driver")
+            self._discard(driver)
+
+    def drain_performance_log(self, driver):
+        """Return performance-log entries logged since the last drain.
+
+        Entries are also retained until release so lean-mode accounting
+        still sees traffic that a caller already consumed.
+        """
+        try:
+            entries = driver.get_log("performance")
+        except Exception as e:
+            logging.debug(f"Performance log unavailable: {e}")
+            return []
+        if self.lean:
+            self._perf_entries.setdefault(id(driver), []).extend(entries)
+        return entries
+
+    def record_page(self, driver):
+        """Account lean-mode savings for what the driver loaded since the last call.
+
+        release() does this once per borrow; callers that load several pages
+        on one borrowed driver (in-page pagination, infinite scroll) call it
+        after each page so savings are reported per page.
+        """
+        if not self.lean:
+            return
+        self.drain_performance_log(driver)
+        savings = collect_page_savings(self._perf_entries.pop(id(driver), []))
+        if not savings:
+            return
+        with self._lock:
+            self.lean_totals["pages"] += 1
+            for key, value in savings.items():
+                self.lean_totals[key] += value
+        logging.info(
+            f"🪶 Lean page: {savings['requests']} requests / {savings['bytes'] / 1024:.0f} KB loaded, "
+            f"{savings['blocked_requests']} blocked (~{savings['estimated_bytes_saved'] / 1024:.0f} KB saved)"
+        )
+
+    def release(self, driver, broken=False):
+        """Return a driver to the pool, recycling it when worn out or broken"""
+        if not broken:
+            self.record_page(driver)
+
+        with self._lock:
+            uses = self._uses.get(id(driver), 0) + 1
+            self._uses[id(driver)] = uses
+
+        if self._closed or broken or uses >= self.max_uses:
+            logging.info(f"♻️ Recycling pooled driver after {uses} uses")
+            self._discard(driver)
+        else:
+            self._idle.put(driver)
+
+    @contextmanager
+    def driver(self, timeout=None):
+        """Borrow a driver for the duration of a with-block"""
+        driver = self.acquire(timeout=timeout)
+        broken = False
+        try:
+            yield driver
+        except Exception:
+            broken = not self.is_healthy(driver)
+            raise
+        finally:
+            self.release(driver, broken=broken)
+
+    def map(self, fn, items):
+        """Run fn(driver, item) for each item across pooled drivers, preserving order"""
+        def run(item):
+            with self.driver() as driver:
+                return fn(driver, item)
+
+        items = list(items)
+        if not items:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.size, len(items))) as executor:
+            return list(executor.map(run, items))
+
+    def close(self):
+        self._closed = True
+        if self.lean and self.lean_totals["pages"]:
+            totals = self.lean_totals
+            logging.info(
+                f"🪶 Lean mode total: {totals['blocked_requests']} requests blocked, "
+                f"~{totals['estimated_bytes_saved'] / 1024 / 1024:.1f} MB saved over {totals['pages']} pages"
+            )
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+_shared_pool = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_pool(**kwargs):
+    """Return the process-wide pool, creating it with kwargs on first use"""
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None or _shared_pool._closed:
+            _shared_pool = DriverPool(**kwargs)
+        return _shared_pool
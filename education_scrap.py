@@ -1,50 +1,89 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
+import argparse
 import json
 import logging
-import time
 from datetime import datetime
+from debug_sink import MODES, ON_ERROR, get_shared_sink
+from driver_pool import DriverPool
+from fetch_pipeline import FetchPipeline
+from fetch_strategy import FetchStrategy
+from page_cache import PageCache
+from page_readiness import wait_until_ready
+from parsing import card_strainer, make_soup
+from record_stream import RecordWriter
+from seen_index import SeenIndex
 
 logging.basicConfig(level=logging.INFO)
 
+# Parse only the card containers
+CARD_STRAINER = card_strainer("div", classes=("card__content",))
+
 class EducationsCategoryScraper:
-    def __init__(self, headless=True):
-        chrome_options = Options()
-        if headless:
-            chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--user-agent=Mozilla/5.0")
-
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=chrome_options)
+    def __init__(self, headless=True, pool=None, workers=2, lean=False, cache=None, seen=None, writer=None):
+        # Borrow drivers from a shared pool, or own one sized for parallel pages
+        self.owns_pool = pool is None
+        self.pool = pool or DriverPool(size=workers, headless=headless, user_agent="Mozilla/5.0", lean=lean)
+        # Listing pages are tried over plain HTTP before falling back to Chrome
+        self.fetcher = FetchStrategy("div.card__content", cache=cache)
+        # Optional SeenIndex: skip known programs and stop at fully known pages
+        self.seen = seen
+        self.debug = get_shared_sink()
+        # Optional RecordWriter: records are streamed to disk instead of kept in memory
+        self.writer = writer
         self.programs = []
 
+    def fetch_page(self, url, driver=None):
+        if driver is None:
+            with self.pool.driver() as driver:
+                return self.fetch_page(url, driver)
+        try:
+            driver.get(url)
+            wait_until_ready(driver, ".card__title-link", timeout=10)
+            page_source = driver.page_source
+            self.debug.capture_driver(driver, "educations", page_source=page_source)
+            return page_source
+        except Exception as e:
+            logging.warning(f"Failed to scrape {url}: {e}")
+            self.debug.capture_driver(driver, "educations", error=True)
+            return None
+
     def run_scraper(self, base_url, max_pages=2):
-        for page in range(1, max_pages + 1):
-            url = f"{base_url}?page={page}"
-            logging.info(f"Scraping: {url}")
-            try:
-                self.driver.get(url)
-                WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, ".card__title-link"))
-                )
-                time.sleep(2)  # Wait for full JS load
-                soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-                self.parse_page(soup)
-            except Exception as e:
-                logging.warning(f"Failed to scrape page {page}: {e}")
+        urls = [f"{base_url}?page={page}" for page in range(1, max_pages + 1)]
+        # Pages are fetched in parallel (HTTP first, pooled drivers as fallback)
+        # and parsed off-thread, but handled in page order
+        pipeline = FetchPipeline(
+            fetch=lambda url: self.fetcher.fetch(url, self.fetch_page),
+            parse=self.parse_html,
+            fetch_workers=self.pool.size,
+        )
+        for page, page_programs in enumerate(pipeline.run(urls), start=1):
+            if page_programs is None:
                 continue
 
+            if self.seen:
+                fresh_programs = self.seen.filter_page(page_programs)
+                self.keep(fresh_programs)
+                if page_programs and not fresh_programs:
+                    logging.info(f"Only known programs on page {page}, stopping")
+                    self.seen.keep_listed(page_programs)
+                    break
+            else:
+                self.keep(page_programs)
+
+    def keep(self, records):
+        """Stream records to the writer if there is one, otherwise collect them in memory"""
+        if self.writer:
+            self.writer.write_all(records)
+        else:
+            self.programs.extend(records)
+
+    def parse_html(self, html):
+        return self.parse_cards(make_soup(html, site="educations", only=CARD_STRAINER))
+
     def parse_page(self, soup):
+        self.programs.extend(self.parse_cards(soup))
+
+    def parse_cards(self, soup):
+        programs = []
         cards = soup.select("div.card__content")
         for card in cards:
             try:
@@ -53,7 +92,7 @@ class EducationsCategoryScraper:
                 location = card.select_one(".card__location")
                 link = title_tag["href"] if title_tag and title_tag.has_attr("href") else None
 
-                self.programs.append({
+                programs.append({
                     "title": title_tag.text.strip() if title_tag else "N/A",
                     "provider": provider.text.strip() if provider else "N/A",
                     "location": location.text.strip() if location else "N/A",
@@ -61,6 +100,7 @@ class EducationsCategoryScraper:
                 })
             except Exception as e:
                 logging.warning(f"Error parsing program card: {e}")
+        return programs
 
     def save_to_file(self):
         filename = f"educations_bachelors_na_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
@@ -69,13 +109,29 @@ class EducationsCategoryScraper:
         logging.info(f"✅ Saved {len(self.programs)} programs to {filename}")
 
     def close(self):
-        self.driver.quit()
+        if self.owns_pool:
+            self.pool.close()
 
 
 # Usage
 if __name__ == "__main__":
-    scraper = EducationsCategoryScraper(headless=True)
+    parser = argparse.ArgumentParser(description="Scrape educations.com category listings")
+    parser.add_argument("--replay", action="store_true", help="run entirely from the page cache")
+    parser.add_argument("--full", action="store_true", help="ignore the seen index and crawl every page")
+    parser.add_argument("--debug-artifacts", choices=MODES, default=ON_ERROR,
+                        help="when to keep screenshots and page sources (sampled keeps 1 in 20 pages)")
+    args = parser.parse_args()
+
+    debug = get_shared_sink(mode=args.debug_artifacts)
+    cache = PageCache(replay=args.replay)
+    seen = None if args.full or args.replay else SeenIndex()
+    writer = RecordWriter(f"educations_bachelors_na_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl", complete=seen is None)
+    scraper = EducationsCategoryScraper(headless=True, cache=cache, seen=seen, writer=writer)
     url = "https://www.educations.com/bachelors-degree/north-america"
-    scraper.run_scraper(url, max_pages=2)
-    scraper.save_to_file()
+    with writer:
+        scraper.run_scraper(url, max_pages=2)
     scraper.close()
+    cache.close()
+    debug.close()
+    if seen:
+        seen.save()
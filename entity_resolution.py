@@ -0,0 +1,252 @@
+from collections import Counter, defaultdict
+from functools import lru_cache
+import argparse
+import hashlib
+import logging
+import re
+import unicodedata
+
+from normalize import clean_text
+
+# Each canonical field and the per-site names it goes by
+FIELD_ALIASES = {
+    "university": ("university", "school", "provider"),
+    "city": ("city", "location"),
+    "tuition_fee": ("tuition_fee", "tuition"),
+}
+
+MISSING = {"", "N/A", "Unknown", "Unknown University", "Unknown Program"}
+
+# Which source wins when merged records disagree (richest detail pages first)
+SOURCE_PRIORITY = ("bachelorsportal", "applyboard", "hotcourses", "educations")
+
+ABBREVIATIONS = {
+    "univ": "university", "uni": "university", "u": "university",
+    "coll": "college", "inst": "institute", "tech": "technology",
+    "st": "saint", "intl": "international", "natl": "national",
+}
+
+STOPWORDS = {"the", "of", "at", "in", "and", "for", "de", "der", "des", "la", "le", "fur"}
+
+
+def is_missing(value):
+    return value is None or (isinstance(value, str) and value.strip() in MISSING)
+
+
+def canonical_fields(record):
+    """Copy record with site-specific field names mapped onto the canonical ones"""
+    canonical = dict(record)
+    for field, aliases in FIELD_ALIASES.items():
+        value = next((record[alias] for alias in aliases if not is_missing(record.get(alias))), "N/A")
+        for alias in aliases:
+            canonical.pop(alias, None)
+        canonical[field] = value
+    return canonical
+
+
+@lru_cache(maxsize=65536)
+def normalize_name(text):
+    """Lower-case, accent-free, punctuation-free name with abbreviations expanded and stopwords dropped"""
+    if is_missing(text):
+        return ""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    text = text.lower().replace("(opens in new tab)", " ").replace("&", " and ")
+    text = re.sub(r"[^a-z0-9\s]", " ", text)
+    tokens = [ABBREVIATIONS.get(token, token) for token in text.split()]
+    return " ".join(token for token in tokens if token not in STOPWORDS)
+
+
+def display_name(text):
+    """Raw name with scraping debris removed, for showing the canonical spelling"""
+    return clean_text(text)
+
+
+def shingles(name, size=3):
+    padded = f" {name} "
+    return {padded[i:i + size] for i in range(max(1, len(padded) - size + 1))}
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        root = self.parent.setdefault(item, item)
+        while self.parent[root] != root:
+            root = self.parent[root]
+        # Path compression
+        while item != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            # Smallest key as root keeps cluster ids deterministic
+            if root_b < root_a:
+                root_a, root_b = root_b, root_a
+            self.parent[root_b] = root_a
+
+
+def cluster_names(names, threshold=0.85, max_block=100, stats=None):
+    """Group near-duplicate normalized names; returns {name: representative name}.
+
+    Names are only compared within token blocks. Tokens shared by more than
+    max_block names (e.g. "university") are not used as block keys, which
+    keeps the number of comparisons close to linear in the number of names.
+    """
+    unique = sorted({name for name in names if name})
+    frequency = Counter(token for name in unique for token in set(name.split()))
+    blocks = defaultdict(list)
+    for name in unique:
+        keys = [token for token in set(name.split()) if frequency[token] <= max_block]
+        # A name made only of common tokens still blocks with its exact spelling
+        for key in keys or [f"={name}"]:
+            blocks[key].append(name)
+
+    shingle_sets = {name: shingles(name) for name in unique}
+    clusters = UnionFind()
+    compared = set()
+    for members in blocks.values():
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                if (a, b) in compared:
+                    continue
+                compared.add((a, b))
+                size_a, size_b = len(shingle_sets[a]), len(shingle_sets[b])
+                # Jaccard can never reach the threshold when the sizes are too far apart
+                if min(size_a, size_b) < threshold * max(size_a, size_b):
+                    continue
+                if jaccard(shingle_sets[a], shingle_sets[b]) >= threshold:
+                    clusters.union(a, b)
+    if stats is not None:
+        stats["comparisons"] = stats.get("comparisons", 0) + len(compared)
+        stats["all_pairs"] = stats.get("all_pairs", 0) + len(unique) * (len(unique) - 1) // 2
+    return {name: clusters.find(name) for name in unique}
+
+
+def _stable_id(prefix, text):
+    return f"{prefix}_{hashlib.sha1(text.encode('utf-8')).hexdigest()[:12]}"
+
+
+def _priority(record):
+    source = record.get("source")
+    return SOURCE_PRIORITY.index(source) if source in SOURCE_PRIORITY else len(SOURCE_PRIORITY)
+
+
+def merge_cluster(records):
+    """Merge records of one program: per field the highest-priority source with a value wins"""
+    ordered = sorted(records, key=_priority)
+    merged = {}
+    field_sources = {}
+    for record in ordered:
+        for field, value in record.items():
+            if field == "source" or is_missing(value):
+                continue
+            if field not in merged:
+                merged[field] = value
+                field_sources[field] = record.get("source", "unknown")
+    for field in ("title", "university", "city", "tuition_fee", "duration", "deadline", "url"):
+        merged.setdefault(field, "N/A")
+    merged["scraped_at"] = max((r["scraped_at"] for r in records if r.get("scraped_at")), default=merged.get("scraped_at"))
+    merged["source"] = ordered[0].get("source", "unknown")
+    merged["sources"] = [
+        {key: record.get(key, "N/A") for key in ("source", "url", "title", "university")} for record in ordered
+    ]
+    merged["field_sources"] = field_sources
+    return merged
+
+
+def resolve_entities(records, university_threshold=0.85, title_threshold=0.9, max_block=100):
+    """Map records from all sources to canonical universities and programs, returning merged records.
+
+    Universities are clustered on normalized names; within each university,
+    programs are clustered on normalized titles, and records sharing a URL
+    are always merged. Each merged record carries university_id, program_id
+    and the per-source provenance of its fields.
+    """
+    records = [canonical_fields(record) for record in records]
+    stats = {}
+
+    university_names = [normalize_name(record["university"]) for record in records]
+    university_root = cluster_names(university_names, university_threshold, max_block, stats)
+
+    # Canonical spelling: the most common raw variant in each cluster
+    variants = defaultdict(Counter)
+    for record, name in zip(records, university_names):
+        if name:
+            variants[university_root[name]][display_name(record["university"])] += 1
+    canonical_university = {root: counts.most_common(1)[0][0] for root, counts in variants.items()}
+
+    programs = UnionFind()
+    by_university = defaultdict(list)
+    by_url = {}
+    for index, (record, name) in enumerate(zip(records, university_names)):
+        programs.find(index)
+        url = record.get("url")
+        if not is_missing(url):
+            if url in by_url:
+                programs.union(by_url[url], index)
+            else:
+                by_url[url] = index
+        if name:
+            by_university[university_root[name]].append(index)
+
+    for indexes in by_university.values():
+        titles = {index: normalize_name(records[index].get("title")) for index in indexes}
+        title_root = cluster_names(titles.values(), title_threshold, max_block, stats)
+        first_with_title = {}
+        for index, title in titles.items():
+            if not title:
+                continue
+            root = title_root[title]
+            if root in first_with_title:
+                programs.union(first_with_title[root], index)
+            else:
+                first_with_title[root] = index
+
+    clusters = defaultdict(list)
+    for index in range(len(records)):
+        clusters[programs.find(index)].append(index)
+
+    merged_records = []
+    for indexes in clusters.values():
+        merged = merge_cluster([records[index] for index in indexes])
+        name = next((university_names[index] for index in indexes if university_names[index]), "")
+        if name:
+            root = university_root[name]
+            merged["university"] = canonical_university[root]
+            merged["university_id"] = _stable_id("uni", root)
+        else:
+            merged["university_id"] = None
+        title_key = normalize_name(merged.get("title")) or merged.get("url", "")
+        merged["program_id"] = _stable_id("prog", f"{merged['university_id']}|{title_key}")
+        merged_records.append(merged)
+
+    logging.info(
+        f"🔗 Resolved {len(records)} records into {len(merged_records)} programs at "
+        f"{len(canonical_university)} universities ({stats.get('comparisons', 0)} comparisons "
+        f"instead of {stats.get('all_pairs', 0)} all-pairs)"
+    )
+    return merged_records
+
+
+if __name__ == "__main__":
+    from record_stream import RecordWriter, iter_records
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Merge the same programs and universities across sources")
+    parser.add_argument("input", help="scraped records: a JSONL stream (e.g. crawl_results_*.jsonl) or a scraper's JSON list")
+    parser.add_argument("output", help="JSONL stream of merged records")
+    parser.add_argument("--threshold", type=float, default=0.85, help="university name similarity threshold")
+    args = parser.parse_args()
+
+    # Every merged record has its own program_id, so dedup on that rather than the URL
+    with RecordWriter(args.output, key_field="program_id") as writer:
+        writer.write_all(resolve_entities(iter_records(args.input), university_threshold=args.threshold))
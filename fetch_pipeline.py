@@ -0,0 +1,100 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+import logging
+import time
+
+
+def _timed(fn, arg):
+    started = time.perf_counter()
+    return fn(arg), time.perf_counter() - started
+
+
+class FetchPipeline:
+    """Overlap page fetching with off-thread parsing, yielding parsed pages in input order.
+
+    fetch(item) -> html or None runs on fetch_workers threads while parse(html)
+    runs on a separate thread (or process) pool. At most fetch_workers +
+    queue_size pages are in flight, so a slow parser holds back navigation
+    instead of letting HTML pile up. With use_processes=True, parse must be
+    a picklable module-level function.
+    """
+
+    def __init__(self, fetch, parse, fetch_workers=2, parse_workers=2, queue_size=4, use_processes=False):
+        self.fetch = fetch
+        self.parse = parse
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers
+        self.queue_size = queue_size
+        self.use_processes = use_processes
+        self.timings = {}
+
+    def _start(self, item, fetch_pool, parse_pool):
+        result = Future()
+
+        def parsed(parse_future, fetch_s):
+            try:
+                value, parse_s = parse_future.result()
+            except Exception as e:
+                logging.warning(f"Failed to parse {item}: {e}")
+                value, parse_s = None, 0.0
+            result.set_result((value, fetch_s, parse_s))
+
+        def fetched(fetch_future):
+            if fetch_future.cancelled():
+                result.set_result((None, 0.0, 0.0))
+                return
+            try:
+                html, fetch_s = fetch_future.result()
+            except Exception as e:
+                logging.warning(f"Failed to fetch {item}: {e}")
+                html, fetch_s = None, 0.0
+            if html is None:
+                result.set_result((None, fetch_s, 0.0))
+                return
+            parse_future = parse_pool.submit(_timed, self.parse, html)
+            parse_future.add_done_callback(lambda future: parsed(future, fetch_s))
+
+        fetch_future = fetch_pool.submit(_timed, self.fetch, item)
+        fetch_future.add_done_callback(fetched)
+        return result, fetch_future
+
+    def run(self, items):
+        """Yield parse(html) for each item in order (None when fetching or parsing failed)"""
+        items = list(items)
+        self.timings = {"pages": 0, "fetch_s": 0.0, "parse_s": 0.0, "idle_s": 0.0, "wall_s": 0.0}
+        if not items:
+            return
+
+        window = self.fetch_workers + self.queue_size
+        parse_executor = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+        started = time.perf_counter()
+        # The fetch pool shuts down first so late fetches can still hand off to parsing
+        with parse_executor(max_workers=self.parse_workers) as parse_pool, \
+                ThreadPoolExecutor(max_workers=self.fetch_workers) as fetch_pool:
+            pending = deque()
+            next_item = 0
+            try:
+                while next_item < len(items) or pending:
+                    while next_item < len(items) and len(pending) < window:
+                        pending.append(self._start(items[next_item], fetch_pool, parse_pool))
+                        next_item += 1
+
+                    waiting = time.perf_counter()
+                    value, fetch_s, parse_s = pending.popleft()[0].result()
+                    self.timings["idle_s"] += time.perf_counter() - waiting
+                    self.timings["pages"] += 1
+                    self.timings["fetch_s"] += fetch_s
+                    self.timings["parse_s"] += parse_s
+                    yield value
+            finally:
+                # If the consumer stops early, queued fetches are cancelled; only those already
+                # running are waited for when the pools shut down
+                cancelled = sum(fetch_future.cancel() for _, fetch_future in pending)
+                if cancelled:
+                    logging.info(f"Stopped early, cancelled {cancelled} queued page fetches")
+                self.timings["wall_s"] = time.perf_counter() - started
+                t = self.timings
+                logging.info(
+                    f"⏱️ Pipeline: {t['pages']} pages in {t['wall_s']:.1f}s "
+                    f"(fetch {t['fetch_s']:.1f}s, parse {t['parse_s']:.1f}s, waiting on results {t['idle_s']:.1f}s)"
+                )
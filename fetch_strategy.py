@@ -0,0 +1,184 @@
+import requests
+from requests.adapters import HTTPAdapter
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from urllib.parse import urlparse, urlsplit
+import json
+import logging
+import os
+import threading
+import time
+
+from driver_pool import DEFAULT_USER_AGENT
+from parsing import make_soup
+from rate_limiter import get_shared_limiter, is_challenge_page, parse_retry_after
+
+FETCH_PATHS_FILE = "fetch_paths.json"
+
+_session = None
+_session_lock = threading.Lock()
+_state_lock = threading.Lock()
+
+
+def get_session(pool_maxsize=16):
+    """Return the process-wide keep-alive session with a pooled adapter"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=pool_maxsize, max_retries=1)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update({
+                "User-Agent": DEFAULT_USER_AGENT,
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                "Accept-Language": "en-US,en;q=0.9",
+            })
+            _session = session
+        return _session
+
+
+class FetchStrategy:
+    """Fetch pages over plain HTTP first and escalate to the browser only when cards are missing"""
+
+    def __init__(self, card_selector, session=None, state_file=FETCH_PATHS_FILE,
+                 timeout=15, limiter=None, reprobe_days=7, cache=None):
+        self.card_selector = card_selector
+        self.cache = cache
+        self.session = session or get_session()
+        self.state_file = state_file
+        self.timeout = timeout
+        # Per-domain politeness shared with every other fetcher in the process
+        self.limiter = limiter or get_shared_limiter()
+        self.reprobe_after = timedelta(days=reprobe_days)
+        self.paths = self._load_paths()
+
+    def _load_paths(self):
+        if not self.state_file or not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not read {self.state_file}: {e}")
+            return {}
+
+    def _record_path(self, site, path):
+        """Remember the path that worked for a site and count pages fetched over each path"""
+        with _state_lock:
+            previous = self.paths.get(site, {}).get("path")
+            # Merge with what other scrapers may have written meanwhile
+            state = self._load_paths() if self.state_file else self.paths
+            counts = dict(state.get(site, {}).get("counts", {}))
+            counts[path] = counts.get(path, 0) + 1
+            self.paths[site] = {"path": path, "updated_at": datetime.now().isoformat(), "counts": counts}
+            if not self.state_file:
+                return
+            state[site] = self.paths[site]
+            tmp_file = f"{self.state_file}.tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(state, f, indent=2)
+            os.replace(tmp_file, self.state_file)
+        if previous != path:
+            logging.info(f"🛣️ {site}: using {path} fetch path")
+
+    def preferred_path(self, site):
+        """Return the path that last worked for a site, or None if it should be probed"""
+        entry = self.paths.get(site)
+        if not entry:
+            return None
+        if entry["path"] == "browser":
+            updated_at = datetime.fromisoformat(entry["updated_at"])
+            if datetime.now() - updated_at > self.reprobe_after:
+                return None
+        return entry["path"]
+
+    def has_cards(self, html):
+        soup = make_soup(html)
+        return soup.select_one(self.card_selector) is not None
+
+    def fetch_http(self, url):
+        """Plain GET; returns the HTML only if it already carries the expected cards"""
+        self.limiter.acquire(url)
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            logging.debug(f"HTTP fetch failed for {url}: {e}")
+            self.limiter.report(url, error=True)
+            return None
+        self.limiter.report(url, status=response.status_code, elapsed=response.elapsed.total_seconds(),
+                            html=response.text, retry_after=parse_retry_after(response.headers.get("Retry-After")))
+        if response.status_code != 200:
+            logging.debug(f"HTTP {response.status_code} for {url}")
+            return None
+        if not self.has_cards(response.text):
+            logging.debug(f"No '{self.card_selector}' cards in HTTP response for {url}")
+            return None
+        return response.text
+
+    def fetch(self, url, browser_fetch):
+        """Fetch one page, calling browser_fetch(url) only if plain HTTP is not enough"""
+        site = urlparse(url).netloc
+        if self.cache:
+            html = self.cache.get(url)
+            if html is not None:
+                logging.info(f"Scraping (cached): {url}")
+                return html
+            if self.cache.replay:
+                logging.warning(f"Not cached, skipped in replay mode: {url}")
+                return None
+
+        logging.info(f"Scraping: {url}")
+        # A fragment never reaches the server: for hash-routed pages (hotcourses' #search&...pageNo=N)
+        # plain HTTP returns page 1 every time, so only the browser can fetch them and they say
+        # nothing about which path suits the site
+        probe = not urlsplit(url).fragment
+        if probe and self.preferred_path(site) != "browser":
+            html = self.fetch_http(url)
+            if html:
+                self._record_path(site, "http")
+                if self.cache:
+                    self.cache.put(url, html, status=200, fetch_path="http")
+                return html
+
+        html = self.fetch_browser(url, browser_fetch)
+        if html:
+            if probe:
+                self._record_path(site, "browser")
+            if self.cache:
+                self.cache.put(url, html, fetch_path="browser")
+        return html
+
+    def fetch_browser(self, url, browser_fetch):
+        """Rate-limited browser_fetch(url); challenge pages count as throttling and are discarded"""
+        self.limiter.acquire(url)
+        started = time.perf_counter()
+        html = browser_fetch(url)
+        self.limiter.report(url, elapsed=time.perf_counter() - started, html=html, error=html is None)
+        return None if is_challenge_page(html) else html
+
+    def iter_fetch(self, urls, browser_fetch, workers=4):
+        """Yield HTML in input order while keeping up to workers fetches in flight.
+
+        Stopping the iteration early cancels pages that have not started yet.
+        """
+        urls = list(urls)
+        if not urls:
+            return
+        with ThreadPoolExecutor(max_workers=min(workers, len(urls))) as executor:
+            pending = deque()
+            next_url = 0
+            try:
+                while next_url < len(urls) or pending:
+                    while next_url < len(urls) and len(pending) < workers:
+                        pending.append(executor.submit(self.fetch, urls[next_url], browser_fetch))
+                        next_url += 1
+                    yield pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def fetch_all(self, urls, browser_fetch, workers=4):
+        """Fetch several pages concurrently, returning HTML in input order"""
+        return list(self.iter_fetch(urls, browser_fetch, workers))
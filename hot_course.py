@@ -1,32 +1,49 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
-import json, logging, time
+import argparse, json, logging, time
 from datetime import datetime
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
+from debug_sink import MODES, ON_ERROR, get_shared_sink
+from driver_pool import DriverPool
+from fetch_pipeline import FetchPipeline
+from fetch_strategy import FetchStrategy
+from page_cache import PageCache
+from page_readiness import wait_until_ready
+from parsing import card_strainer, make_soup
+from record_stream import RecordWriter
+from seen_index import SeenIndex
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
 
 logging.basicConfig(level=logging.INFO)
 
+# Parse only the card containers
+CARD_STRAINER = card_strainer(classes=("searchResults__cardWrapper",))
+
+CARD_SELECTOR = ".searchResults__cardWrapper"
+
+# Identity of the rendered result list: its first few course links plus the card count
+RESULT_SIGNATURE_JS = """
+const cards = Array.from(document.querySelectorAll(arguments[0]));
+if (!cards.length) return '';
+return cards.slice(0, 3).map(card => {
+    const link = card.querySelector('a[href]');
+    return link ? link.getAttribute('href') : card.textContent.trim().slice(0, 80);
+}).join('|') + '#' + cards.length;
+"""
+
 class HotcoursesScraper:
-    def __init__(self, headless=True):
-        chrome_options = Options()
-        if headless:
-            chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--disable-extensions")
-        chrome_options.add_argument("--disable-infobars")
-        chrome_options.add_argument("--remote-debugging-port=9222")
-        chrome_options.add_argument("--user-agent=Mozilla/5.0")
-        self.driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+    def __init__(self, headless=True, pool=None, workers=2, lean=False, cache=None, seen=None, writer=None):
+        # Borrow drivers from a shared pool, or own one sized for parallel pages
+        self.owns_pool = pool is None
+        self.pool = pool or DriverPool(size=workers, headless=headless, user_agent="Mozilla/5.0", lean=lean)
+        # Listing pages are tried over plain HTTP before falling back to Chrome
+        self.fetcher = FetchStrategy(CARD_SELECTOR, cache=cache)
+        # Optional SeenIndex: skip known programs and stop at fully known pages
+        self.seen = seen
+        self.debug = get_shared_sink()
+        # Optional RecordWriter: records are streamed to disk instead of kept in memory
+        self.writer = writer
         self.programs = []
+
     def append_page_param(self, url, page_num):
         parsed = urlparse(url)
         # Get existing fragment query string (after #search&)
@@ -43,38 +60,141 @@ class HotcoursesScraper:
             # fallback: just append pageNo as query param
             return f"{url}&pageNo={page_num}"
 
-    def run(self, base_url, max_pages=2):
-        for page in range(1, max_pages + 1):
-            url = self.append_page_param(base_url, page)
-            logging.info(f"Scraping: {url}")
-            try:
-                self.driver.get(url)
-                time.sleep(2)  # allow some JS to render
+    def page_number(self, url):
+        fragment = urlparse(url).fragment
+        query = parse_qs(fragment.split('search&')[-1]) if 'search&' in fragment else parse_qs(urlparse(url).query)
+        return query.get('pageNo', ['1'])[0]
 
-                # Save screenshot before anything else
-                screenshot_path = f"screenshot_page_{page}.png"
-                self.driver.save_screenshot(screenshot_path)
-                logging.info(f"Saved screenshot: {screenshot_path}")
+    def fetch_page(self, url, driver=None):
+        if driver is None:
+            with self.pool.driver() as driver:
+                return self.fetch_page(url, driver)
+        page = self.page_number(url)
+        try:
+            driver.get(url)
+            wait_until_ready(driver, CARD_SELECTOR, timeout=10)
+            page_source = driver.page_source
+            self.debug.capture_driver(driver, f"hotcourses_page_{page}", page_source=page_source)
+            return page_source
 
-                WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.CLASS_NAME, "searchResults__cardWrapper"))
-                )
+        except Exception as e:
+            logging.warning(f"Failed to scrape page {page}: {e}")
+            self.debug.capture_driver(driver, f"hotcourses_page_{page}", error=True)
+            return None
 
-                soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-                self.parse_page(soup)
+    def run(self, base_url, max_pages=2, in_page=True):
+        urls = [self.append_page_param(base_url, page) for page in range(1, max_pages + 1)]
+        # Hash-paginated searches are paged inside one loaded SPA; the server
+        # never sees the fragment, so plain HTTP could not page them anyway
+        replay = self.fetcher.cache and self.fetcher.cache.replay
+        if in_page and urlparse(base_url).fragment and not replay:
+            self.run_in_page(urls)
+            return
 
-            except Exception as e:
-                logging.warning(f"Failed to scrape page {page}: {e}")
-                error_screenshot_path = f"error_page_{page}.png"
-                try:
-                    self.driver.save_screenshot(error_screenshot_path)
-                    logging.info(f"Saved error screenshot: {error_screenshot_path}")
-                except Exception as screenshot_error:
-                    logging.warning(f"Could not save error screenshot: {screenshot_error}")
+        # Pages are fetched in parallel (HTTP first, pooled drivers as fallback;
+        # FetchStrategy goes straight to a driver when the page number sits in
+        # the fragment) and parsed off-thread, but handled in page order
+        pipeline = FetchPipeline(
+            fetch=lambda url: self.fetcher.fetch(url, self.fetch_page),
+            parse=self.parse_html,
+            fetch_workers=self.pool.size,
+        )
+        self.collect(pipeline.run(urls))
+
+    def run_in_page(self, urls):
+        """Load the search once, then page through it by changing location.hash on the same driver"""
+        with self.pool.driver() as driver:
+            state = {"loaded": False, "stalled": False}
+            pipeline = FetchPipeline(
+                fetch=lambda url: self.fetch_in_page(url, driver, state),
+                parse=self.parse_html,
+                fetch_workers=1,
+            )
+            self.collect(pipeline.run(urls))
+
+    def collect(self, page_results):
+        for page, page_programs in enumerate(page_results, start=1):
+            if page_programs is None:
                 continue
 
+            if self.seen:
+                fresh_programs = self.seen.filter_page(page_programs)
+                self.keep(fresh_programs)
+                if page_programs and not fresh_programs:
+                    logging.info(f"Only known programs on page {page}, stopping")
+                    self.seen.keep_listed(page_programs)
+                    break
+            else:
+                self.keep(page_programs)
+
+    def keep(self, records):
+        """Stream records to the writer if there is one, otherwise collect them in memory"""
+        if self.writer:
+            self.writer.write_all(records)
+        else:
+            self.programs.extend(records)
+
+    def fetch_in_page(self, url, driver, state):
+        """Fetch one page on a driver that may already show the search, falling back to a full load"""
+        cache = self.fetcher.cache
+        if cache:
+            html = cache.get(url)
+            if html is not None:
+                logging.info(f"Scraping (cached): {url}")
+                return html
+
+        logging.info(f"Scraping: {url}")
+        limiter = self.fetcher.limiter
+        limiter.acquire(url)
+        started = time.perf_counter()
+        html = None
+        if state["loaded"] and not state["stalled"]:
+            html = self.paginate_in_page(driver, url)
+            # One stall means the SPA is not following the hash; stop paying the timeout
+            state["stalled"] = html is None
+        if html is None:
+            html = self.fetch_page(url, driver)
+        # Several pages share this borrowed driver; account lean-mode savings per page
+        self.pool.record_page(driver)
+        state["loaded"] = html is not None
+        limiter.report(url, elapsed=time.perf_counter() - started, html=html, error=html is None)
+
+        if html and cache:
+            cache.put(url, html, fetch_path="browser")
+        return html
+
+    def paginate_in_page(self, driver, url, timeout=10):
+        """Switch the loaded search to url's page via its hash; None if the result list never changes"""
+        page = self.page_number(url)
+        try:
+            before = driver.execute_script(RESULT_SIGNATURE_JS, CARD_SELECTOR)
+            driver.execute_script("window.location.hash = arguments[0];", urlparse(url).fragment)
+            # Wait only for the result list to be replaced, then for the new cards to settle
+            WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+                lambda d: d.execute_script(RESULT_SIGNATURE_JS, CARD_SELECTOR) not in ("", before)
+            )
+            wait_until_ready(driver, CARD_SELECTOR, timeout=timeout)
+        except TimeoutException:
+            logging.warning(f"In-page transition to page {page} stalled, falling back to a full load")
+            return None
+        except Exception as e:
+            logging.warning(f"In-page transition to page {page} failed ({e}), falling back to a full load")
+            return None
+
+        logging.info(f"⚡ Page {page} loaded in-page")
+        page_source = driver.page_source
+        self.debug.capture_driver(driver, f"hotcourses_page_{page}", page_source=page_source)
+        return page_source
+
+    def parse_html(self, html):
+        return self.extract_cards(make_soup(html, site="hotcourses", only=CARD_STRAINER))
+
     def extract(self, soup):
-        cards = soup.select(".searchResults__cardWrapper")
+        self.programs.extend(self.extract_cards(soup))
+
+    def extract_cards(self, soup):
+        programs = []
+        cards = soup.select(CARD_SELECTOR)
         for card in cards:
             try:
                 title = card.select_one(".course-title a")
@@ -83,7 +203,7 @@ class HotcoursesScraper:
                 fees = card.find(text="Fees") or card.find(text="Tuition fees")
                 duration = card.find(text="Duration")
                 
-                self.programs.append({
+                programs.append({
                     "title": title.text.strip() if title else "N/A",
                     "url": title["href"] if title and title.get("href") else "N/A",
                     "university": university.text.strip() if university else "N/A",
@@ -93,6 +213,7 @@ class HotcoursesScraper:
                 })
             except Exception as e:
                 logging.warning(f"Error parsing a card: {e}")
+        return programs
 
     def save(self):
         file_name = f"hotcourses_programs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
@@ -101,13 +222,30 @@ class HotcoursesScraper:
         logging.info(f"✅ Saved {len(self.programs)} programs to {file_name}")
 
     def close(self):
-        self.driver.quit()
+        if self.owns_pool:
+            self.pool.close()
 
 
 # === Run Example ===
 if __name__ == "__main__":
-    scraper = HotcoursesScraper(headless=True)
+    parser = argparse.ArgumentParser(description="Scrape hotcoursesabroad search results")
+    parser.add_argument("--replay", action="store_true", help="run entirely from the page cache")
+    parser.add_argument("--full", action="store_true", help="ignore the seen index and crawl every page")
+    parser.add_argument("--full-reload", action="store_true", help="navigate to every page instead of paging in-page")
+    parser.add_argument("--debug-artifacts", choices=MODES, default=ON_ERROR,
+                        help="when to keep screenshots and page sources (sampled keeps 1 in 20 pages)")
+    args = parser.parse_args()
+
+    debug = get_shared_sink(mode=args.debug_artifacts)
+    cache = PageCache(replay=args.replay)
+    seen = None if args.full or args.replay else SeenIndex()
+    writer = RecordWriter(f"hotcourses_programs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl", complete=seen is None)
+    scraper = HotcoursesScraper(headless=True, cache=cache, seen=seen, writer=writer)
     base_url = "https://www.hotcoursesabroad.com/study/training-degrees/international/postgraduate/computer-and-mathematical-science-courses/slevel/3/cgory/e-2/sin/ct/programs.html#search&catCode=E-2&countryId=211&parentQualId=3&nationCode=59&nationCntryCode=59&studyAbroad=Y&studyOnline=N&studyCross=N&studyDomestic=N&studyPartTime=N&startOnlineCampusLater=N&manStdyAbrdFlg=Y&parentCatEngName=Computer%20and%20Mathematical%20Science&fastlane=N"
-    scraper.run(base_url, max_pages=2)
-    scraper.save()
+    with writer:
+        scraper.run(base_url, max_pages=2, in_page=not args.full_reload)
     scraper.close()
+    cache.close()
+    debug.close()
+    if seen:
+        seen.save()
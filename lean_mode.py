@@ -0,0 +1,117 @@
+import json
+import logging
+
+# Resource types we never need since only page_source text is parsed
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3", "*.ogg", "*.m3u8",
+]
+
+# Analytics, ads and tracking hosts
+DEFAULT_BLOCKLIST = [
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googlesyndication.com",
+    "doubleclick.net",
+    "facebook.net",
+    "connect.facebook.net",
+    "hotjar.com",
+    "clarity.ms",
+    "segment.io",
+    "cdn.segment.com",
+    "fullstory.com",
+    "intercom.io",
+    "optimizely.com",
+    "newrelic.com",
+    "nr-data.net",
+    "criteo.com",
+    "taboola.com",
+    "adservice.google.com",
+    "bat.bing.com",
+    "linkedin.com/px",
+    "tiktok.com",
+]
+
+# Typical transfer sizes used to estimate what a blocked request would have cost
+ESTIMATED_BYTES_BY_TYPE = {
+    "Image": 45_000,
+    "Font": 35_000,
+    "Media": 400_000,
+    "Script": 60_000,
+    "Stylesheet": 20_000,
+    "XHR": 5_000,
+    "Fetch": 5_000,
+    "Other": 10_000,
+}
+
+# 2 = block for Chrome content settings
+LEAN_CONTENT_PREFS = {
+    "profile.managed_default_content_settings.images": 2,
+    "profile.managed_default_content_settings.media_stream": 2,
+    "profile.managed_default_content_settings.plugins": 2,
+    "profile.managed_default_content_settings.popups": 2,
+    "profile.managed_default_content_settings.geolocation": 2,
+    "profile.managed_default_content_settings.notifications": 2,
+}
+
+
+def apply_lean_options(chrome_options):
+    """Add content-settings prefs for lean mode"""
+    chrome_options.add_experimental_option("prefs", LEAN_CONTENT_PREFS)
+    chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+    chrome_options.add_argument("--autoplay-policy=user-gesture-required")
+    return chrome_options
+
+
+def enable_request_blocking(driver, blocklist=None):
+    """Block non-essential resource types and tracker domains through CDP"""
+    domains = DEFAULT_BLOCKLIST if blocklist is None else blocklist
+    patterns = BLOCKED_URL_PATTERNS + [f"*{domain}*" for domain in domains]
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    except Exception as e:
+        logging.warning(f"Could not enable request blocking: {e}")
+
+
+def summarize_network_log(entries):
+    """Summarize Chrome performance-log entries into transfer and savings figures"""
+    request_types = {}
+    stats = {
+        "requests": 0,
+        "bytes": 0,
+        "blocked_requests": 0,
+        "estimated_bytes_saved": 0,
+    }
+
+    for entry in entries:
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+        method = message.get("method")
+        params = message.get("params", {})
+
+        if method == "Network.requestWillBeSent":
+            request_types[params.get("requestId")] = params.get("type", "Other")
+        elif method == "Network.loadingFinished":
+            stats["requests"] += 1
+            stats["bytes"] += int(params.get("encodedDataLength", 0))
+        elif method == "Network.loadingFailed" and params.get("blockedReason"):
+            resource_type = params.get("type") or request_types.get(params.get("requestId"), "Other")
+            stats["blocked_requests"] += 1
+            stats["estimated_bytes_saved"] += ESTIMATED_BYTES_BY_TYPE.get(resource_type, ESTIMATED_BYTES_BY_TYPE["Other"])
+
+    return stats
+
+
+def collect_page_savings(entries):
+    """Summarize what lean mode saved over a page's performance-log entries.
+
+    Images stopped by content settings never reach the network, so the
+    savings figure is a lower bound.
+    """
+    if not entries:
+        return None
+    return summarize_network_log(entries)
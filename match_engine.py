@@ -0,0 +1,186 @@
+import logging
+
+import numpy as np
+
+# Same weights and constants as BachelorsDataProcessor.calculate_basic_match_scores
+WEIGHTS = {'academic_fit': 0.3, 'financial_fit': 0.25, 'location_fit': 0.25, 'language_fit': 0.2}
+SCORE_KEYS = ('academic_fit', 'financial_fit', 'location_fit', 'language_fit', 'overall_fit')
+LANGUAGE_TESTS = ('toefl', 'ielts', 'duolingo')
+
+# Upper bound on users x programs cells scored at once (~32 MB per float64 matrix)
+CHUNK_CELLS = 4_000_000
+
+
+class MatchEngine:
+    """calculate_basic_match_scores for many users against the whole catalogue at once.
+
+    Programs are encoded once as arrays (tuition, country code, language
+    minimums) and deduplicated to their distinct attribute rows; each batch
+    of users becomes arrays too, the four fit components are broadcast
+    users x rows matrices and are gathered out to users x programs. Scores
+    equal the scalar function's bit for bit. Profiles use the nested shape
+    that function reads (BachelorsDataProcessor.matching_profile).
+    """
+
+    def __init__(self, tuitions, countries, lang_reqs):
+        self.size = len(countries)
+        # Sorted distinct names, as np.unique would give, without sorting a million strings
+        self.country_names = np.array(sorted({str(country) for country in countries}), dtype=str)
+        self.country_index = {name: code for code, name in enumerate(self.country_names.tolist())}
+        country_codes = np.fromiter((self.country_index[str(country)] for country in countries), dtype=np.int64,
+                                    count=self.size)
+        # One row per program: everything the scores depend on (None or 0 tuition means "unknown")
+        attributes = np.column_stack([
+            np.array([t or 0 for t in tuitions], dtype=float),
+            country_codes,
+            [bool(r and r.get('english_required')) for r in lang_reqs],
+        ] + [[(r or {}).get(f'{test}_min') or 0 for r in lang_reqs] for test in LANGUAGE_TESTS]).astype(float)
+        # Scraped catalogues repeat the same attributes a lot; score each distinct row once
+        groups, self.group_codes = np.unique(attributes, axis=0, return_inverse=True)
+        self.group_codes = self.group_codes.reshape(-1)
+        self.tuition = groups[:, 0]
+        self.country_codes = groups[:, 1].astype(np.int64)
+        self.english = groups[:, 2].astype(bool)
+        self.minimums = {test: groups[:, 3 + i] for i, test in enumerate(LANGUAGE_TESTS)}
+        # Program indices grouped by attribute row, ascending within each group
+        self.group_members = np.argsort(self.group_codes, kind='stable')
+        self.group_sizes = np.bincount(self.group_codes, minlength=len(groups))
+        self.group_offsets = np.concatenate([[0], np.cumsum(self.group_sizes)])
+
+    @classmethod
+    def from_programs(cls, programs):
+        """Encode processed programs (process_program output)"""
+        return cls(
+            [p.get('tuition_eur') for p in programs],
+            [p.get('country') for p in programs],
+            [p.get('language_requirements') for p in programs],
+        )
+
+    def _encode_users(self, profiles):
+        budget = np.array([p['preferences']['budget_eur'] or 0 for p in profiles], dtype=float)
+        wanted = np.zeros((len(profiles), len(self.country_names)), dtype=bool)
+        for row, profile in enumerate(profiles):
+            for country in profile['preferences']['countries']:
+                if country in self.country_index:
+                    wanted[row, self.country_index[country]] = True
+        test_scores = {
+            test: np.array([p['academic']['test_scores'].get(test) or 0 for p in profiles], dtype=float)
+            for test in LANGUAGE_TESTS
+        }
+        return budget, wanted, test_scores
+
+    def _score_groups(self, profiles):
+        """Score components of profiles against each distinct program attribute row"""
+        budget, wanted, test_scores = self._encode_users(profiles)
+        tuition = self.tuition[None, :]
+        budget = budget[:, None]
+
+        # Financial fit: 1.0 within budget, linear penalty above it, 0.5 if either side is unknown
+        with np.errstate(divide='ignore', invalid='ignore'):
+            over_budget = np.maximum(0, 1 - (tuition / budget - 1) * 0.5)
+        financial = np.where(tuition <= budget, 1.0, over_budget)
+        financial = np.where((tuition == 0) | (budget == 0), 0.5, financial)
+
+        location = np.where(wanted[:, self.country_codes], 1.0, 0.3)
+
+        checked = np.zeros(financial.shape, dtype=bool)
+        passed = np.zeros(financial.shape, dtype=bool)
+        for test in LANGUAGE_TESTS:
+            minimum = self.minimums[test][None, :]
+            user = test_scores[test][:, None]
+            applies = (minimum > 0) & (user != 0)
+            checked |= applies
+            passed |= applies & (user >= minimum)
+        language = np.where(checked, np.where(passed, 1.0, 0.2), 0.5)
+        language = np.where(self.english[None, :], language, 1.0)
+
+        academic = np.full(financial.shape, 0.5)
+        overall = (academic * WEIGHTS['academic_fit'] + financial * WEIGHTS['financial_fit']
+                   + location * WEIGHTS['location_fit'] + language * WEIGHTS['language_fit'])
+        return {'academic_fit': academic, 'financial_fit': financial, 'location_fit': location,
+                'language_fit': language, 'overall_fit': overall}
+
+    def score(self, profiles, programs=slice(None), keys=SCORE_KEYS):
+        """{component: users x programs matrix} for profiles against programs (a slice or index array)"""
+        codes = self.group_codes[programs]
+        groups = self._score_groups(profiles)
+        return {key: groups[key][:, codes] for key in keys}
+
+    def _members(self, groups, limit=None):
+        """Program indices of the given groups, each group cut to its first limit members"""
+        parts = []
+        for group in groups.tolist():
+            start, end = self.group_offsets[group], self.group_offsets[group + 1]
+            parts.append(self.group_members[start:end if limit is None else min(end, start + limit)])
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+    def top_k(self, profiles, k=50, chunk_cells=CHUNK_CELLS):
+        """Best k programs per user as (indices, overall_fit) arrays of shape users x k.
+
+        Selection runs on the distinct attribute rows rather than sorting the
+        whole catalogue: argpartition finds the best k rows, whole rows are
+        taken while they fit in k, and rows tied with the k-th best score
+        are cut by program position. Each result equals the first k of a stable descending sort
+        of all programs (what process_all_data produces for one user).
+        """
+        k = min(k, self.size)
+        indices = np.zeros((len(profiles), k), dtype=np.int64)
+        scores = np.zeros((len(profiles), k))
+        if k == 0:
+            return indices, scores
+        # Every row has at least one program, so the best k rows always hold the best k programs
+        top_rows = min(k, len(self.group_sizes))
+        rows_per_chunk = max(1, chunk_cells // max(1, len(self.group_sizes)))
+        for start in range(0, len(profiles), rows_per_chunk):
+            overall = self._score_groups(profiles[start:start + rows_per_chunk])['overall_fit']
+            candidates = np.argpartition(-overall, top_rows - 1, axis=1)[:, :top_rows]
+            for offset, row in enumerate(overall):
+                ranked = candidates[offset][np.argsort(-row[candidates[offset]])]
+                cut = np.searchsorted(np.cumsum(self.group_sizes[ranked]), k)
+                kth = row[ranked[cut]]
+                above = self._members(np.flatnonzero(row > kth))
+                need = k - len(above)
+                tied = np.flatnonzero(row == kth)
+                if len(tied) <= need:
+                    ties = np.sort(self._members(tied, limit=need))[:need]
+                else:
+                    # Many tied rows (e.g. everything within budget): one pass over the programs is cheaper
+                    ties = np.flatnonzero(row[self.group_codes] == kth)[:need]
+                chosen = np.concatenate([above, ties])
+                # Descending score, then ascending position
+                chosen = chosen[np.lexsort((chosen, -row[self.group_codes[chosen]]))]
+                indices[start + offset] = chosen
+                scores[start + offset] = row[self.group_codes[chosen]]
+        return indices, scores
+
+    def rank(self, profile, candidates, k=50):
+        """Best k of the given program indices (ascending) for one profile, as (indices, overall_fit) arrays.
+
+        Same order as a stable descending sort of the candidates: ties keep
+        catalogue position.
+        """
+        candidates = np.asarray(candidates, dtype=np.int64)
+        overall = self._score_groups([profile])['overall_fit'][0][self.group_codes[candidates]]
+        k = max(0, min(k, len(candidates)))
+        if k < len(candidates):
+            # k-th best score; everything above it is in, ties are cut by position
+            kth = np.partition(overall, len(overall) - k)[len(overall) - k]
+            above = np.flatnonzero(overall > kth)
+            ties = np.flatnonzero(overall == kth)[:k - len(above)]
+            keep = np.concatenate([above, ties])
+        else:
+            keep = np.arange(len(candidates))
+        keep = keep[np.lexsort((keep, -overall[keep]))]
+        return candidates[keep], overall[keep]
+
+    def scores_for(self, profile, indices):
+        """matching_scores dicts for one profile and the given program indices"""
+        columns = self.score([profile], np.asarray(indices, dtype=np.int64))
+        rows = zip(*(columns[key][0].tolist() for key in SCORE_KEYS))
+        return [dict(zip(SCORE_KEYS, row)) for row in rows]
+
+
+def log_throughput(users, programs, seconds, label="batch"):
+    pairs = users * programs / seconds if seconds else float('inf')
+    logging.info(f"⚡ {label}: {users} users x {programs} programs in {seconds:.2f}s ({pairs:,.0f} pairs/s)")
+    return pairs
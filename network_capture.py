@@ -0,0 +1,92 @@
+import base64
+import json
+import logging
+
+# Headers the browser sets itself and refuses (or ignores) from fetch()
+SKIPPED_REPLAY_HEADERS = {
+    "cookie", "host", "user-agent", "referer", "origin", "content-length",
+    "accept-encoding", "connection",
+}
+
+REPLAY_FETCH_JS = """
+const [url, method, headers, body, done] = arguments;
+fetch(url, {method: method, headers: headers, body: body || undefined, credentials: 'include'})
+    .then(r => r.text().then(text => done({status: r.status, text: text})))
+    .catch(e => done({status: 0, text: String(e)}));
+"""
+
+
+def parse_log_messages(entries):
+    """Yield the CDP messages carried by Chrome performance-log entries"""
+    for entry in entries:
+        try:
+            yield json.loads(entry["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+
+
+def find_json_exchanges(entries, url_pattern):
+    """Return finished JSON request/response pairs whose URL matches url_pattern"""
+    requests = {}
+    responses = {}
+    finished = set()
+
+    for message in parse_log_messages(entries):
+        method = message.get("method")
+        params = message.get("params", {})
+        request_id = params.get("requestId")
+
+        if method == "Network.requestWillBeSent":
+            request = params["request"]
+            requests[request_id] = {
+                "url": request["url"],
+                "method": request.get("method", "GET"),
+                "headers": request.get("headers", {}),
+                "post_data": request.get("postData"),
+            }
+        elif method == "Network.responseReceived":
+            response = params["response"]
+            if "json" in response.get("mimeType", "") and url_pattern.search(response["url"]):
+                responses[request_id] = response.get("status")
+        elif method == "Network.loadingFinished":
+            finished.add(request_id)
+
+    return [
+        dict(requests[request_id], request_id=request_id, status=status)
+        for request_id, status in responses.items()
+        if request_id in finished and request_id in requests
+    ]
+
+
+def get_response_json(driver, request_id):
+    """Fetch a captured response body through CDP and decode it as JSON"""
+    try:
+        result = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+    except Exception as e:
+        logging.debug(f"Response body unavailable for {request_id}: {e}")
+        return None
+    body = result.get("body", "")
+    if result.get("base64Encoded"):
+        body = base64.b64decode(body).decode("utf-8", errors="replace")
+    try:
+        return json.loads(body)
+    except ValueError:
+        return None
+
+
+def replay_request(driver, url, method="GET", headers=None, body=None):
+    """Re-issue an API request from inside the page so cookies and auth carry over"""
+    headers = {
+        name: value for name, value in (headers or {}).items()
+        if not name.startswith(":") and not name.lower().startswith("sec-")
+        and name.lower() not in SKIPPED_REPLAY_HEADERS
+    }
+    result = driver.execute_async_script(REPLAY_FETCH_JS, url, method, headers, body)
+    if result["status"] != 200:
+        logging.warning(f"API replay returned {result['status']} for {url}")
+        return None
+    try:
+        return json.loads(result["text"])
+    except ValueError:
+        logging.warning(f"API replay did not return JSON for {url}")
+        return None
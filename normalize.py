@@ -0,0 +1,227 @@
+from datetime import date
+from functools import lru_cache
+import json
+import logging
+import os
+import re
+
+# Raw strings repeat across thousands of cards, so every parser below is memoized on the raw text
+MEMO_SIZE = 50_000
+
+TUITION_NUMBER = re.compile(r'([\d,]+)')
+DURATION_YEARS = re.compile(r'(\d+)\s*year')
+DURATION_MONTHS = re.compile(r'(\d+)\s*month')
+TOEFL_SCORE = re.compile(r'toefl.*?(\d+)')
+IELTS_SCORE = re.compile(r'ielts.*?([\d.]+)')
+DUOLINGO_SCORE = re.compile(r'duolingo.*?(\d+)')
+CITY_REGION = re.compile(r'[A-Za-z\s]+,\s*(USA|[A-Z]{2})')
+NEW_TAB_MARKER = "(Opens in new tab)"
+
+# EUR per unit of each currency, by the date a table took effect; CURRENCY_RATES_FILE adds or overrides versions
+CURRENCY_TABLES = {
+    "2024-01-01": {"EUR": 1.0, "USD": 0.85, "GBP": 1.15, "CAD": 0.68, "AUD": 0.61},
+}
+
+# Symbols checked after ISO codes, most specific first ("C$" before "$")
+CURRENCY_SYMBOLS = (("CA$", "CAD"), ("C$", "CAD"), ("AU$", "AUD"), ("A$", "AUD"), ("$", "USD"), ("£", "GBP"), ("€", "EUR"))
+
+COUNTRY_ALIASES = {
+    "USA": "United States", "US": "United States", "United States of America": "United States",
+    "UK": "United Kingdom", "England": "United Kingdom", "Scotland": "United Kingdom", "Wales": "United Kingdom",
+    "Deutschland": "Germany", "The Netherlands": "Netherlands", "Holland": "Netherlands",
+}
+COUNTRIES = {
+    "Australia", "Austria", "Belgium", "Canada", "China", "Czech Republic", "Denmark", "Finland", "France",
+    "Germany", "Hungary", "Ireland", "Italy", "Japan", "Malaysia", "Netherlands", "New Zealand", "Norway",
+    "Poland", "Portugal", "Singapore", "South Korea", "Spain", "Sweden", "Switzerland", "Turkey",
+    "United Arab Emirates", "United Kingdom", "United States",
+}
+
+
+def load_currency_tables(source):
+    """Merge dated rate tables ({"YYYY-MM-DD": {"USD": 0.92, ...}}) into CURRENCY_TABLES.
+
+    source is a JSON file path, or the JSON itself when it starts with "{".
+    """
+    inline = source.lstrip().startswith("{")
+    if inline:
+        tables = json.loads(source)
+    else:
+        with open(source, "r", encoding="utf-8") as f:
+            tables = json.load(f)
+    for effective, rates in sorted(tables.items()):
+        date.fromisoformat(effective)
+        # A version only lists the rates that changed; the rest carry over from the one before it
+        earlier = [version for version in CURRENCY_TABLES if version < effective]
+        base = CURRENCY_TABLES[max(earlier)] if earlier else {}
+        CURRENCY_TABLES[effective] = dict(base, **{code.upper(): float(rate) for code, rate in rates.items()})
+        # Memoized conversions are keyed on the version date, so changed tables must not reuse them
+        for function in (_version_on, _currency_codes, _tuition_eur):
+            function.cache_clear()
+    logging.info(f"💱 Loaded {len(tables)} currency table(s) from {'the command line' if inline else source}")
+
+
+@lru_cache(maxsize=64)
+def _version_on(as_of):
+    versions = sorted(effective for effective in CURRENCY_TABLES if effective <= as_of)
+    return versions[-1] if versions else min(CURRENCY_TABLES)
+
+
+def currency_version(as_of=None):
+    """Effective date of the rate table in force on as_of (a date or ISO string, default today)"""
+    return _version_on(str(as_of or date.today())[:10])
+
+
+@lru_cache(maxsize=64)
+def _currency_codes(version):
+    codes = "|".join(re.escape(code) for code in CURRENCY_TABLES[version])
+    return re.compile(f"(?<![A-Z])({codes})(?![A-Z])")
+
+
+def detect_currency(text, version=None):
+    """First ISO code named in the text, else the currency of its symbol, else None (treated as EUR)"""
+    version = version or currency_version()
+    code = _currency_codes(version).search(text)
+    if code:
+        return code.group(1)
+    rates = CURRENCY_TABLES[version]
+    for symbol, code in CURRENCY_SYMBOLS:
+        if symbol in text and code in rates:
+            return code
+    return None
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _tuition_eur(text, version):
+    numbers = TUITION_NUMBER.findall(text)
+    digits = numbers[0].replace(',', '') if numbers else ''
+    if not digits:
+        return None
+    amount = int(digits)
+    currency = detect_currency(text, version)
+    if currency and currency != "EUR":
+        amount = int(amount * CURRENCY_TABLES[version][currency])
+    return amount
+
+
+def tuition_eur(text, as_of=None):
+    """Yearly tuition in EUR from a raw fee string ("€1,500 / year", "$25,000 USD"), or None"""
+    if not text or text == 'N/A' or not isinstance(text, str):
+        return None
+    return _tuition_eur(text, currency_version(as_of))
+
+
+def duration_months(text):
+    """Duration in months from a raw string ("3 years", "18 Months"), or None"""
+    if not text or text == 'N/A' or not isinstance(text, str):
+        return None
+    return _duration_months(text)
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _duration_months(text):
+    lower = text.lower()
+    year_match = DURATION_YEARS.search(lower)
+    if year_match:
+        return int(year_match.group(1)) * 12
+    month_match = DURATION_MONTHS.search(lower)
+    if month_match:
+        return int(month_match.group(1))
+    return None
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _language_scores(text):
+    lower = text.lower()
+    toefl = TOEFL_SCORE.search(lower)
+    ielts = IELTS_SCORE.search(lower)
+    duolingo = DUOLINGO_SCORE.search(lower)
+    try:
+        ielts_min = float(ielts.group(1)) if ielts else None
+    except ValueError:
+        ielts_min = None
+    return ('english' in lower, int(toefl.group(1)) if toefl else None, ielts_min,
+            int(duolingo.group(1)) if duolingo else None)
+
+
+def language_requirements(requirements):
+    """English flag and TOEFL/IELTS/Duolingo minimums from requirement text or a list of lines"""
+    if isinstance(requirements, list):
+        text = ' '.join(requirements)
+    elif isinstance(requirements, str):
+        text = requirements
+    else:
+        text = ''
+    english, toefl, ielts, duolingo = _language_scores(text)
+    # A fresh dict each call: the memo holds immutable tuples only
+    return {
+        'english_required': english,
+        'toefl_min': toefl,
+        'ielts_min': ielts,
+        'duolingo_min': duolingo,
+        'other_languages': []
+    }
+
+
+def clean_text(text):
+    """Card text with the "(Opens in new tab)" link suffix and repeated whitespace removed"""
+    return " ".join(text.replace(NEW_TAB_MARKER, " ").split())
+
+
+def country_name(text):
+    """Canonical country for a name or common alias, or None if it is not a known country"""
+    text = text.strip()
+    text = COUNTRY_ALIASES.get(text, text)
+    return text if text in COUNTRIES else None
+
+
+def split_location(text):
+    """("Berlin", "Germany") from "Berlin, Germany"; the country is None when the last part is not one"""
+    if not text or text == 'N/A' or not isinstance(text, str):
+        return None, None
+    return _split_location(text)
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _split_location(text):
+    parts = [part.strip() for part in clean_text(text).split(",") if part.strip()]
+    if not parts:
+        return None, None
+    country = country_name(parts[-1])
+    if country and len(parts) > 1:
+        return ", ".join(parts[:-1]), country
+    if country:
+        return None, country
+    return ", ".join(parts), None
+
+
+MEMOIZED = {
+    "tuition": _tuition_eur,
+    "duration": _duration_months,
+    "language": _language_scores,
+    "location": _split_location,
+}
+
+
+def memo_stats():
+    """Hits, misses, hit rate and size of each memo"""
+    stats = {}
+    for name, function in MEMOIZED.items():
+        info = function.cache_info()
+        calls = info.hits + info.misses
+        stats[name] = {"hits": info.hits, "misses": info.misses, "size": info.currsize,
+                       "hit_rate": info.hits / calls if calls else 0.0}
+    return stats
+
+
+def log_memo_stats():
+    stats = memo_stats()
+    summary = ", ".join(f"{name} {s['hit_rate']:.0%} of {s['hits'] + s['misses']}"
+                        for name, s in stats.items() if s["hits"] + s["misses"])
+    if summary:
+        logging.info(f"🧮 Normalization memo hit rates: {summary}")
+    return stats
+
+
+if os.environ.get("CURRENCY_RATES_FILE"):
+    load_currency_tables(os.environ["CURRENCY_RATES_FILE"])
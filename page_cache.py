@@ -0,0 +1,156 @@
+from datetime import datetime
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+
+PAGE_CACHE_DIR = ".page_cache"
+
+DEFAULT_TTL = 24 * 3600
+
+# Per-site freshness in seconds; listing pages change slowly
+SITE_TTLS = {
+    "www.applyboard.com": 12 * 3600,
+    "www.bachelorsportal.com": 3 * 24 * 3600,
+    "www.educations.com": 3 * 24 * 3600,
+    "www.hotcoursesabroad.com": 3 * 24 * 3600,
+}
+
+TRACKING_PARAMS = ("utm_", "gclid", "fbclid")
+
+
+def normalize_url(url):
+    """Canonical form of a URL for cache keys: lowercase host, sorted query, no tracking params"""
+    parsed = urlparse(url.strip())
+    netloc = parsed.netloc.lower()
+    if parsed.scheme == "https" and netloc.endswith(":443"):
+        netloc = netloc[:-4]
+    elif parsed.scheme == "http" and netloc.endswith(":80"):
+        netloc = netloc[:-3]
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not key.startswith(TRACKING_PARAMS)
+    )
+    # The fragment is kept: hotcourses encodes its search in it
+    return urlunparse((parsed.scheme.lower(), netloc, parsed.path or "/", "", urlencode(query), parsed.fragment))
+
+
+class PageCache:
+    """On-disk cache of gzipped HTML keyed by normalized URL, with per-site TTLs and LRU eviction"""
+
+    def __init__(self, cache_dir=PAGE_CACHE_DIR, site_ttls=None, default_ttl=DEFAULT_TTL,
+                 max_bytes=500 * 1024 * 1024, replay=False):
+        self.cache_dir = cache_dir
+        self.site_ttls = dict(SITE_TTLS, **(site_ttls or {}))
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        # In replay mode entries never expire and misses never hit the network
+        self.replay = replay
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._index_file = os.path.join(cache_dir, "index.json")
+        os.makedirs(cache_dir, exist_ok=True)
+        self.index = self._load_index()
+
+    def _load_index(self):
+        if not os.path.exists(self._index_file):
+            return {}
+        try:
+            with open(self._index_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Page cache index unreadable, starting empty: {e}")
+            return {}
+
+    def _save_index(self):
+        tmp_file = f"{self._index_file}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(self.index, f)
+        os.replace(tmp_file, self._index_file)
+
+    def key(self, url):
+        return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.html.gz")
+
+    def ttl_for(self, url):
+        return self.site_ttls.get(urlparse(url).netloc.lower(), self.default_ttl)
+
+    def metadata(self, url):
+        return self.index.get(self.key(url))
+
+    def get(self, url):
+        """Return cached HTML for url, or None when missing or expired"""
+        key = self.key(url)
+        with self._lock:
+            entry = self.index.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            age = (datetime.now() - datetime.fromisoformat(entry["fetched_at"])).total_seconds()
+            if not self.replay and age > self.ttl_for(url):
+                self.misses += 1
+                return None
+            try:
+                with gzip.open(self._path(key), "rt", encoding="utf-8") as f:
+                    html = f.read()
+            except OSError:
+                del self.index[key]
+                self.misses += 1
+                return None
+            entry["last_access"] = datetime.now().isoformat()
+            self.hits += 1
+        logging.debug(f"📦 Cache hit ({age:.0f}s old): {url}")
+        return html
+
+    def put(self, url, html, status=None, fetch_path=None):
+        """Store HTML for url along with its fetch metadata"""
+        if self.replay or not html:
+            return
+        key = self.key(url)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+            f.write(html)
+        os.replace(tmp_path, path)
+
+        now = datetime.now().isoformat()
+        with self._lock:
+            self.index[key] = {
+                "url": normalize_url(url),
+                "fetched_at": now,
+                "last_access": now,
+                "status": status,
+                "fetch_path": fetch_path,
+                "size": os.path.getsize(path),
+            }
+            self._evict()
+            self._save_index()
+
+    def _evict(self):
+        total = sum(entry["size"] for entry in self.index.values())
+        if total <= self.max_bytes:
+            return
+        for key, entry in sorted(self.index.items(), key=lambda item: item[1]["last_access"]):
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            del self.index[key]
+            total -= entry["size"]
+            if total <= self.max_bytes:
+                break
+
+    def close(self):
+        with self._lock:
+            if not self.replay:
+                self._save_index()
+        if self.hits or self.misses:
+            logging.info(f"📦 Page cache: {self.hits} hits, {self.misses} misses")
@@ -0,0 +1,109 @@
+from selenium.common.exceptions import TimeoutException
+import logging
+import time
+
+# Counts in-flight fetch/XHR calls; injected before any page script runs
+NETWORK_TRACKER_JS = """
+(() => {
+    if (window.__pendingRequests !== undefined) return;
+    window.__pendingRequests = 0;
+    const inc = () => { window.__pendingRequests++; };
+    const dec = () => { window.__pendingRequests = Math.max(0, window.__pendingRequests - 1); };
+    const origFetch = window.fetch;
+    if (origFetch) {
+        window.fetch = function (...args) {
+            inc();
+            return origFetch.apply(this, args).finally(dec);
+        };
+    }
+    const origSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function (...args) {
+        inc();
+        this.addEventListener('loadend', dec, { once: true });
+        return origSend.apply(this, args);
+    };
+})();
+"""
+
+# Resolves once the document is complete, the card count has been stable for
+# N frames and the network has been quiet; reports when each condition held
+READINESS_JS = """
+const [selector, minCount, stableFrames, quietMs, timeoutMs, done] = arguments;
+const start = performance.now();
+const nextFrame = document.hidden ? (f) => setTimeout(f, 16) : requestAnimationFrame;
+const marks = {};
+let lastCount = -1, stable = 0, idleSince = null;
+
+function lastResourceEnd() {
+    let end = 0;
+    for (const entry of performance.getEntriesByType('resource')) {
+        end = Math.max(end, entry.responseEnd);
+    }
+    return end;
+}
+
+function tick() {
+    const now = performance.now();
+    const elapsed = now - start;
+    const count = document.querySelectorAll(selector).length;
+
+    const domReady = document.readyState === 'complete';
+    if (domReady && marks.dom_ms === undefined) marks.dom_ms = elapsed;
+
+    stable = (count >= minCount && count === lastCount) ? stable + 1 : 0;
+    lastCount = count;
+    const cardsStable = stable >= stableFrames;
+    if (cardsStable && marks.cards_ms === undefined) marks.cards_ms = elapsed;
+
+    let pending = null, networkIdle;
+    if (typeof window.__pendingRequests === 'number') {
+        pending = window.__pendingRequests;
+        if (pending === 0) { if (idleSince === null) idleSince = now; } else { idleSince = null; }
+        networkIdle = idleSince !== null && now - idleSince >= quietMs;
+    } else {
+        networkIdle = now - lastResourceEnd() >= quietMs;
+    }
+    if (networkIdle && marks.network_ms === undefined) marks.network_ms = elapsed;
+
+    const report = {elapsed_ms: elapsed, cards: count, pending: pending, network_idle: networkIdle, marks: marks};
+    if (domReady && cardsStable && networkIdle) return done(Object.assign(report, {ready: true}));
+    if (elapsed >= timeoutMs) {
+        // Long-polling trackers can keep the network busy forever; stable cards are enough
+        return done(Object.assign(report, {ready: domReady && cardsStable}));
+    }
+    nextFrame(tick);
+}
+nextFrame(tick);
+"""
+
+
+def install_network_tracker(driver):
+    """Register the in-flight request counter for every page this driver loads"""
+    try:
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": NETWORK_TRACKER_JS})
+    except Exception as e:
+        logging.debug(f"Network tracker unavailable, falling back to resource timing: {e}")
+
+
+def wait_until_ready(driver, selector, min_count=1, stable_frames=3, quiet_ms=300, timeout=15):
+    """Wait until cards matching selector have settled and return a timing report.
+
+    Raises TimeoutException if no stable cards appear within timeout seconds.
+    """
+    started = time.perf_counter()
+    driver.set_script_timeout(timeout + 5)
+    report = driver.execute_async_script(
+        READINESS_JS, selector, min_count, stable_frames, quiet_ms, int(timeout * 1000)
+    )
+    report["waited_s"] = round(time.perf_counter() - started, 3)
+
+    if not report.get("ready"):
+        raise TimeoutException(
+            f"Page not ready after {report['waited_s']}s: {report['cards']} '{selector}' cards"
+        )
+
+    logging.info(
+        f"⏱️ Ready in {report['waited_s']}s ({report['cards']} cards"
+        f"{'' if report['network_idle'] else ', network still busy'})"
+    )
+    return report
@@ -0,0 +1,161 @@
+from bs4 import BeautifulSoup, SoupStrainer
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+
+# Fastest first; html.parser is always available
+PARSER_PREFERENCE = ("lxml", "html.parser")
+
+# Per-site override of the backend, e.g. {"hotcourses": "html.parser"}
+SITE_BACKENDS = {}
+
+# Sites whose saved listing pages passed check_parity (python parsing.py <site> <pages>, and
+# test_parsing.py for the fixtures in fixtures/parsing); only these parse with the fastest backend
+# and their cards-only strainer, the rest keep a full html.parser parse
+FAST_PARSE_SITES = {site for site in os.environ.get("FAST_PARSE_SITES", "").split(",") if site}
+
+# Serializes load_script: scripts register in sys.modules before they finish executing
+_load_lock = threading.RLock()
+
+
+def available_backends():
+    """Installed BeautifulSoup tree builders, fastest first"""
+    backends = []
+    for backend in PARSER_PREFERENCE:
+        if backend == "html.parser" or importlib.util.find_spec(backend) is not None:
+            backends.append(backend)
+    return backends
+
+
+def best_backend(site=None):
+    backends = available_backends()
+    preferred = SITE_BACKENDS.get(site)
+    if preferred in backends:
+        return preferred
+    return backends[0] if site in FAST_PARSE_SITES else "html.parser"
+
+
+def class_pattern(*classes):
+    """Match any of the given CSS classes inside a raw class attribute.
+
+    Strainers see attributes before multi-valued splitting, so a plain
+    class_='Card' would miss class="x Card".
+    """
+    return re.compile(r"(^|\s)(%s)(\s|$)" % "|".join(re.escape(name) for name in classes))
+
+
+def card_strainer(names=None, classes=(), attrs=None):
+    """SoupStrainer keeping only card containers (and everything inside them)"""
+    attrs = dict(attrs or {})
+    if classes:
+        attrs["class"] = class_pattern(*classes)
+    return SoupStrainer(names, attrs=attrs)
+
+
+def make_soup(html, site=None, only=None, backend=None):
+    """Parse html with the site's backend, keeping only the elements only matches if the site is verified.
+
+    An explicit backend (as check_parity passes) always honours only.
+    """
+    if backend is None and site not in FAST_PARSE_SITES:
+        only = None
+    return BeautifulSoup(html, backend or best_backend(site), parse_only=only)
+
+
+def _comparable(records, ignore_fields):
+    return [{key: value for key, value in record.items() if key not in ignore_fields} for record in records]
+
+
+def check_parity(extract, pages, only=None, ignore_fields=("scraped_at",)):
+    """Prove every backend (and cards-only mode) extracts the same records as a full html.parser parse.
+
+    extract(soup) must return a list of records. Returns {variant: [mismatching page indexes]}.
+    """
+    variants = [(backend, None) for backend in available_backends()]
+    if only is not None:
+        variants += [(backend, only) for backend in available_backends()]
+
+    baselines = [_comparable(extract(make_soup(html, backend="html.parser")), ignore_fields) for html in pages]
+    mismatches = {}
+    for backend, strainer in variants:
+        name = f"{backend}{' +cards-only' if strainer is not None else ''}"
+        started = time.perf_counter()
+        mismatches[name] = [
+            index for index, html in enumerate(pages)
+            if _comparable(extract(make_soup(html, only=strainer, backend=backend)), ignore_fields) != baselines[index]
+        ]
+        elapsed = time.perf_counter() - started
+        status = "✅ identical" if not mismatches[name] else f"❌ {len(mismatches[name])} pages differ"
+        logging.info(f"{name:>28}: {elapsed * 1000:8.1f} ms over {len(pages)} pages, {status}")
+    return mismatches
+
+
+def load_script(name, path):
+    """Import a scraper script by path (several have hyphenated file names).
+
+    Concurrent crawl jobs may load the same script; the lock keeps them from
+    seeing a half-executed module, and a script that fails is not cached.
+    """
+    with _load_lock:
+        if name in sys.modules:
+            return sys.modules[name]
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            sys.modules.pop(name, None)
+            raise
+        return module
+
+
+def site_extractors():
+    """(extract(soup), card strainer) for each scraper, built without starting a browser"""
+    bachelors = load_script("bachelorsportal_scraper", "bachelorsportal-scraper.py")
+    educations = load_script("education_scrap", "education_scrap.py")
+    hotcourses = load_script("hot_course", "hot_course.py")
+    applyboard = load_script("applybroad", "applybroad.py")
+
+    def collect(scraper, method):
+        def extract(soup):
+            scraper.programs = []
+            getattr(scraper, method)(soup)
+            return scraper.programs
+        return extract
+
+    bachelors_scraper = bachelors.BachelorsPortalSeleniumScraper()
+    applyboard_scraper = applyboard.ApplyBoardScraper()
+    return {
+        "bachelorsportal": (bachelors_scraper.extract_programs_from_soup, bachelors.CARD_STRAINER),
+        "educations": (collect(educations.EducationsCategoryScraper(), "parse_page"), educations.CARD_STRAINER),
+        "hotcourses": (collect(hotcourses.HotcoursesScraper(), "extract"), hotcourses.CARD_STRAINER),
+        "applyboard": (lambda soup: [applyboard_scraper.extract_program_info(text, href)
+                                     for href, text in applyboard.segment_cards(soup)], None),
+    }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Check that every parser backend extracts identical records")
+    parser.add_argument("site", choices=["bachelorsportal", "educations", "hotcourses", "applyboard"])
+    parser.add_argument("pages", nargs="+", help="saved HTML fixture pages")
+    args = parser.parse_args()
+
+    extract, strainer = site_extractors()[args.site]
+    pages = []
+    for path in args.pages:
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append(f.read())
+    result = check_parity(extract, pages, only=strainer)
+    print(json.dumps(result, indent=2))
+    if not any(result.values()):
+        logging.info(f"✅ {args.site} can use fast parsing: add it to FAST_PARSE_SITES")
+    raise SystemExit(1 if any(result.values()) else 0)
@@ -0,0 +1,275 @@
+from collections import Counter
+import json
+import logging
+import math
+import sqlite3
+
+from record_stream import batches, record_key
+from seen_index import fingerprint
+
+PROCESSOR_STATE_FILE = "processor_state.sqlite"
+STATE_VERSION = "1"
+
+ADDED = "added"
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+REMOVED = "removed"
+
+# Log-bucket quantile sketch: estimates are within 1% of the true tuition
+SKETCH_ACCURACY = 0.01
+SKETCH_GAMMA = (1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY)
+QUANTILES = {"p25": 0.25, "p50": 0.5, "p75": 0.75}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS programs (
+    key TEXT PRIMARY KEY, hash TEXT NOT NULL, university TEXT, tuition INTEGER, processed TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS programs_university ON programs (university, tuition);
+CREATE TABLE IF NOT EXISTS universities (name TEXT PRIMARY KEY, aggregate TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+# SQLite's default limit on ? parameters per statement is 999
+LOOKUP_BATCH = 900
+# Incoming records fingerprinted (and, for deltas, looked up) per round
+DIFF_BATCH = 10_000
+
+
+def _bucket(value):
+    return math.ceil(math.log(value) / math.log(SKETCH_GAMMA))
+
+
+def sketch_quantile(sketch, q):
+    """Value at quantile q of a {bucket: count} sketch"""
+    total = sum(sketch.values())
+    if not total:
+        return None
+    rank = q * (total - 1)
+    seen = 0
+    for bucket in sorted(sketch, key=int):
+        seen += sketch[bucket]
+        if seen > rank:
+            return round(2 * SKETCH_GAMMA ** int(bucket) / (SKETCH_GAMMA + 1), 2)
+    return None
+
+
+def _count(counts, value, delta):
+    # JSON-encoded so None and non-string values survive the round trip through the database
+    label = json.dumps(value, ensure_ascii=False)
+    counts[label] = counts.get(label, 0) + delta
+    if counts[label] <= 0:
+        del counts[label]
+
+
+def _values(counts):
+    # Plain strings (almost every label) skip the JSON decoder
+    return [label[1:-1] if label[0] == '"' and '\\' not in label else json.loads(label) for label in counts]
+
+
+class ProcessorState:
+    """Persistent processed catalogue with running per-university aggregates, kept in SQLite.
+
+    Each program is stored under its record key (URL, else content hash)
+    with the fingerprint of the raw record it was processed from, so a
+    refresh only processes added and changed records. Universities hold
+    running counts, sums, min/max and a tuition quantile sketch that are
+    patched per program; only touched rows are rewritten on save.
+    """
+
+    def __init__(self, path=PROCESSOR_STATE_FILE):
+        self.path = path
+        self.counts = {ADDED: 0, CHANGED: 0, UNCHANGED: 0, REMOVED: 0}
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        version = self._meta("version")
+        if version not in (None, STATE_VERSION):
+            logging.warning(f"Processor state version {version} is outdated, starting empty")
+            self.db.executescript("DELETE FROM programs; DELETE FROM universities; DELETE FROM meta;")
+        self.profile_hash = self._meta("profile_hash")
+        self._universities = {}
+        self._touched = set()
+
+    def _meta(self, key):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _hashes(self, keys=None):
+        """{key: hash} for the given keys, or for every stored program"""
+        if keys is None:
+            return dict(self.db.execute("SELECT key, hash FROM programs"))
+        keys = list(keys)
+        hashes = {}
+        for start in range(0, len(keys), LOOKUP_BATCH):
+            batch = keys[start:start + LOOKUP_BATCH]
+            query = f"SELECT key, hash FROM programs WHERE key IN ({','.join('?' * len(batch))})"
+            hashes.update(self.db.execute(query, batch))
+        return hashes
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM programs").fetchone()[0]
+
+    def diff(self, records, complete=True):
+        """Split records into (to_process, removed_keys): new or changed records, and keys no longer present.
+
+        Records may be a stream; only the new or changed ones are kept. With
+        complete=False the records are a delta (e.g. a crawl that skipped
+        unchanged pages): only their own keys are looked up and nothing is
+        considered removed.
+        """
+        known = self._hashes() if complete else None
+        present = set()
+        to_process = []
+        for batch in batches(records, DIFF_BATCH):
+            keyed = [(record_key(record), record) for record in batch]
+            hashes = known if complete else self._hashes(key for key, _ in keyed)
+            for key, record in keyed:
+                digest = fingerprint(record)
+                if key not in hashes:
+                    to_process.append((key, digest, record))
+                    self.counts[ADDED] += 1
+                elif hashes[key] != digest:
+                    to_process.append((key, digest, record))
+                    self.counts[CHANGED] += 1
+                else:
+                    self.counts[UNCHANGED] += 1
+                if complete:
+                    present.add(key)
+        removed = [key for key in known if key not in present] if complete else []
+        return to_process, removed
+
+    def _university(self, name):
+        if name not in self._universities:
+            row = self.db.execute("SELECT aggregate FROM universities WHERE name = ?", (json.dumps(name),)).fetchone()
+            self._universities[name] = json.loads(row[0]) if row else {
+                "name": name, "members": {}, "countries": {}, "cities": {}, "disciplines": {},
+                "tuition_count": 0, "tuition_sum": 0, "min_tuition": None, "max_tuition": None, "tuition_sketch": {},
+            }
+        self._touched.add(name)
+        return self._universities[name]
+
+    def _stored(self, key):
+        row = self.db.execute("SELECT processed FROM programs WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def upsert_all(self, entries):
+        """Store (key, digest, processed) entries and patch the universities they leave or join"""
+        for key, digest, processed in entries:
+            old = self._stored(key)
+            self.db.execute(
+                "INSERT OR REPLACE INTO programs (key, hash, university, tuition, processed) VALUES (?, ?, ?, ?, ?)",
+                (key, digest, json.dumps(processed["university"]), processed["tuition_eur"] or None,
+                 json.dumps(processed, ensure_ascii=False)),
+            )
+            if old is not None:
+                self._unaggregate(key, old)
+            self._aggregate(key, processed)
+
+    def remove(self, keys):
+        """Drop programs (e.g. delisted ones) and patch their universities"""
+        for key in keys:
+            old = self._stored(key)
+            if old is None:
+                continue
+            self.db.execute("DELETE FROM programs WHERE key = ?", (key,))
+            self._unaggregate(key, old)
+            self.counts[REMOVED] += 1
+
+    def _aggregate(self, key, program):
+        uni = self._university(program["university"])
+        uni["members"][key] = program["id"]
+        _count(uni["countries"], program["country"], 1)
+        _count(uni["cities"], program["city"], 1)
+        _count(uni["disciplines"], program["discipline"], 1)
+        tuition = program["tuition_eur"]
+        if tuition:
+            uni["tuition_count"] += 1
+            uni["tuition_sum"] += tuition
+            uni["min_tuition"] = tuition if uni["min_tuition"] is None else min(uni["min_tuition"], tuition)
+            uni["max_tuition"] = tuition if uni["max_tuition"] is None else max(uni["max_tuition"], tuition)
+            _count(uni["tuition_sketch"], _bucket(tuition), 1)
+
+    def _unaggregate(self, key, program):
+        """Take an old version of a program out of its university (its row is already replaced or deleted)"""
+        uni = self._university(program["university"])
+        uni["members"].pop(key, None)
+        _count(uni["countries"], program["country"], -1)
+        _count(uni["cities"], program["city"], -1)
+        _count(uni["disciplines"], program["discipline"], -1)
+        tuition = program["tuition_eur"]
+        if tuition:
+            uni["tuition_count"] -= 1
+            uni["tuition_sum"] -= tuition
+            _count(uni["tuition_sketch"], _bucket(tuition), -1)
+            if tuition in (uni["min_tuition"], uni["max_tuition"]):
+                # Extremes cannot be un-merged; ask the index for this university's current range
+                uni["min_tuition"], uni["max_tuition"] = self.db.execute(
+                    "SELECT MIN(tuition), MAX(tuition) FROM programs WHERE university = ? AND tuition > 0",
+                    (json.dumps(program["university"]),),
+                ).fetchone()
+
+    def rescore(self, score, skip=()):
+        """Recompute stored matching scores with score(programs) -> scores, except for keys in skip"""
+        rows = [(key, json.loads(processed)) for key, processed in self.db.execute("SELECT key, processed FROM programs")
+                if key not in skip]
+        for (key, processed), scores in zip(rows, score([processed for _, processed in rows])):
+            processed["matching_scores"] = scores
+            self.db.execute("UPDATE programs SET processed = ? WHERE key = ?",
+                            (json.dumps(processed, ensure_ascii=False), key))
+
+    def _aggregates(self):
+        """Every university aggregate, with the ones patched in this run taking precedence"""
+        for name_json, aggregate in self.db.execute("SELECT name, aggregate FROM universities"):
+            if json.loads(name_json) not in self._universities:
+                yield json.loads(aggregate)
+        for uni in self._universities.values():
+            if uni["members"]:
+                yield uni
+
+    def university_profiles(self):
+        """Profiles in create_university_profile's shape, plus tuition quantile estimates"""
+        profiles = {}
+        for uni in self._aggregates():
+            profiles[uni["name"]] = {
+                "name": uni["name"],
+                "programs": list(uni["members"].values()),
+                "countries": _values(uni["countries"]),
+                "cities": _values(uni["cities"]),
+                "disciplines": _values(uni["disciplines"]),
+                "min_tuition": uni["min_tuition"],
+                "max_tuition": uni["max_tuition"],
+                "avg_tuition": uni["tuition_sum"] / uni["tuition_count"] if uni["tuition_count"] else None,
+                "tuition_quantiles": {label: sketch_quantile(uni["tuition_sketch"], q) for label, q in QUANTILES.items()},
+            }
+        return profiles
+
+    def processed_programs(self):
+        return [json.loads(processed) for (processed,) in self.db.execute("SELECT processed FROM programs")]
+
+    def totals(self):
+        """Catalogue-wide country and discipline lists from the university aggregates"""
+        countries, disciplines = Counter(), Counter()
+        for uni in self._aggregates():
+            countries.update(uni["countries"])
+            disciplines.update(uni["disciplines"])
+        return _values(countries), _values(disciplines)
+
+    def save(self):
+        """Write the touched universities and commit the refresh"""
+        for name in self._touched:
+            uni = self._universities[name]
+            if uni["members"]:
+                self.db.execute("INSERT OR REPLACE INTO universities (name, aggregate) VALUES (?, ?)",
+                                (json.dumps(name), json.dumps(uni, ensure_ascii=False)))
+            else:
+                self.db.execute("DELETE FROM universities WHERE name = ?", (json.dumps(name),))
+        self.db.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                            [("version", STATE_VERSION), ("profile_hash", self.profile_hash)])
+        self.db.commit()
+        c = self.counts
+        logging.info(f"🗂️ Processor state: {c[ADDED]} added, {c[CHANGED]} changed, {c[REMOVED]} removed, "
+                     f"{c[UNCHANGED]} unchanged, {len(self._touched)} universities patched "
+                     f"({len(self)} programs)")
+        self._touched.clear()
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,368 @@
+import argparse
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+SNAPSHOT_VERSION = 1
+
+# Flattened column layout of a processed program: (column, kind, path into the nested record)
+COLUMNS = [
+    ("id", "str", ("id",)),
+    ("title", "str", ("title",)),
+    ("university", "category", ("university",)),
+    ("country", "category", ("country",)),
+    ("city", "category", ("city",)),
+    ("discipline", "category", ("discipline",)),
+    ("duration_months", "int", ("duration_months",)),
+    ("tuition_eur", "int", ("tuition_eur",)),
+    ("deadline", "str", ("deadline",)),
+    ("url", "str", ("url",)),
+    ("scraped_at", "str", ("scraped_at",)),
+    ("requirements_text", "str", ("requirements_text",)),
+    ("overview", "str", ("overview",)),
+    ("specializations", "json", ("specializations",)),
+    ("university_id", "str", ("university_id",)),
+    ("sources", "json", ("sources",)),
+    ("lang_english_required", "bool", ("language_requirements", "english_required")),
+    ("lang_toefl_min", "int", ("language_requirements", "toefl_min")),
+    ("lang_ielts_min", "float", ("language_requirements", "ielts_min")),
+    ("lang_duolingo_min", "int", ("language_requirements", "duolingo_min")),
+    ("lang_other_languages", "json", ("language_requirements", "other_languages")),
+    ("score_academic_fit", "float", ("matching_scores", "academic_fit")),
+    ("score_financial_fit", "float", ("matching_scores", "financial_fit")),
+    ("score_location_fit", "float", ("matching_scores", "location_fit")),
+    ("score_language_fit", "float", ("matching_scores", "language_fit")),
+    ("score_overall_fit", "float", ("matching_scores", "overall_fit")),
+]
+
+# Top-level fields process_program only adds when the scraped record had them
+OPTIONAL_COLUMNS = {"requirements_text", "overview", "specializations", "university_id", "sources"}
+
+NUMPY_DTYPES = {"int": np.int32, "float": np.float64, "bool": np.bool_}
+
+
+def have_arrow():
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _lookup(program, path):
+    value = program
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def flatten_programs(programs):
+    """Turn processed programs into {column: python list} following COLUMNS"""
+    columns = {name: [] for name, _, _ in COLUMNS}
+    for program in programs:
+        for name, kind, path in COLUMNS:
+            value = _lookup(program, path)
+            if kind == "json" and value is not None:
+                value = json.dumps(value, ensure_ascii=False)
+            columns[name].append(value)
+    return columns
+
+
+def unflatten_programs(columns, rows):
+    """Rebuild nested program dicts from loaded columns.
+
+    Missing optional top-level fields are left out, and a nested group such as
+    language_requirements is only rebuilt when one of its values is set, the
+    way process_program emits them.
+    """
+    selected = [(name, kind, path, list(columns[name])) for name, kind, path in COLUMNS if name in columns]
+    groups = {}
+    for _, _, path, values in selected:
+        if len(path) > 1:
+            present = groups.setdefault(path[0], [False] * rows)
+            for row, value in enumerate(values):
+                if value is not None:
+                    present[row] = True
+
+    programs = []
+    for row in range(rows):
+        program = {}
+        for name, kind, path, values in selected:
+            value = values[row]
+            if value is None:
+                if len(path) == 1 and name in OPTIONAL_COLUMNS:
+                    continue
+                if len(path) > 1 and not groups[path[0]][row]:
+                    continue
+            elif kind == "json":
+                value = json.loads(value)
+            target = program
+            for key in path[:-1]:
+                target = target.setdefault(key, {})
+            target[path[-1]] = value
+        programs.append(program)
+    return programs
+
+
+def _encode_categories(values):
+    categories = sorted({value for value in values if value is not None})
+    index = {value: code for code, value in enumerate(categories)}
+    codes = np.fromiter((index[value] if value is not None else -1 for value in values),
+                        dtype=np.int32, count=len(values))
+    return codes, categories
+
+
+def _save_numpy(columns, rows, directory, metadata):
+    """One memory-mappable .npy per column part: values + validity, codes + categories, or offsets + utf-8 bytes"""
+    os.makedirs(directory, exist_ok=True)
+    layout = []
+    for name, kind, _ in COLUMNS:
+        values = columns[name]
+        base = os.path.join(directory, name)
+        if kind == "category":
+            codes, categories = _encode_categories(values)
+            np.save(f"{base}.codes.npy", codes)
+            layout.append({"name": name, "kind": kind, "categories": categories})
+            continue
+        if kind in ("str", "json"):
+            encoded = [value.encode("utf-8") if value is not None else b"" for value in values]
+            offsets = np.zeros(rows + 1, dtype=np.int64)
+            np.cumsum([len(value) for value in encoded], out=offsets[1:])
+            np.save(f"{base}.offsets.npy", offsets)
+            np.save(f"{base}.data.npy", np.frombuffer(b"".join(encoded), dtype=np.uint8))
+        else:
+            dtype = NUMPY_DTYPES[kind]
+            np.save(f"{base}.values.npy", np.array([value if value is not None else 0 for value in values], dtype=dtype))
+        np.save(f"{base}.valid.npy", np.array([value is not None for value in values], dtype=np.bool_))
+        layout.append({"name": name, "kind": kind})
+
+    manifest = {"version": SNAPSHOT_VERSION, "format": "numpy", "rows": rows, "columns": layout,
+                "metadata": metadata or {}}
+    with open(os.path.join(directory, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+
+
+def _save_parquet(columns, rows, path, metadata):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arrow_types = {"str": pa.string(), "json": pa.string(), "int": pa.int32(), "float": pa.float64(), "bool": pa.bool_()}
+    arrays = {}
+    for name, kind, _ in COLUMNS:
+        if kind == "category":
+            codes, categories = _encode_categories(columns[name])
+            arrays[name] = pa.DictionaryArray.from_arrays(
+                pa.array(codes, mask=codes < 0), pa.array(categories, type=pa.string())
+            )
+        else:
+            arrays[name] = pa.array(columns[name], type=arrow_types[kind])
+    table = pa.table(arrays)
+    table = table.replace_schema_metadata({"snapshot": json.dumps({"version": SNAPSHOT_VERSION, "rows": rows,
+                                                                   "metadata": metadata or {}})})
+    pq.write_table(table, path, compression="zstd")
+
+
+def save_snapshot(programs, path, metadata=None, engine=None):
+    """Write processed programs as a columnar snapshot and return the path written.
+
+    engine is "parquet" (needs pyarrow) or "numpy" (a directory of .npy
+    columns); by default Parquet is used when pyarrow is installed.
+    """
+    engine = engine or ("parquet" if have_arrow() else "numpy")
+    programs = list(programs)
+    columns = flatten_programs(programs)
+    base = os.path.splitext(path)[0] if path.endswith((".parquet", ".snapshot")) else path
+
+    if engine == "parquet":
+        target = f"{base}.parquet"
+        tmp_target = f"{target}.tmp"
+        _save_parquet(columns, len(programs), tmp_target, metadata)
+        os.replace(tmp_target, target)
+    elif engine == "numpy":
+        target = f"{base}.snapshot"
+        tmp_target = tempfile.mkdtemp(prefix=".snapshot-", dir=os.path.dirname(os.path.abspath(target)))
+        _save_numpy(columns, len(programs), tmp_target, metadata)
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        os.replace(tmp_target, target)
+    else:
+        raise ValueError(f"Unknown snapshot engine: {engine}")
+
+    logging.info(f"🧊 Saved {len(programs)} programs as a {engine} snapshot: {target}")
+    return target
+
+
+def _decode_strings(offsets, data, valid):
+    raw = data.tobytes()
+    # Plain lists: indexing a memmap element by element is far slower
+    offsets, valid = offsets.tolist(), valid.tolist()
+    return [raw[offsets[i]:offsets[i + 1]].decode("utf-8") if valid[i] else None for i in range(len(valid))]
+
+
+def load_columns(path, columns=None, decode=True):
+    """Read only the requested columns of a snapshot, memory-mapped where the format allows.
+
+    Numeric columns come back as NumPy arrays (with NaN for missing floats when
+    decoded), categories as object arrays, or as (codes, categories) when
+    decode=False so callers can filter on integer codes.
+    """
+    wanted = columns or [name for name, _, _ in COLUMNS]
+    kinds = {name: kind for name, kind, _ in COLUMNS}
+    unknown = [name for name in wanted if name not in kinds]
+    if unknown:
+        raise KeyError(f"Unknown snapshot columns: {', '.join(unknown)}")
+
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        table = pq.read_table(path, columns=wanted, memory_map=True)
+        result = {}
+        for name in wanted:
+            column = table.column(name).combine_chunks()
+            if kinds[name] == "category" and not decode:
+                result[name] = (column.indices.fill_null(-1).to_numpy(), column.dictionary.to_pylist())
+            elif kinds[name] in ("str", "json", "category"):
+                result[name] = np.array(column.to_pylist(), dtype=object)
+            elif kinds[name] == "float":
+                result[name] = column.to_numpy(zero_copy_only=False)
+            else:
+                result[name] = np.array(column.to_pylist(), dtype=object) if column.null_count else column.to_numpy()
+        return result
+
+    with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    layout = {column["name"]: column for column in manifest["columns"]}
+    result = {}
+    for name in wanted:
+        base = os.path.join(path, name)
+        kind = kinds[name]
+        if kind == "category":
+            codes = np.load(f"{base}.codes.npy", mmap_mode="r")
+            categories = layout[name]["categories"]
+            if not decode:
+                result[name] = (codes, categories)
+            else:
+                lookup = np.array(categories + [None], dtype=object)
+                result[name] = lookup[codes]
+            continue
+        valid = np.load(f"{base}.valid.npy", mmap_mode="r")
+        if kind in ("str", "json"):
+            offsets = np.load(f"{base}.offsets.npy", mmap_mode="r")
+            data = np.load(f"{base}.data.npy", mmap_mode="r")
+            result[name] = np.array(_decode_strings(offsets, data, valid), dtype=object) if decode else (offsets, data, valid)
+            continue
+        values = np.load(f"{base}.values.npy", mmap_mode="r")
+        if not decode:
+            result[name] = (values, valid)
+        elif kind == "float":
+            result[name] = np.where(valid, values, np.nan)
+        elif valid.all():
+            result[name] = values
+        else:
+            result[name] = np.array([value if ok else None for value, ok in zip(values.tolist(), valid.tolist())],
+                                    dtype=object)
+    return result
+
+
+def snapshot_rows(path):
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).metadata.num_rows
+    with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as f:
+        return json.load(f)["rows"]
+
+
+def load_snapshot(path, columns=None):
+    """Load a snapshot back into nested program dicts"""
+    loaded = load_columns(path, columns)
+    for name, kind, _ in COLUMNS:
+        if name not in loaded:
+            continue
+        values = loaded[name].tolist()
+        # Missing floats are NaN in the column arrays but None in records
+        loaded[name] = [None if value != value else value for value in values] if kind == "float" else values
+    return unflatten_programs(loaded, snapshot_rows(path))
+
+
+def _path_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+
+def benchmark_snapshot(programs, repeat=3, columns=("country", "tuition_eur", "score_overall_fit")):
+    """Compare save/load time and size of the snapshot with the JSON + CSV output"""
+    import pandas as pd
+
+    programs = list(programs)
+    results = {}
+    with tempfile.TemporaryDirectory() as scratch:
+        json_path = os.path.join(scratch, "programs.json")
+        csv_path = os.path.join(scratch, "programs.csv")
+
+        def save_json_csv():
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump({"programs": programs}, f, indent=2, ensure_ascii=False)
+            pd.DataFrame(programs).to_csv(csv_path, index=False)
+
+        def load_json():
+            with open(json_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+        snapshot = {}
+
+        def save():
+            snapshot["path"] = save_snapshot(programs, os.path.join(scratch, "programs"))
+
+        cases = [
+            ("json+csv save", save_json_csv),
+            ("json load", load_json),
+            ("csv load", lambda: pd.read_csv(csv_path)),
+            ("snapshot save", save),
+            ("snapshot load all", lambda: load_snapshot(snapshot["path"])),
+            (f"snapshot load {len(columns)} columns", lambda: load_columns(snapshot["path"], list(columns))),
+        ]
+        previous_level = logging.getLogger().level
+        logging.getLogger().setLevel(logging.WARNING)
+        try:
+            for name, fn in cases:
+                best = float("inf")
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    fn()
+                    best = min(best, time.perf_counter() - started)
+                results[name] = best
+        finally:
+            logging.getLogger().setLevel(previous_level)
+
+        sizes = {"json+csv": _path_size(json_path) + _path_size(csv_path), "snapshot": _path_size(snapshot["path"])}
+
+    for name, seconds in results.items():
+        logging.info(f"{name:>28}: {seconds * 1000:9.1f} ms")
+    for name, size in sizes.items():
+        logging.info(f"{name + ' size':>28}: {size / 1024:9.1f} KiB")
+    return {"seconds": results, "bytes": sizes}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Convert processed programs to a columnar snapshot or benchmark it")
+    parser.add_argument("processed", help="processed JSON written by bachelor-data-processor.py")
+    parser.add_argument("--engine", choices=["parquet", "numpy"], help="default: parquet if pyarrow is installed")
+    parser.add_argument("--bench", action="store_true", help="compare with the JSON + CSV output instead of converting")
+    args = parser.parse_args()
+
+    with open(args.processed, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if args.bench:
+        print(json.dumps(benchmark_snapshot(data["programs"]), indent=2))
+    else:
+        save_snapshot(data["programs"], os.path.splitext(args.processed)[0], metadata=data.get("metadata"),
+                      engine=args.engine)
@@ -0,0 +1,323 @@
+import argparse
+import json
+import logging
+import math
+import os
+import time
+
+import numpy as np
+
+from match_engine import MatchEngine
+from normalize import country_name
+
+# Exact-value fields: one posting list of program indices per value
+CATEGORICAL_FIELDS = ("country", "discipline", "university")
+
+# Numeric fields kept as sorted arrays for range bisection: (field, path into the processed program)
+RANGE_FIELDS = {
+    "tuition_eur": ("tuition_eur",),
+    "duration_months": ("duration_months",),
+    "toefl_min": ("language_requirements", "toefl_min"),
+    "ielts_min": ("language_requirements", "ielts_min"),
+    "duolingo_min": ("language_requirements", "duolingo_min"),
+}
+
+# Language minimums a program may not state; a missing minimum passes, as MatchEngine scores it
+LANGUAGE_MINIMUMS = ("toefl_min", "ielts_min", "duolingo_min")
+
+# Candidate sets holding at least 1/DENSE_RATIO of the catalogue are bitsets, smaller ones index arrays
+DENSE_RATIO = 32
+
+BENCH_QUERIES = {
+    "country": {"country": "Germany"},
+    "country + budget": {"country": "Germany", "tuition_eur": (None, 15000)},
+    "countries + discipline + budget + toefl": {
+        "country": ["Germany", "Canada", "Netherlands"], "discipline": "Computer Science",
+        "tuition_eur": (None, 15000), "toefl_min": (None, 95),
+    },
+    "university": {"university": "University 7"},
+    "duration + tuition range": {"duration_months": (36, 48), "tuition_eur": (5000, 20000)},
+}
+
+
+def _bits(indices, size):
+    mask = np.zeros(size, dtype=bool)
+    mask[indices] = True
+    return np.packbits(mask)
+
+
+def _has_bits(bits, indices):
+    """Whether each index is set in a packed bitset"""
+    return ((bits[indices >> 3] >> (7 - (indices & 7))) & 1).astype(bool)
+
+
+def _country(value):
+    """Canonical country for aliases ("UK", "USA"); other values unchanged"""
+    return (country_name(value) or value) if isinstance(value, str) else value
+
+
+def matches(program, filters):
+    """Whether one processed program passes the filters; the linear-scan reference for ProgramIndex"""
+    for field, wanted in filters.items():
+        if field in RANGE_FIELDS:
+            low, high = wanted
+            value = program
+            for key in RANGE_FIELDS[field]:
+                value = (value or {}).get(key)
+            if value is None:
+                if field in LANGUAGE_MINIMUMS:
+                    continue
+                return False
+            if (low is not None and value < low) or (high is not None and value > high):
+                return False
+        else:
+            values = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+            value = program.get(field)
+            if field == "country":
+                values = [_country(value) for value in values]
+                value = _country(value)
+            if value not in values:
+                return False
+    return True
+
+
+class ProgramIndex:
+    """In-memory query index over processed programs (process_program output).
+
+    Country, discipline and university have inverted indexes; tuition,
+    duration and language minimums are sorted arrays searched by bisection.
+    Each filter yields its candidates as an index array, or as a packed
+    bitset when it covers a large share of the catalogue; combined filters
+    start from the smallest index array and probe the rest, or AND the
+    bitsets. Only the surviving candidates are scored (MatchEngine, same
+    scores as calculate_basic_match_scores).
+    """
+
+    def __init__(self, programs):
+        started = time.perf_counter()
+        self.programs = list(programs)
+        self.size = len(self.programs)
+        self.dense = max(1, self.size // DENSE_RATIO)
+
+        self.postings, self.bitsets = {}, {}
+        columns = {field: [program.get(field) for program in self.programs] for field in CATEGORICAL_FIELDS}
+        # Scrapers pass search_country through as given ("UK", "USA"); queries and postings use canonical names
+        postings_columns = dict(columns, country=[_country(value) for value in columns["country"]])
+        for field, column in postings_columns.items():
+            codes = {value: code for code, value in enumerate(dict.fromkeys(column))}
+            values = np.fromiter((codes[value] for value in column), dtype=np.int64, count=self.size)
+            # Stable sort keeps each posting list in ascending program order
+            order = np.argsort(values, kind="stable")
+            bounds = np.concatenate([[0], np.cumsum(np.bincount(values, minlength=len(codes)))])
+            self.postings[field] = {value: order[bounds[code]:bounds[code + 1]] for value, code in codes.items()}
+            self.bitsets[field] = {value: _bits(ids, self.size)
+                                   for value, ids in self.postings[field].items() if len(ids) >= self.dense}
+
+        lang_reqs = [program.get("language_requirements") for program in self.programs]
+        for field, path in RANGE_FIELDS.items():
+            if len(path) == 1:
+                columns[field] = [program.get(field) for program in self.programs]
+            else:
+                columns[field] = [(reqs or {}).get(path[1]) for reqs in lang_reqs]
+        self.sorted, self.unstated = {}, {}
+        for field in RANGE_FIELDS:
+            values = np.array(columns[field], dtype=float)
+            known = np.flatnonzero(~np.isnan(values))
+            order = known[np.argsort(values[known], kind="stable")]
+            self.sorted[field] = (values[order], order)
+            if field in LANGUAGE_MINIMUMS:
+                self.unstated[field] = np.flatnonzero(np.isnan(values))
+
+        self.engine = MatchEngine(columns["tuition_eur"], columns["country"], lang_reqs)
+        self.build_s = time.perf_counter() - started
+        logging.info(f"🔎 Indexed {self.size} programs in {self.build_s:.2f}s "
+                     f"({', '.join(f'{len(self.postings[f])} {f} values' for f in CATEGORICAL_FIELDS)})")
+
+    def _categorical(self, field, wanted):
+        values = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+        if field == "country":
+            values = [_country(value) for value in values]
+        postings, bitsets = self.postings[field], self.bitsets[field]
+        found = [value for value in set(values) if value in postings]
+        if found and all(value in bitsets for value in found):
+            return "bits", np.bitwise_or.reduce([bitsets[value] for value in found])
+        # A program has one value per field, so the posting lists are disjoint
+        ids = np.sort(np.concatenate([postings[value] for value in found])) if found else np.zeros(0, dtype=np.int64)
+        return ("bits", _bits(ids, self.size)) if len(ids) >= self.dense else ("ids", ids)
+
+    def _range(self, field, bounds):
+        low, high = bounds
+        values, order = self.sorted[field]
+        start = 0 if low is None else np.searchsorted(values, low, side="left")
+        end = len(values) if high is None else np.searchsorted(values, high, side="right")
+        ids = order[start:end]
+        if field in LANGUAGE_MINIMUMS:
+            ids = np.concatenate([ids, self.unstated[field]])
+        return ("bits", _bits(ids, self.size)) if len(ids) >= self.dense else ("ids", np.sort(ids))
+
+    def candidates(self, **filters):
+        """Ascending indices of the programs passing every filter.
+
+        Categorical filters (country, discipline, university) take a value or
+        a list of values; range filters (tuition_eur, duration_months,
+        toefl_min, ielts_min, duolingo_min) take inclusive (low, high) bounds
+        with None for an open end. A missing tuition or duration never
+        matches; a missing language minimum always does (nothing to meet).
+        """
+        unknown = [field for field in filters if field not in CATEGORICAL_FIELDS and field not in RANGE_FIELDS]
+        if unknown:
+            raise KeyError(f"Unknown query fields: {', '.join(unknown)}")
+        if not filters:
+            return np.arange(self.size)
+        sets = [self._range(field, wanted) if field in RANGE_FIELDS else self._categorical(field, wanted)
+                for field, wanted in filters.items()]
+        sparse = sorted((ids for kind, ids in sets if kind == "ids"), key=len)
+        dense = [bits for kind, bits in sets if kind == "bits"]
+        if not sparse:
+            return np.flatnonzero(np.unpackbits(np.bitwise_and.reduce(dense), count=self.size))
+        ids = sparse[0]
+        for other in sparse[1:]:
+            ids = ids[np.isin(ids, other, assume_unique=True)]
+        for bits in dense:
+            ids = ids[_has_bits(bits, ids)]
+        return ids
+
+    def query(self, profile=None, k=20, **filters):
+        """Programs passing the filters, best k first for a profile (nested shape, see MatchEngine).
+
+        Without a profile the first k candidates come back in catalogue order
+        with their stored scores.
+        """
+        ids = self.candidates(**filters)
+        if profile is None:
+            return [self.programs[index] for index in ids[:k].tolist()]
+        ranked, _ = self.engine.rank(profile, ids, k)
+        return [dict(self.programs[index], matching_scores=scores)
+                for index, scores in zip(ranked.tolist(), self.engine.scores_for(profile, ranked))]
+
+
+def scan(programs, filters, profile=None, k=20, score=None):
+    """query() by linear scan: filter every program, score the matches with score(profile, program) and sort"""
+    found = [program for program in programs if matches(program, filters)]
+    if profile is None:
+        return found[:k]
+    scored = [dict(program, matching_scores=score(profile, program)) for program in found]
+    return sorted(scored, key=lambda program: program["matching_scores"]["overall_fit"], reverse=True)[:k]
+
+
+def _catalogue(processor, size, base=100_000):
+    """size processed synthetic programs; beyond base, copies of the first base at renamed universities"""
+    from sample_data import synthetic_programs
+    programs = processor.process_all_data({"programs": synthetic_programs(min(size, base))}, columnar=True)["programs"]
+    # Shallow copies keep 1M programs in memory while universities keep realistic posting list sizes
+    for copy in range(1, math.ceil(size / base)):
+        programs += [dict(program, university=f"{program['university']} Campus {copy}")
+                     for program in programs[:min(base, size - copy * base)]]
+    return programs
+
+
+def _latency(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return {"p50_ms": float(np.percentile(timings, 50)) * 1000, "p95_ms": float(np.percentile(timings, 95)) * 1000}
+
+
+def benchmark_queries(processor, sizes=(10_000, 100_000, 1_000_000), user_profile=None, k=20, repeat=50):
+    """Index build time and query latency against a linear scan, checking both return the same programs"""
+    profile = processor.matching_profile(user_profile) if user_profile else None
+    results = {}
+    for size in sizes:
+        previous_level = logging.getLogger().level
+        logging.getLogger().setLevel(logging.WARNING)
+        try:
+            programs = _catalogue(processor, size)
+            index = ProgramIndex(programs)
+        finally:
+            logging.getLogger().setLevel(previous_level)
+        results[size] = {"build_s": index.build_s, "queries": {}}
+        logging.info(f"📚 {size} programs, index built in {index.build_s:.2f}s")
+        for name, filters in BENCH_QUERIES.items():
+            expected = scan(programs, filters, profile, k, processor.calculate_basic_match_scores)
+            got = index.query(profile, k, **filters)
+            if [(p["url"], p["matching_scores"]) for p in got] != [(p["url"], p["matching_scores"]) for p in expected]:
+                logging.error(f"❌ {name}: index results differ from the linear scan")
+            timings = {
+                "candidates": len(index.candidates(**filters)),
+                "index": _latency(lambda: index.query(profile, k, **filters), repeat),
+                # The scan is slow on large catalogues; a few runs are enough
+                "scan": _latency(lambda: scan(programs, filters, profile, k, processor.calculate_basic_match_scores),
+                                 max(1, min(repeat, 200_000 // size))),
+            }
+            results[size]["queries"][name] = timings
+            logging.info(f"{name:>40}: {timings['candidates']:>7} candidates, index p50 "
+                         f"{timings['index']['p50_ms']:7.2f} ms (p95 {timings['index']['p95_ms']:7.2f}), "
+                         f"scan p50 {timings['scan']['p50_ms']:9.1f} ms")
+        del programs, index
+    return results
+
+
+if __name__ == "__main__":
+    from parsing import load_script
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Filter and rank processed programs through an in-memory index")
+    parser.add_argument("processed", nargs="?", default="processed_bachelor_programs.json",
+                        help="processed JSON written by bachelor-data-processor.py, or a snapshot from program_snapshot.py")
+    parser.add_argument("--country", action="append", help="repeat for several countries")
+    parser.add_argument("--discipline", action="append")
+    parser.add_argument("--university", action="append")
+    parser.add_argument("--min-tuition", type=int)
+    parser.add_argument("--max-tuition", type=int)
+    parser.add_argument("--min-duration", type=int, help="months")
+    parser.add_argument("--max-duration", type=int, help="months")
+    parser.add_argument("--toefl", type=int, help="only programs whose TOEFL minimum is at most this")
+    parser.add_argument("--ielts", type=float, help="only programs whose IELTS minimum is at most this")
+    parser.add_argument("--duolingo", type=int, help="only programs whose Duolingo minimum is at most this")
+    parser.add_argument("--profile", metavar="JSON", help="user profile to rank candidates for (raw or nested)")
+    parser.add_argument("-k", type=int, default=20, help="number of programs to return")
+    parser.add_argument("--bench", type=int, nargs="*", metavar="N",
+                        help="query latency of the index against a linear scan (default sizes 10k, 100k, 1M)")
+    args = parser.parse_args()
+
+    processor = load_script("bachelor_data_processor", "bachelor-data-processor.py").BachelorsDataProcessor()
+    user_profile = None
+    if args.profile:
+        with open(args.profile, "r", encoding="utf-8") as f:
+            user_profile = json.load(f)
+
+    if args.bench is not None:
+        sample_user = user_profile or {
+            "toefl_score": 95, "ielts_score": 7.0, "duolingo_score": 120,
+            "preferred_countries": ["Germany", "Canada", "Netherlands"], "budget_range": 15000,
+        }
+        print(json.dumps(benchmark_queries(processor, args.bench or (10_000, 100_000, 1_000_000), sample_user),
+                         indent=2))
+        raise SystemExit(0)
+
+    if os.path.isdir(args.processed) or args.processed.endswith(".parquet"):
+        from program_snapshot import load_snapshot
+        programs = load_snapshot(args.processed)
+    else:
+        with open(args.processed, "r", encoding="utf-8") as f:
+            programs = json.load(f)["programs"]
+
+    filters = {field: values for field, values in
+               (("country", args.country), ("discipline", args.discipline), ("university", args.university)) if values}
+    for field, low, high in (("tuition_eur", args.min_tuition, args.max_tuition),
+                             ("duration_months", args.min_duration, args.max_duration),
+                             ("toefl_min", None, args.toefl), ("ielts_min", None, args.ielts),
+                             ("duolingo_min", None, args.duolingo)):
+        if low is not None or high is not None:
+            filters[field] = (low, high)
+
+    index = ProgramIndex(programs)
+    started = time.perf_counter()
+    results = index.query(processor.matching_profile(user_profile) if user_profile else None, args.k, **filters)
+    logging.info(f"Found {len(index.candidates(**filters))} programs, returned {len(results)} "
+                 f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+    for i, program in enumerate(results, 1):
+        print(f"{i}. {program['title']} — {program['university']}, {program['country']} "
+              f"(€{program['tuition_eur'] or 'N/A'}, fit {program['matching_scores']['overall_fit']:.2%})")
@@ -0,0 +1,173 @@
+from urllib.parse import urlparse
+import logging
+import threading
+import time
+
+# Requests per second and burst size per domain; anything else uses the defaults
+DOMAIN_RATES = {
+    "www.bachelorsportal.com": {"rate": 0.5, "burst": 1},
+    "www.hotcoursesabroad.com": {"rate": 0.5, "burst": 1},
+    "www.educations.com": {"rate": 1.0, "burst": 2},
+    "www.applyboard.com": {"rate": 1.0, "burst": 2},
+}
+
+THROTTLE_STATUSES = (429, 503)
+
+# Lower-cased snippets of anti-bot interstitials (Cloudflare, PerimeterX, DataDome, Akamai)
+CHALLENGE_MARKERS = (
+    "<title>just a moment",
+    "cf-chl-",
+    "attention required! | cloudflare",
+    "px-captcha",
+    "captcha-delivery.com",
+    "<title>access denied",
+    "are you a robot",
+)
+
+_shared_limiter = None
+_shared_lock = threading.Lock()
+
+
+def domain_of(url):
+    return urlparse(url).netloc or url
+
+
+def is_challenge_page(html):
+    """True if html looks like a bot challenge rather than real content"""
+    if not html:
+        return False
+    head = html[:20000].lower()
+    return any(marker in head for marker in CHALLENGE_MARKERS)
+
+
+class RateLimiter:
+    """Per-domain token buckets whose rate adapts AIMD-style to how the site responds.
+
+    Callers acquire(url) before every request and report(url, ...) afterwards.
+    A 429/503, a challenge page, an error or a response slower than slow_s
+    multiplies the domain's rate by decrease (and honours Retry-After);
+    each healthy response adds increase req/s back, up to max_rate.
+    """
+
+    def __init__(self, domain_rates=None, default_rate=2.0, default_burst=2, min_rate=0.05,
+                 max_rate=None, increase=0.1, decrease=0.5, slow_s=10.0):
+        self.domain_rates = dict(DOMAIN_RATES, **(domain_rates or {}))
+        self.default_rate = default_rate
+        self.default_burst = default_burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.slow_s = slow_s
+        self.buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, domain):
+        bucket = self.buckets.get(domain)
+        if bucket is None:
+            config = self.domain_rates.get(domain, {})
+            rate = config.get("rate", self.default_rate)
+            burst = config.get("burst", self.default_burst)
+            bucket = {
+                "rate": rate,
+                "configured_rate": rate,
+                "max_rate": self.max_rate or rate * 2,
+                "burst": burst,
+                "tokens": float(burst),
+                "updated": time.monotonic(),
+                "blocked_until": 0.0,
+                "requests": 0,
+                "throttled": 0,
+                "waited_s": 0.0,
+            }
+            self.buckets[domain] = bucket
+        return bucket
+
+    def acquire(self, url):
+        """Block until the url's domain has a token available; returns the seconds waited"""
+        domain = domain_of(url)
+        waited = 0.0
+        while True:
+            with self._lock:
+                bucket = self._bucket(domain)
+                now = time.monotonic()
+                bucket["tokens"] = min(bucket["burst"], bucket["tokens"] + (now - bucket["updated"]) * bucket["rate"])
+                bucket["updated"] = now
+                if now >= bucket["blocked_until"] and bucket["tokens"] >= 1:
+                    bucket["tokens"] -= 1
+                    bucket["requests"] += 1
+                    bucket["waited_s"] += waited
+                    return waited
+                wait = max(bucket["blocked_until"] - now, (1 - bucket["tokens"]) / bucket["rate"])
+            time.sleep(wait)
+            waited += wait
+
+    def report(self, url, status=None, elapsed=None, html=None, error=False, retry_after=None):
+        """Feed back how a request went so the domain's rate can adapt; returns True if it was throttled"""
+        domain = domain_of(url)
+        reason = None
+        if error:
+            reason = "error"
+        elif status in THROTTLE_STATUSES:
+            reason = f"HTTP {status}"
+        elif is_challenge_page(html):
+            reason = "challenge page"
+        elif elapsed is not None and elapsed > self.slow_s:
+            reason = f"slow response ({elapsed:.1f}s)"
+
+        with self._lock:
+            bucket = self._bucket(domain)
+            if reason is None:
+                bucket["rate"] = min(bucket["max_rate"], bucket["rate"] + self.increase)
+                return False
+
+            bucket["throttled"] += 1
+            bucket["rate"] = max(self.min_rate, bucket["rate"] * self.decrease)
+            bucket["tokens"] = min(bucket["tokens"], 0.0)
+            if retry_after:
+                bucket["blocked_until"] = max(bucket["blocked_until"], time.monotonic() + retry_after)
+            rate = bucket["rate"]
+        logging.warning(f"🐢 {domain}: {reason}, backing off to {rate:.2f} req/s")
+        return True
+
+    def current_rate(self, url):
+        with self._lock:
+            return self._bucket(domain_of(url))["rate"]
+
+    def metrics(self):
+        """Snapshot of every domain's current rate and counters"""
+        with self._lock:
+            return {
+                domain: {
+                    "rate": round(bucket["rate"], 3),
+                    "configured_rate": bucket["configured_rate"],
+                    "requests": bucket["requests"],
+                    "throttled": bucket["throttled"],
+                    "waited_s": round(bucket["waited_s"], 1),
+                }
+                for domain, bucket in self.buckets.items()
+            }
+
+    def log_metrics(self):
+        for domain, m in self.metrics().items():
+            logging.info(
+                f"🚦 {domain}: {m['rate']} req/s (configured {m['configured_rate']}), "
+                f"{m['requests']} requests, {m['throttled']} throttled, {m['waited_s']}s waiting"
+            )
+
+
+def parse_retry_after(value):
+    """Seconds from a Retry-After header given in seconds (HTTP dates are ignored)"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def get_shared_limiter(**kwargs):
+    """Return the process-wide limiter so every scraper hitting a domain shares its bucket"""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = RateLimiter(**kwargs)
+        return _shared_limiter
@@ -0,0 +1,267 @@
+import gzip
+import io
+import itertools
+import json
+import logging
+import os
+import re
+import threading
+
+from seen_index import fingerprint
+
+COMPRESSION_SUFFIXES = {".gz": "gzip", ".zst": "zstd"}
+# Sidecar next to a finished stream describing it, e.g. whether it holds the full catalogue. It replaces
+# the stream's extensions (crawl_X.jsonl.gz -> crawl_X.manifest.json) so globs like *.jsonl* skip it
+MANIFEST_SUFFIX = ".manifest.json"
+
+# Characters read per refill when streaming a JSON document
+READ_CHUNK = 1 << 16
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def compression_for(path):
+    for suffix, compression in COMPRESSION_SUFFIXES.items():
+        if path.endswith(suffix):
+            return compression
+    return None
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstd compression needs the zstandard package (pip install zstandard)")
+    return zstandard
+
+
+def _open_binary(path, mode, compression):
+    if compression == "gzip":
+        return gzip.open(path, mode)
+    if compression == "zstd":
+        zstandard = _zstandard()
+        raw = open(path, mode)
+        if "w" in mode or "a" in mode:
+            return zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+        return zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+    return open(path, mode)
+
+
+def batches(records, size):
+    """Lists of up to size records from any iterable, so a stream is never held whole"""
+    records = iter(records)
+    while True:
+        batch = list(itertools.islice(records, size))
+        if not batch:
+            return
+        yield batch
+
+
+def manifest_path(path):
+    return f"{os.path.splitext(_base_path(path))[0]}{MANIFEST_SUFFIX}"
+
+
+def read_manifest(path):
+    """The manifest written next to a stream, or {} for files without one (treated as complete)"""
+    sidecar = manifest_path(path)
+    if not os.path.exists(sidecar):
+        return {}
+    with open(sidecar, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def record_key(record, key_field="url"):
+    """Dedup key: the record's URL when it has one, otherwise its content fingerprint"""
+    value = record.get(key_field)
+    return value if value and value != "N/A" else fingerprint(record)
+
+
+class RecordWriter:
+    """Append records to a JSONL file as they are extracted, deduplicating on the fly.
+
+    Lines go to <path>.part and are flushed every flush_every records, so a
+    crash loses at most those; close() renames the file into place atomically.
+    Compression (gzip or zstd) follows the path suffix unless given.
+    complete=False marks a delta (e.g. a crawl that skipped known programs)
+    in the manifest, so consumers do not treat missing records as removed.
+    """
+
+    def __init__(self, path, key_field="url", compression=None, flush_every=1, complete=True):
+        self.path = path
+        self.part_path = f"{path}.part"
+        self.key_field = key_field
+        self.compression = compression or compression_for(path)
+        self.flush_every = max(1, flush_every)
+        self.complete = complete
+        self.keys = set()
+        self.written = 0
+        self.duplicates = 0
+        self._lock = threading.Lock()
+        self._file = _open_binary(self.part_path, "wb", self.compression)
+
+    def write(self, record):
+        """Write record unless an equal key was already written; returns True if written"""
+        key = record_key(record, self.key_field)
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            if key in self.keys:
+                self.duplicates += 1
+                return False
+            self.keys.add(key)
+            self._file.write(line)
+            self.written += 1
+            if self.written % self.flush_every == 0:
+                self._file.flush()
+        return True
+
+    def write_all(self, records):
+        return sum(1 for record in records if self.write(record))
+
+    def close(self):
+        """Finish the stream and move it to its final name"""
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.close()
+            self._file = None
+            os.replace(self.part_path, self.path)
+            with open(manifest_path(self.path), "w", encoding="utf-8") as f:
+                json.dump({"complete": self.complete, "records": self.written}, f)
+        logging.info(f"✅ Streamed {self.written} records to {self.path} ({self.duplicates} duplicates skipped)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Keep the .part file after a crash; everything flushed so far is readable
+        if exc_type is None:
+            self.close()
+        elif self._file is not None:
+            self._file.close()
+            self._file = None
+            logging.warning(f"Stream interrupted, partial records kept in {self.part_path}")
+
+
+def _base_path(path):
+    """Path without its .part and compression suffixes (programs.json.gz.part -> programs.json)"""
+    path = path[:-len(".part")] if path.endswith(".part") else path
+    compression = compression_for(path)
+    return path[:path.rindex(".")] if compression else path
+
+
+class _JsonStream:
+    """Pull parser over a text stream: whole JSON values and single characters, refilling a small buffer"""
+
+    def __init__(self, text):
+        self.text = text
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size=None):
+        chunk = self.text.read(size or READ_CHUNK)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop what was already consumed before appending, so the buffer never holds more than a record or two
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character without consuming it ("" at the end)"""
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def take(self):
+        char = self.peek()
+        self.pos += len(char)
+        return char
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A value running to the buffer's end may be cut short (a number, say); confirm with more text
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except ValueError:
+                if self.eof:
+                    raise
+            # Grow reads with the value's size so a huge record is not re-parsed once per small chunk
+            self._fill(max(READ_CHUNK, len(self.buffer) - self.pos))
+
+
+def iter_json_records(path, key="programs"):
+    """Yield the records of a JSON document one at a time: a top-level array, or the array under key.
+
+    Memory stays at a buffer chunk plus the record being decoded, whatever
+    the file size. Plain, .gz or .zst like iter_records; a document cut
+    short keeps the records read so far.
+    """
+    compression = compression_for(path[:-len(".part")] if path.endswith(".part") else path)
+    with _open_binary(path, "rb", compression) as raw:
+        stream = _JsonStream(io.TextIOWrapper(raw, encoding="utf-8"))
+        try:
+            first = stream.take()
+            if first == "{":
+                # Skip other members whole (metadata and the like) until the array under key
+                while True:
+                    if stream.peek() in ("}", ""):
+                        logging.warning(f"No '{key}' array in {path}")
+                        return
+                    name = stream.value()
+                    if stream.take() != ":":
+                        raise ValueError(f"Expected ':' after {name!r} in {path}")
+                    if name == key and stream.peek() == "[":
+                        stream.take()
+                        break
+                    stream.value()
+                    if stream.peek() == ",":
+                        stream.take()
+            elif first != "[":
+                raise ValueError(f"{path} holds neither a JSON array nor an object")
+            if stream.peek() == "]":
+                return
+            while True:
+                yield stream.value()
+                separator = stream.take()
+                if separator == "]":
+                    return
+                if separator != ",":
+                    raise ValueError(f"Expected ',' or ']' between records in {path}, got {separator!r}")
+        except (ValueError, EOFError, gzip.BadGzipFile) as e:
+            if not stream.eof:
+                raise
+            logging.warning(f"{path} ends early ({e}); keeping the records read so far")
+
+
+def iter_records(path):
+    """Yield records lazily from a JSONL stream or a JSON document (.json: array or {"programs": [...]}).
+
+    Either may be plain, .gz or .zst. A truncated last line or document
+    keeps the records read before it.
+    """
+    if _base_path(path).endswith(".json"):
+        yield from iter_json_records(path)
+        return
+    compression = compression_for(path[:-len(".part")] if path.endswith(".part") else path)
+    with _open_binary(path, "rb", compression) as raw:
+        lines = io.TextIOWrapper(raw, encoding="utf-8")
+        try:
+            for number, line in enumerate(lines, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    logging.warning(f"Skipping malformed line {number} in {path}")
+        except (EOFError, gzip.BadGzipFile) as e:
+            # A writer that crashed mid-block leaves a truncated compressed stream
+            logging.warning(f"{path} ends early ({e}); keeping the records read so far")
@@ -0,0 +1,74 @@
+import random
+from datetime import datetime, timedelta
+
+# Raw strings as the scrapers see them, repeated across many cards
+DURATIONS = ["3 years", "4 Years full-time", "36 months", "2 year", "18 Months", "N/A", "", "Flexible"]
+TUITIONS = ["€1,500 / year", "EUR 12,000", "$25,000 per year", "USD 9,500", "£18,000", "GBP 22,500",
+            "Free", "N/A", "", "14500"]
+REQUIREMENTS = [
+    "English B2, TOEFL 80 or IELTS 6.5",
+    ["IELTS 6.0", "TOEFL iBT 90", "Duolingo 110"],
+    "German C1 certificate",
+    "english language proficiency required",
+    ["High school diploma", "TOEFL 100"],
+    "Duolingo English Test 120, IELTS 7.0",
+]
+COUNTRIES = ["Germany", "Canada", "Netherlands", "United Kingdom", "United States", "France", "Sweden", "Australia"]
+CITIES = ["Berlin", "Toronto", "Amsterdam", "London", "Boston", "Paris", "Stockholm", "Melbourne"]
+DISCIPLINES = ["Computer Science", "Business", "Engineering", "Medicine", "Law", "Design"]
+SOURCES = ["bachelorsportal", "hotcourses", "educations", "applyboard"]
+
+
+def synthetic_programs(n, seed=0, universities=None):
+    """n scraped program records with realistic field variety, for benchmarks and parity checks"""
+    rng = random.Random(seed)
+    universities = universities or max(1, n // 20)
+    started = datetime(2024, 3, 15)
+    programs = []
+    for i in range(n):
+        country = rng.randrange(len(COUNTRIES))
+        program = {
+            "title": f"{rng.choice(DISCIPLINES)} Programme {i % 997}",
+            "university": f"University {rng.randrange(universities)}",
+            "city": CITIES[country],
+            "url": f"https://example.org/programs/{i}",
+            "duration": rng.choice(DURATIONS),
+            "tuition_fee": rng.choice(TUITIONS),
+            "deadline": "N/A",
+            "scraped_at": (started + timedelta(seconds=i)).isoformat(),
+            "source": rng.choice(SOURCES),
+            "search_discipline": rng.choice(DISCIPLINES),
+        }
+        if rng.random() < 0.7:
+            program["country"] = COUNTRIES[country]
+        else:
+            program["search_country"] = COUNTRIES[country]
+        if rng.random() < 0.5:
+            program["requirements"] = rng.choice(REQUIREMENTS)
+        if rng.random() < 0.3:
+            program["overview"] = "An undergraduate programme. " * rng.randrange(1, 40)
+        if rng.random() < 0.2:
+            program["subjects"] = rng.sample(DISCIPLINES, 2)
+        programs.append(program)
+    return programs
+
+
+def synthetic_profiles(n, seed=0):
+    """n raw student profiles in the shape BachelorsDataProcessor's example user has"""
+    rng = random.Random(seed)
+    profiles = []
+    for _ in range(n):
+        profiles.append({
+            "gpa": f"{rng.uniform(2.5, 4.0):.1f}",
+            "degree_level": "high_school",
+            "field_of_study": rng.choice(DISCIPLINES),
+            "sat_score": rng.randrange(1000, 1600, 10),
+            "toefl_score": rng.choice([None, rng.randrange(70, 120)]),
+            "ielts_score": rng.choice([None, rng.randrange(50, 90) / 10]),
+            "duolingo_score": rng.choice([None, rng.randrange(90, 150, 5)]),
+            "preferred_countries": rng.sample(COUNTRIES, rng.randrange(0, 4)),
+            "budget_range": rng.choice([0, 5000, 10000, 15000, 20000, 30000]),
+            "funding_sources": "self_funded",
+            "languages": [{"language": "English", "proficiency": "Advanced"}],
+        })
+    return profiles
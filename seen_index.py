@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+import hashlib
+import json
+import logging
+import os
+import threading
+from urllib.parse import urlparse
+
+SEEN_INDEX_FILE = "seen_index.json"
+
+# Fields that change on every scrape without the program changing
+VOLATILE_FIELDS = ("scraped_at",)
+
+NEW = "new"
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+STALE = "stale"
+
+
+def fingerprint(record):
+    """Stable content hash of a scraped record, ignoring volatile fields"""
+    content = {key: value for key, value in record.items() if key not in VOLATILE_FIELDS}
+    return hashlib.sha1(json.dumps(content, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class SeenIndex:
+    """Persistent URL -> fingerprint index shared across runs for incremental crawling"""
+
+    def __init__(self, path=SEEN_INDEX_FILE, reverify_days=28):
+        self.path = path
+        self.reverify_after = timedelta(days=reverify_days)
+        self.counts = {NEW: 0, CHANGED: 0, UNCHANGED: 0, STALE: 0}
+        self.started = datetime.now()
+        self._lock = threading.Lock()
+        self.entries = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Seen index unreadable, starting empty: {e}")
+            return {}
+
+    def observe(self, record):
+        """Record a scraped program and return whether it is new, changed, unchanged or stale.
+
+        Unchanged programs that have not been re-verified for reverify_days are
+        reported as stale so they are emitted again on a regular schedule.
+        """
+        digest = fingerprint(record)
+        url = record.get("url")
+        key = url if url and url != "N/A" else digest
+        now = datetime.now()
+
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                status = NEW
+            elif entry["fingerprint"] != digest:
+                status = CHANGED
+            elif now - datetime.fromisoformat(entry["last_verified"]) > self.reverify_after:
+                status = STALE
+            else:
+                status = UNCHANGED
+
+            if status == UNCHANGED:
+                entry["last_seen"] = now.isoformat()
+            else:
+                self.entries[key] = {
+                    "fingerprint": digest,
+                    "first_seen": entry["first_seen"] if entry else now.isoformat(),
+                    "last_seen": now.isoformat(),
+                    "last_verified": now.isoformat(),
+                }
+            self.counts[status] += 1
+        return status
+
+    def filter_page(self, records):
+        """Return the records worth emitting; an empty result for a non-empty page means it was all known"""
+        return [record for record in records if self.observe(record) != UNCHANGED]
+
+    def keep_listed(self, records):
+        """Refresh last_seen for the known programs of these records' sites that this run did not reach.
+
+        Called when a crawl stops early at a page of known programs: the pages
+        after it were not fetched, so their programs count as still listed
+        rather than drifting towards unseen_since.
+        """
+        sites = {urlparse(record.get("url") or "").netloc for record in records} - {""}
+        now = datetime.now().isoformat()
+        refreshed = 0
+        with self._lock:
+            for key, entry in self.entries.items():
+                if datetime.fromisoformat(entry["last_seen"]) < self.started and urlparse(key).netloc in sites:
+                    entry["last_seen"] = now
+                    refreshed += 1
+        logging.info(f"👀 Kept {refreshed} programs not re-crawled on {', '.join(sorted(sites))} listed")
+        return refreshed
+
+    def unseen_since(self, days):
+        """URLs not encountered for the given number of days, e.g. delisted programs"""
+        cutoff = datetime.now() - timedelta(days=days)
+        with self._lock:
+            return [key for key, entry in self.entries.items()
+                    if datetime.fromisoformat(entry["last_seen"]) < cutoff]
+
+    def forget(self, key):
+        with self._lock:
+            self.entries.pop(key, None)
+
+    def save(self):
+        with self._lock:
+            tmp_file = f"{self.path}.tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_file, self.path)
+        logging.info(
+            f"👀 Seen index: {self.counts[NEW]} new, {self.counts[CHANGED]} changed, "
+            f"{self.counts[STALE]} re-verified, {self.counts[UNCHANGED]} unchanged"
+        )
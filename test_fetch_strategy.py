@@ -0,0 +1,115 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from fetch_strategy import FetchStrategy
+from rate_limiter import RateLimiter
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+with open(os.path.join(FIXTURES, "parsing", "bachelorsportal.html"), "r", encoding="utf-8") as f:
+    STATIC_PAGE = f.read()
+# What a client-rendered listing serves before its scripts run
+JS_SHELL = '<html><body><div id="app"></div><script src="/bundle.js"></script></body></html>'
+
+PAGES = {"/static": STATIC_PAGE, "/js-only": JS_SHELL}
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        body = PAGES.get(self.path)
+        self.send_response(200 if body else 404)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.end_headers()
+        self.wfile.write((body or "").encode("utf-8"))
+
+    def log_message(self, *args):
+        pass
+
+
+class StubDriver:
+    """Stands in for Chrome: 'renders' the JS shell into the full listing"""
+
+    def __init__(self):
+        self.visited = []
+        self.page_source = None
+
+    def get(self, url):
+        self.visited.append(url)
+        self.page_source = STATIC_PAGE
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def driver():
+    return StubDriver()
+
+
+def browser_fetch(driver):
+    def fetch(url):
+        driver.get(url)
+        return driver.page_source
+    return fetch
+
+
+def strategy(state_file):
+    return FetchStrategy("div.ProgramCard", session=requests.Session(), state_file=str(state_file),
+                         limiter=RateLimiter(default_rate=100, default_burst=10))
+
+
+def url(server, path):
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+def site(server):
+    return f"127.0.0.1:{server.server_address[1]}"
+
+
+def test_static_page_is_served_over_http(server, driver, tmp_path):
+    fetcher = strategy(tmp_path / "fetch_paths.json")
+    assert fetcher.fetch(url(server, "/static"), browser_fetch(driver)) == STATIC_PAGE
+    assert server.requests == ["/static"]
+    assert driver.visited == []
+    assert fetcher.preferred_path(site(server)) == "http"
+
+
+def test_js_only_page_escalates_to_the_browser(server, driver, tmp_path):
+    fetcher = strategy(tmp_path / "fetch_paths.json")
+    page = url(server, "/js-only")
+    assert fetcher.fetch(page, browser_fetch(driver)) == STATIC_PAGE
+    assert server.requests == ["/js-only"]
+    assert driver.visited == [page]
+    assert fetcher.preferred_path(site(server)) == "browser"
+
+
+def test_fetch_paths_counts_pages_per_path_and_persists(server, driver, tmp_path):
+    state_file = tmp_path / "fetch_paths.json"
+    fetcher = strategy(state_file)
+    for path in ("/static", "/static", "/js-only"):
+        fetcher.fetch(url(server, path), browser_fetch(driver))
+
+    with open(state_file, "r", encoding="utf-8") as f:
+        entry = json.load(f)[site(server)]
+    assert entry["path"] == "browser"
+    assert entry["counts"] == {"http": 2, "browser": 1}
+
+    # A later run goes straight to the browser for this site
+    later = strategy(state_file)
+    later.fetch(url(server, "/static"), browser_fetch(driver))
+    assert server.requests == ["/static", "/static", "/js-only"]
+    assert later.paths[site(server)]["counts"] == {"http": 2, "browser": 2}
@@ -0,0 +1,42 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from parsing import check_parity, load_script, make_soup, site_extractors
+
+pytest.importorskip("lxml")
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "parsing")
+EXTRACTORS = site_extractors()
+
+
+def fixture_page(site):
+    with open(os.path.join(FIXTURES, f"{site}.html"), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("site", sorted(EXTRACTORS))
+def test_every_backend_extracts_identical_records(site):
+    extract, strainer = EXTRACTORS[site]
+    html = fixture_page(site)
+    # Each fixture holds three program cards among navigation, promos and footer noise
+    assert len(extract(make_soup(html, backend="html.parser"))) == 3
+    mismatches = check_parity(extract, [html], only=strainer)
+    assert "lxml" in mismatches
+    assert mismatches == {variant: [] for variant in mismatches}
+
+
+def test_load_script_is_thread_safe_and_does_not_cache_failures(tmp_path):
+    script = tmp_path / "slow-script.py"
+    script.write_text("import time\ntime.sleep(0.2)\nREADY = True\n")
+    with ThreadPoolExecutor(4) as pool:
+        modules = list(pool.map(lambda _: load_script("slow_script", str(script)), range(4)))
+    assert all(module is modules[0] and module.READY for module in modules)
+
+    broken = tmp_path / "broken-script.py"
+    broken.write_text("raise RuntimeError('boom')\n")
+    with pytest.raises(RuntimeError):
+        load_script("broken_script", str(broken))
+    assert "broken_script" not in sys.modules
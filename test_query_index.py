@@ -0,0 +1,65 @@
+from parsing import load_script
+from query_index import ProgramIndex, scan
+
+processor = load_script("bachelor_data_processor", "bachelor-data-processor.py").BachelorsDataProcessor()
+
+
+def program(url, country, tuition=None, toefl=None, discipline="Business"):
+    """A processed program with only the fields the index reads"""
+    record = {
+        "id": url, "url": url, "title": f"Programme {url}", "university": "University 1", "country": country,
+        "discipline": discipline, "tuition_eur": tuition, "duration_months": 36,
+        "matching_scores": {"overall_fit": 0.0},
+    }
+    if toefl is not None:
+        record["language_requirements"] = {"english_required": True, "toefl_min": toefl, "ielts_min": None,
+                                           "duolingo_min": None}
+    return record
+
+
+PROFILE = {
+    "academic": {"test_scores": {"toefl": 95, "ielts": None, "duolingo": None}},
+    "preferences": {"countries": ["United States"], "budget_eur": 15000},
+}
+
+PROGRAMS = [
+    program("a", "USA", tuition=12000, toefl=80),
+    program("b", "United States", tuition=20000),
+    program("c", "UK", tuition=9000, toefl=100),
+    program("d", "United Kingdom", toefl=90),
+    program("e", "Germany", tuition=0),
+]
+
+
+def urls(programs):
+    return [p["url"] for p in programs]
+
+
+def test_aliased_stored_countries_match_any_spelling():
+    index = ProgramIndex(PROGRAMS)
+    for spelling in ("USA", "US", "United States"):
+        assert urls(index.query(country=spelling)) == ["a", "b"]
+    for spelling in ("UK", "United Kingdom"):
+        assert urls(index.query(country=spelling)) == ["c", "d"]
+    assert urls(index.query(country=["UK", "USA"])) == ["a", "b", "c", "d"]
+
+
+def test_missing_language_minimum_passes():
+    index = ProgramIndex(PROGRAMS)
+    # b and e state no TOEFL minimum, so a 95 clears them; c asks for 100
+    assert urls(index.query(toefl_min=(None, 95))) == ["a", "b", "d", "e"]
+    # A missing tuition is unknown, not free
+    assert urls(index.query(tuition_eur=(None, 15000))) == ["a", "c", "e"]
+
+
+def test_index_agrees_with_scan():
+    index = ProgramIndex(PROGRAMS)
+    filters = [
+        {"country": "USA"}, {"country": "United Kingdom", "toefl_min": (None, 95)},
+        {"tuition_eur": (5000, 15000), "toefl_min": (None, 90)}, {"country": "France"},
+    ]
+    for query in filters:
+        assert urls(index.query(**query)) == urls(scan(PROGRAMS, query))
+        ranked = index.query(PROFILE, 3, **query)
+        expected = scan(PROGRAMS, query, PROFILE, 3, processor.calculate_basic_match_scores)
+        assert [(p["url"], p["matching_scores"]) for p in ranked] == [(p["url"], p["matching_scores"]) for p in expected]